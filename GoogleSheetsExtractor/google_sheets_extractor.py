@@ -1,9 +1,14 @@
 import json
 import os
+import sys
 from dotenv import load_dotenv
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.sheets_reader import read_header_row, iter_column
+from scraper_common.metrics import timed
+
 # Scopes required for reading Google Sheets
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 load_dotenv()
@@ -15,12 +20,13 @@ SHEET_NAME = 'India vs Eng Women'
 VIDEO_LINK_COLUMN = 'VIDEO LINK'
 
 class GoogleSheetsExtractor:
-    def __init__(self, spreadsheet_id, sheet_name, column_name):
+    def __init__(self, spreadsheet_id, sheet_name, column_name, service=None):
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
         self.column_name = column_name
-        self.service = None
-        self.authenticate()
+        self.service = service
+        if service is None:
+            self.authenticate()
     
     def authenticate(self):
         """Authenticate with Google Sheets API using service account"""
@@ -42,27 +48,18 @@ class GoogleSheetsExtractor:
             print(f"❌ Authentication error: {e}")
             raise
     
-    def get_sheet_data(self):
-        """Get all data from the specified sheet"""
+    def get_header_row(self):
+        """Get just the first row of the sheet"""
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A:Z'  # Get all columns
-            ).execute()
-            
-            values = result.get('values', [])
-            
-            if not values:
-                print('No data found in the sheet.')
-                return None
-            
-            return values
-        
+            return read_header_row(self.service, self.spreadsheet_id, self.sheet_name)
         except Exception as e:
-            print(f'Error getting sheet data: {e}')
+            print(f'Error getting header row: {e}')
             return None
     
+    def iter_column_values(self, column_index, start_row=2):
+        """Yield (row_number, cell_value) for one column, fetched in batches of row windows"""
+        return iter_column(self.service, self.spreadsheet_id, self.sheet_name, column_index, start_row)
+    
     def find_column_index(self, headers, column_name):
         """Find the index of the specified column"""
         try:
@@ -74,15 +71,15 @@ class GoogleSheetsExtractor:
                     return i
             return -1
     
-    def extract_sharepoint_links(self):
-        """Extract SharePoint links from the specified column"""
-        data = self.get_sheet_data()
+    def iter_sharepoint_links(self):
+        """Yield SharePoint links from the specified column as rows arrive"""
+        # Get headers (first row) only, then just the one column
+        headers = self.get_header_row()
         
-        if not data:
-            return []
+        if not headers:
+            print('No data found in the sheet.')
+            return
         
-        # Get headers (first row)
-        headers = data[0]
         print(f"Available columns: {headers}")
         
         # Find the column index
@@ -91,27 +88,29 @@ class GoogleSheetsExtractor:
         if column_index == -1:
             print(f"Column '{self.column_name}' not found!")
             print(f"Available columns: {headers}")
-            return []
+            return
         
         print(f"Found '{self.column_name}' at column index {column_index}")
         
-        # Extract SharePoint links
-        sharepoint_links = []
-        
-        for row_index, row in enumerate(data[1:], start=2):  # Skip header, start from row 2
-            if column_index < len(row):
-                cell_value = row[column_index]
-                
-                if cell_value and isinstance(cell_value, str):
-                    # Check if it's a SharePoint link
-                    if 'sharepoint.com' in cell_value.lower():
-                        sharepoint_links.append({
-                            'row': row_index,
-                            'link': cell_value.strip()
-                        })
-        
-        return sharepoint_links
+        for row_index, cell_value in self.iter_column_values(column_index):  # Skip header, start from row 2
+            if cell_value and isinstance(cell_value, str):
+                # Check if it's a SharePoint link
+                if 'sharepoint.com' in cell_value.lower():
+                    yield {
+                        'row': row_index,
+                        'link': cell_value.strip()
+                    }
+    
+    @timed('sheet_sync')
+    def extract_sharepoint_links(self):
+        """Extract SharePoint links from the specified column"""
+        try:
+            return list(self.iter_sharepoint_links())
+        except Exception as e:
+            print(f'Error getting sheet data: {e}')
+            return []
     
+    @timed('state_write', store='json')
     def save_links_to_file(self, links, filename='sharepoint_links.json'):
         """Save extracted links to a JSON file"""
         try:
@@ -1,6 +1,9 @@
 import json
 import time
 import os
+import sys
+import queue
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,20 +11,42 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.driver_pool import DriverPool
+from scraper_common.waits import load_page, wait_until, wait_for_document_ready, wait_for_network_idle, wait_for_staleness
+from scraper_common.selector_engine import find_cached
+from scraper_common.metrics import timed
+from scraper_common.batch_profile import batch_mode_enabled, apply_batch_options, block_heavy_resources
+from scraper_common.browser_session import export_cookies, import_cookies, save_cookies, load_cookies, cookie_header
+from scraper_common.http_download import SegmentedDownloader, DownloadError, HttpStatusError, discard_response
+from scraper_common.urls import sharepoint_download_url, SHAREPOINT_HOSTS
+from scraper_common.download_watcher import DownloadWatcher, print_progress
+from scraper_common.rate_limit import RateLimiter
+
+SESSION_FILE = os.getenv("SHAREPOINT_SESSION_FILE", "sharepoint_session.json")  # Saved sign-in cookies, reused across runs
+LOGIN_HOSTS = ("login.microsoftonline.com", "login.live.com", "login.windows.net")
+
 class SimpleSharePointDownloader:
-    def __init__(self, download_folder="downloads", headless=False):
+    def __init__(self, download_folder="downloads", headless=False, driver_pool=None, batch_mode=None):
         self.download_folder = os.path.abspath(download_folder)
-        self.setup_driver(headless)
+        # Batch mode (SCRAPER_BATCH_MODE=1, off by default) is headless with a trimmed browser profile
+        self.batch_mode = batch_mode_enabled() if batch_mode is None else batch_mode
+        self.headless = headless or self.batch_mode
+        self.driver_pool = driver_pool
+        self.owns_pool = driver_pool is None
+        self.focus_window = True  # Parallel workers share the screen and leave their windows where they are
+        self.interactive = True  # ...and the terminal, so they fail a link instead of waiting for input()
         
         # Create download folder if it doesn't exist
         os.makedirs(self.download_folder, exist_ok=True)
+        self.setup_driver(self.headless)
         print(f"Downloads will be saved to: {self.download_folder}")
     
-    def setup_driver(self, headless=False):
-        """Setup Chrome driver with download preferences"""
+    def build_chrome_options(self, download_directory=None):
+        """Chrome options with download preferences"""
         chrome_options = Options()
         
-        if headless:
+        if self.headless:
             chrome_options.add_argument("--headless")
         
         chrome_options.add_argument("--no-sandbox")
@@ -31,7 +56,7 @@ class SimpleSharePointDownloader:
         
         # Set download preferences
         prefs = {
-            "download.default_directory": self.download_folder,
+            "download.default_directory": download_directory or self.download_folder,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True,
@@ -40,14 +65,29 @@ class SimpleSharePointDownloader:
         }
         chrome_options.add_experimental_option("prefs", prefs)
         
+        if self.batch_mode:
+            apply_batch_options(chrome_options)
+        return chrome_options
+    
+    def setup_driver(self, headless=False):
+        """Get a Chrome driver from the driver pool"""
+        self.headless = headless or self.batch_mode
+        if self.driver_pool is None:
+            self.driver_pool = DriverPool(
+                size=1,
+                options_factory=self.build_chrome_options,
+                on_launch=block_heavy_resources if self.batch_mode else None
+            )
+        
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = self.driver_pool.acquire(self.download_folder)
             print("Chrome driver initialized successfully")
         except Exception as e:
             print(f"Error initializing Chrome driver: {e}")
             print("Make sure you have Chrome and ChromeDriver installed")
             raise
     
+    @timed('authentication')
     def handle_authentication(self):
         """Handle SharePoint authentication if needed"""
         try:
@@ -68,6 +108,9 @@ class SimpleSharePointDownloader:
                 if indicator.lower() in page_text or indicator.lower() in current_url:
                     print(f"🔐 Authentication required - detected: {indicator}")
                     print(f"Current URL: {self.driver.current_url}")
+                    if not self.interactive:
+                        print("❌ Can't ask for a sign-in from a parallel worker, skipping this video")
+                        return False
                     print("Please complete authentication manually in the browser...")
                     
                     # Wait for user to complete authentication
@@ -89,10 +132,6 @@ class SimpleSharePointDownloader:
             # Simulate user activity
             self.simulate_user_activity()
             
-            # Keep the same browser tab open
-            # Don't navigate away completely
-            time.sleep(2)
-            
             # Clear any popups or overlays that might interfere
             try:
                 # Close any notification bars
@@ -110,6 +149,9 @@ class SimpleSharePointDownloader:
 
     def ensure_browser_focus(self):
         """Ensure browser window is focused and active"""
+        if self.headless or not self.focus_window:
+            return  # No window to bring forward; headless pages always count as visible
+        
         try:
             # Bring browser window to front
             self.driver.maximize_window()
@@ -124,8 +166,8 @@ class SimpleSharePointDownloader:
             except:
                 pass
                 
-            # Small delay to ensure focus is established
-            time.sleep(1)
+            # Wait until the document reports focus
+            wait_until(lambda: self.driver.execute_script("return document.hasFocus();"), 1)
             
             print("✅ Browser window focused")
             
@@ -134,6 +176,9 @@ class SimpleSharePointDownloader:
 
     def simulate_user_activity(self):
         """Simulate user activity to keep SharePoint active"""
+        if self.headless:
+            return  # Only needed for a visible window that may lose focus
+        
         try:
             # Execute JavaScript to simulate user presence
             self.driver.execute_script("""
@@ -166,13 +211,14 @@ class SimpleSharePointDownloader:
         except Exception as e:
             print(f"Error simulating activity: {e}")
 
+    @timed('video_download', scraper='sharepoint')
     def download_video(self, url, row_number=None):
         """Download a single video from SharePoint URL"""
         try:
             print(f"\nProcessing {'Row ' + str(row_number) + ': ' if row_number else ''}{url}")
             
             # Navigate to the URL
-            self.driver.get(url)
+            load_page(self.driver, url)
             print("Page loaded, waiting for content...")
 
             # Wait for page to load
@@ -183,8 +229,8 @@ class SimpleSharePointDownloader:
             # Ensure browser is focused and active
             self.ensure_browser_focus()
             
-            # Wait additional time for SharePoint to fully load
-            time.sleep(5)
+            # SharePoint keeps rendering client-side after the load event
+            wait_for_network_idle(self.driver, timeout=5)
 
             # Check if authentication is needed
             # if self.handle_authentication():
@@ -231,7 +277,7 @@ class SimpleSharePointDownloader:
                     if attempt < 2:  # Don't refresh on last attempt
                         print("Refreshing page and trying again...")
                         self.driver.refresh()
-                        time.sleep(5)
+                        wait_for_document_ready(self.driver)
                     else:
                         print("⚠️ Video player not detected after all attempts")
                         # Debug: Check what's actually on the page
@@ -247,18 +293,18 @@ class SimpleSharePointDownloader:
                         elif "sign in" in page_title.lower() or "login" in current_url:
                             print("🔐 Authentication required")
                             if self.handle_authentication():
-                                time.sleep(5)
+                                wait_for_document_ready(self.driver)
                                 video_player_loaded = True
                             else:
                                 return False
 
             # Additional wait for video content to fully load
             if video_player_loaded:
-                time.sleep(3)
+                wait_for_network_idle(self.driver, timeout=3)
             else:
                 # Last attempt - wait a bit more and check for any SharePoint content
                 print("⏳ Giving SharePoint more time to load...")
-                time.sleep(10)
+                wait_for_network_idle(self.driver, timeout=10)
             
             # Try multiple selectors for the download button
             download_selectors = [
@@ -276,29 +322,15 @@ class SimpleSharePointDownloader:
                 ".ms-CommandBar button[aria-label*='Download']",
                 "[role='menuitem'][aria-label*='Download']",
                 ".ms-ContextualMenu button[aria-label*='Download']",
-                # Fallback selectors
-                "button:contains('Download')",
+                # Fallback selectors (XPath for text-based search)
+                "//button[contains(text(), 'Download')]",
                 "a[href*='download']"
             ]
             
-            download_button = None
-            
-            for selector in download_selectors:
-                try:
-                    if ":contains" in selector:
-                        # Use XPath for text-based search
-                        download_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, f"//button[contains(text(), 'Download')]"))
-                        )
-                    else:
-                        download_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                    
-                    print(f"Found download button with selector: {selector}")
-                    break
-                except TimeoutException:
-                    continue
+            # CSS and XPath candidates are checked together in one probe, 15 seconds in total
+            download_button, selector = find_cached(self.driver, 'download_button', download_selectors, timeout=15, clickable=True)
+            if download_button:
+                print(f"Found download button with selector: {selector}")
             
             if not download_button:
                 print("❌ Download button not found. Trying alternative methods...")
@@ -341,26 +373,24 @@ class SimpleSharePointDownloader:
                     print("❌ Could not find download button. Trying page refresh...")
                     # Try refreshing the page once
                     self.driver.refresh()
-                    time.sleep(10)
+                    wait_for_document_ready(self.driver)
+                    wait_for_network_idle(self.driver, timeout=10)
                     
                     # Try one more time after refresh
-                    for selector in download_selectors[:5]:  # Try top 5 selectors
-                        try:
-                            if ":contains" in selector:
-                                download_button = WebDriverWait(self.driver, 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, f"//button[contains(text(), 'Download')]"))
-                                )
-                            else:
-                                download_button = WebDriverWait(self.driver, 5).until(
-                                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                                )
-                            print(f"Found download button after refresh with: {selector}")
-                            break
-                        except TimeoutException:
-                            continue
+                    download_button, selector = find_cached(
+                        self.driver,
+                        'download_button',
+                        download_selectors[:5],  # Try top 5 selectors
+                        timeout=10,
+                        clickable=True
+                    )
+                    if download_button:
+                        print(f"Found download button after refresh with: {selector}")
                     
                     if not download_button:
                         print("❌ Still could not find download button after refresh")
+                        if not self.interactive:
+                            return False
                         
                         # Offer manual intervention
                         print("\n🔧 Manual intervention option:")
@@ -384,7 +414,6 @@ class SimpleSharePointDownloader:
             try:
                 # Scroll to button if needed
                 self.driver.execute_script("arguments[0].scrollIntoView();", download_button)
-                time.sleep(1)
                 
                 # Click using JavaScript to avoid interception
                 self.driver.execute_script("arguments[0].click();", download_button)
@@ -421,6 +450,7 @@ class SimpleSharePointDownloader:
             print(f"❌ Error downloading video: {e}")
             return False
     
+    @timed('dialog', kind='sharepoint_download')
     def handle_download_dialogs(self):
         """Handle the download dialog boxes"""
         try:
@@ -434,8 +464,10 @@ class SimpleSharePointDownloader:
                 )
                 print("✅ Dialog appeared")
                 
-                # Wait a moment for dialog content to load
-                time.sleep(2)
+                # Wait a moment for dialog content (its buttons) to load
+                wait_until(lambda: self.driver.find_elements(
+                    By.XPATH, "//div[@role='dialog']//button | //div[contains(@class, 'Dialog')]//button"
+                ), 2)
                 
                 # Log dialog content for debugging
                 try:
@@ -483,26 +515,11 @@ class SimpleSharePointDownloader:
                 "//div[@role='dialog']//button[contains(@class, 'ms-Button--primary')]"
             ]
             
-            for selector in dialog_selectors:
-                try:
-                    if selector.startswith("//"):
-                        # XPath selector
-                        dialog_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                    else:
-                        # CSS selector
-                        dialog_button = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                    
-                    self.driver.execute_script("arguments[0].click();", dialog_button)
-                    print("✅ Clicked download button in dialog")
-                    time.sleep(2)
-                    break
-                    
-                except TimeoutException:
-                    continue
+            dialog_button, _ = find_cached(self.driver, 'download_dialog', dialog_selectors, timeout=10, clickable=True)
+            if dialog_button:
+                self.driver.execute_script("arguments[0].click();", dialog_button)
+                print("✅ Clicked download button in dialog")
+                wait_for_staleness(self.driver, dialog_button, timeout=2)
             
             # Second dialog - "Allow download" (if it appears)
             try:
@@ -515,18 +532,10 @@ class SimpleSharePointDownloader:
                     "//button[contains(@class, 'ms-Button--primary') and contains(text(), 'Allow')]"
                 ]
                 
-                for selector in allow_selectors:
-                    try:
-                        allow_button = WebDriverWait(self.driver, 5).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        
-                        self.driver.execute_script("arguments[0].click();", allow_button)
-                        print("✅ Clicked allow button in second dialog")
-                        break
-                        
-                    except TimeoutException:
-                        continue
+                allow_button, _ = find_cached(self.driver, 'allow_dialog', allow_selectors, timeout=5, clickable=True)
+                if allow_button:
+                    self.driver.execute_script("arguments[0].click();", allow_button)
+                    print("✅ Clicked allow button in second dialog")
                         
             except Exception as e:
                 print("ℹ️ No second dialog appeared (this is normal)")
@@ -644,20 +653,369 @@ class SimpleSharePointDownloader:
             print(f"❌ Error: {e}")
     
     def close(self):
-        """Close the browser"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        """Close the browser (or return it to a shared pool)"""
+        if getattr(self, 'driver', None):
+            self.driver_pool.release(self.driver)
+            self.driver = None
+            if self.owns_pool:
+                self.driver_pool.close()
             print("Browser closed")
 
+class ParallelSharePointDownloader(SimpleSharePointDownloader):
+    """Downloads SharePoint videos with several browsers that share one signed-in session
+
+    The first browser signs in (or reuses a session saved by an earlier run)
+    and its cookies are exported over CDP and loaded into every browser the
+    pool launches after it. Chrome locks a user-data-dir to one browser, so
+    the session travels as cookies rather than as a shared profile. A global
+    rate limiter spaces out the page loads instead of a fixed sleep per link.
+
+    With direct_download the session goes one step further, into a pooled
+    HTTP client: videos are fetched from their download.aspx URL with Range
+    resume, `concurrency` at a time, and the one browser is only used to
+    renew the session when it expires and for links that can't be fetched
+    directly.
+    """
+    def __init__(self, download_folder="downloads", headless=False, concurrency=3, min_interval=3.0,
+                 batch_mode=None, session_file=SESSION_FILE, completion_timeout=1800,
+                 direct_download=False, connections=4, sharepoint_hosts=SHAREPOINT_HOSTS):
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(min_interval)
+        self.session_file = session_file
+        self.completion_timeout = completion_timeout
+        self.cookies = load_cookies(session_file)
+        self.user_agent = None
+        self.session_version = 0  # Bumped whenever the session is renewed
+        self.http = SegmentedDownloader(connections=connections) if direct_download else None
+        self.sharepoint_hosts = sharepoint_hosts  # Host suffixes the direct download accepts
+        self.workers = []
+        self.idle_workers = []  # Browsers for links the direct download hands back, not in use
+        self.lock = threading.Lock()
+        self.browser_lock = threading.Lock()  # The first browser renews the session for the direct download threads
+        super().__init__(download_folder, headless, batch_mode=batch_mode)
+        self.focus_window = False
+        self.interactive = False
+
+    def setup_driver(self, headless=False):
+        """Get the first browser from a pool sized for all workers"""
+        self.headless = headless or self.batch_mode
+        if self.driver_pool is None:
+            # In direct mode the first browser only renews the session; every thread may need one more
+            self.driver_pool = DriverPool(
+                size=self.concurrency + (1 if self.http else 0),
+                options_factory=self.build_chrome_options,
+                on_launch=self.prepare_browser
+            )
+        super().setup_driver(headless)
+
+    def prepare_browser(self, driver):
+        """Run on every new browser: batch resource blocking and the shared session cookies"""
+        if self.batch_mode:
+            block_heavy_resources(driver)
+        if self.cookies:
+            try:
+                import_cookies(driver, self.cookies)
+            except Exception as e:
+                print(f"⚠️ Warning: Could not load session cookies into browser: {e}")
+
+    def on_login_page(self):
+        current_url = self.driver.current_url.lower()
+        return any(host in current_url for host in LOGIN_HOSTS)
+
+    def save_session(self):
+        """Export the first browser's cookies for the other browsers and the next run"""
+        try:
+            self.cookies = export_cookies(self.driver)
+            self.user_agent = self.driver.execute_script("return navigator.userAgent;")
+            save_cookies(self.cookies, self.session_file)
+            print(f"🔑 Saved SharePoint session ({len(self.cookies)} cookies) to {self.session_file}")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not save session: {e}")
+
+    @timed('authentication')
+    def sign_in(self, url, prompt=True):
+        """Make sure the shared session is signed in, asking the user once if it isn't
+
+        Only the first sign-in, on the main thread, prompts; with prompt=False
+        a sign-in page just fails.
+        """
+        try:
+            load_page(self.driver, url)
+        except Exception as e:
+            print(f"❌ Could not open {url}: {e}")
+            return False
+
+        if not self.on_login_page():
+            print("✅ SharePoint session is signed in")
+            self.save_session()
+            return True
+
+        if not prompt:
+            print("❌ SharePoint asks for a sign-in, which can't be done while the workers are running")
+            print(f"Run again to sign in; the session is saved to {self.session_file}")
+            return False
+
+        if self.headless:
+            print("❌ SharePoint asks for a sign-in, which a headless browser can't show")
+            print(f"Run once with a visible browser (SCRAPER_BATCH_MODE=0) to save the session to {self.session_file}")
+            return False
+
+        print("🔐 Authentication required - please sign in in the browser window")
+        print("The other browsers will reuse this session")
+        input("Press Enter after you've signed in and can see the video...")
+        if self.on_login_page():
+            print("❌ Still on the sign-in page")
+            return False
+        self.save_session()
+        return True
+
+    def renew_session(self, url, version):
+        """Sign in again in the browser after the HTTP session expired; one thread renews, the others wait for it"""
+        with self.browser_lock:
+            if self.session_version != version:
+                return True  # Another thread renewed it meanwhile
+            print("🔐 SharePoint session expired, renewing it in the browser...")
+            # Called from the worker threads, which must not wait for input() with the lock held
+            if not self.sign_in(url, prompt=False):
+                return False
+            self.session_version += 1
+            return True
+
+    def session_headers(self, url):
+        """Headers that make an HTTP request part of the browser's session"""
+        headers = {}
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
+        cookies = cookie_header(self.cookies or [], url)
+        if cookies:
+            headers['Cookie'] = cookies
+        return headers
+
+    def check_download(self, url, headers):
+        """Ask for the first byte: 'ok', 'expired' (sent to the sign-in page) or 'failed'"""
+        try:
+            response = self.http.request(url, headers, start=0, end=0)
+        except Exception as e:
+            print(f"⚠️ Could not reach {url}: {e}")
+            return 'failed'
+        try:
+            final_url = (response.geturl() or url).lower()
+            if response.status in (401, 403) or any(host in final_url for host in LOGIN_HOSTS):
+                return 'expired'
+            if response.status >= 400:
+                print(f"⚠️ HTTP {response.status} for {url}")
+                return 'failed'
+            if 'text/html' in response.headers.get('Content-Type', ''):
+                return 'expired'  # A sign-in or error page instead of the file
+            return 'ok'
+        finally:
+            discard_response(response)
+
+    @timed('video_download', scraper='sharepoint', mode='http')
+    def download_direct(self, url, row_number=None):
+        """Fetch a video over HTTP with the browser's session; None when the browser has to do it"""
+        download_url = sharepoint_download_url(url, self.sharepoint_hosts)
+        if not download_url:
+            return None
+        print(f"\nProcessing {'Row ' + str(row_number) + ': ' if row_number else ''}{url}")
+
+        for attempt in range(2):
+            version = self.session_version
+            headers = self.session_headers(download_url)
+            status = self.check_download(download_url, headers)
+            if status == 'ok':
+                try:
+                    file_path = self.http.download(download_url, self.download_folder, headers=headers)
+                    print(f"✅ Downloaded {os.path.basename(file_path)}")
+                    return True
+                except HttpStatusError as e:
+                    # The session ran out mid-download; the .part file is resumed after renewing it
+                    status = 'expired' if e.status in (401, 403) else 'failed'
+                    print(f"⚠️ Direct download stopped: {e}")
+                except DownloadError as e:
+                    print(f"❌ Direct download failed: {e}")
+                    return None
+            if status != 'expired' or attempt or not self.renew_session(url, version):
+                return None
+        return None
+
+    def process_link(self, worker, url, row):
+        if self.http:
+            result = self.download_direct(url, row)
+            if result is not None:
+                return result
+            print("↪️ Downloading with the browser instead")
+            worker = self.acquire_worker()
+            try:
+                return worker.download_video(url, row)
+            finally:
+                with self.lock:
+                    self.idle_workers.append(worker)
+        return worker.download_video(url, row)
+
+    def acquire_worker(self):
+        """A browser of its own for a link the direct download couldn't fetch, launched on first use"""
+        with self.lock:
+            worker = self.idle_workers.pop() if self.idle_workers else None
+        if worker is None:
+            worker = SimpleSharePointDownloader(self.download_folder, self.headless,
+                                                driver_pool=self.driver_pool, batch_mode=self.batch_mode)
+            worker.focus_window = False
+            worker.interactive = False
+            worker.session_version = self.session_version  # The pool loaded the current cookies
+            with self.lock:
+                self.workers.append(worker)
+        elif worker.session_version != self.session_version:
+            # The session was renewed since this browser last got cookies
+            import_cookies(worker.driver, self.cookies)
+            worker.session_version = self.session_version
+        return worker
+
+    def start_workers(self, count):
+        """The first browser plus count - 1 more, launched together once the session cookies are known"""
+        self.workers = [self]
+        if self.http:
+            return  # Direct downloads launch browsers only for the links they hand back
+        self.driver_pool.warm(count - 1)
+        for _ in range(count - 1):
+            try:
+                worker = SimpleSharePointDownloader(self.download_folder, self.headless,
+                                                    driver_pool=self.driver_pool, batch_mode=self.batch_mode)
+            except Exception as e:
+                print(f"⚠️ Continuing with {len(self.workers)} browsers: {e}")
+                break
+            worker.focus_window = False
+            worker.interactive = False
+            self.workers.append(worker)
+
+    def run_worker(self, worker, work, results):
+        while True:
+            try:
+                index, url, row = work.get_nowait()
+            except queue.Empty:
+                return
+            self.rate_limiter.wait()
+            print(f"\n{'='*60}")
+            print(f"Processing link {index}/{results['total']}")
+            try:
+                success = self.process_link(worker, url, row)
+            except Exception as e:
+                print(f"❌ Error downloading video: {e}")
+                success = False
+            with self.lock:
+                if success:
+                    results['successful'] += 1
+                    print(f"✅ Successfully processed link{' from row ' + str(row) if row else ''}")
+                else:
+                    results['failed'] += 1
+                    print(f"❌ Failed to process {url}")
+
+    def download_links(self, links):
+        """Download (url, row) pairs with up to `concurrency` browsers at once"""
+        results = {'total': len(links), 'successful': 0, 'failed': 0}
+        if not links:
+            return results
+        if not self.sign_in(links[0][0]):
+            results['failed'] = len(links)
+            return results
+
+        count = min(self.concurrency, len(links))
+        self.start_workers(count)
+        if self.http:
+            print(f"🚀 Downloading {count} videos at a time over HTTP, "
+                  f"one new request every {self.rate_limiter.interval:g} seconds")
+            thread_workers = [self] * count
+        else:
+            print(f"🚀 Downloading with {len(self.workers)} browsers, "
+                  f"one new page every {self.rate_limiter.interval:g} seconds")
+            thread_workers = self.workers
+
+        work = queue.Queue()
+        for index, (url, row) in enumerate(links, 1):
+            work.put((index, url, row))
+        threads = [threading.Thread(target=self.run_worker, args=(worker, work, results), daemon=True)
+                   for worker in thread_workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The browsers must stay open until Chrome has written the files (.part files are the HTTP client's)
+        print("⏳ Waiting for downloads to finish...")
+        with DownloadWatcher(self.download_folder, temp_suffixes=('.crdownload', '.tmp')) as watcher:
+            if not watcher.wait_for_completion(timeout=self.completion_timeout, progress_callback=print_progress):
+                print(f"⚠️ Downloads still running after {self.completion_timeout} seconds")
+        return results
+
+    def print_summary(self, results):
+        print(f"\n{'='*60}")
+        print(f"📊 SUMMARY:")
+        print(f"✅ Successful downloads: {results['successful']}")
+        print(f"❌ Failed downloads: {results['failed']}")
+        print(f"📂 Downloads saved to: {self.download_folder}")
+
+    def download_from_file(self, filename="sharepoint_links.json"):
+        """Download all videos from a JSON file containing links, in parallel"""
+        try:
+            with open(filename, 'r') as f:
+                links_data = json.load(f)
+
+            print(f"Found {len(links_data)} links to process")
+            links = [(link_info.get('link', ''), link_info.get('row', 'Unknown')) for link_info in links_data]
+            self.print_summary(self.download_links(links))
+
+        except FileNotFoundError:
+            print(f"❌ File '{filename}' not found!")
+            print("Please run the Google Sheets extractor first to generate the links file.")
+        except json.JSONDecodeError:
+            print(f"❌ Error reading JSON file '{filename}'")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+    def download_from_text_file(self, filename="sharepoint_urls.txt"):
+        """Download all videos from a text file containing URLs (one per line), in parallel"""
+        try:
+            with open(filename, 'r') as f:
+                urls = [line.strip() for line in f if line.strip()]
+
+            print(f"Found {len(urls)} URLs to process")
+            self.print_summary(self.download_links([(url, None) for url in urls]))
+
+        except FileNotFoundError:
+            print(f"❌ File '{filename}' not found!")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+    def close(self):
+        """Return the extra browsers, then close the first one and the pool"""
+        for worker in self.workers:
+            if worker is not self:
+                worker.close()
+        self.workers = []
+        self.idle_workers = []
+        super().close()
+
 def main():
     print("🚀 SharePoint Video Downloader")
     print("=" * 50)
     
     # Create downloader instance
-    downloader = SimpleSharePointDownloader(
-        download_folder="downloads",
-        headless=False  # Set to True to run without showing browser
-    )
+    concurrency = int(os.getenv("SHAREPOINT_WORKERS", "3"))  # Videos downloading at once; 1 runs the serial downloader
+    direct_download = os.getenv("SHAREPOINT_DIRECT_DOWNLOAD", "0") == "1"  # Fetch videos over HTTP with the browser's session
+    if concurrency > 1 or direct_download:
+        downloader = ParallelSharePointDownloader(
+            download_folder="downloads",
+            headless=False,  # Set to True to run without showing browser
+            concurrency=concurrency,
+            min_interval=float(os.getenv("SHAREPOINT_MIN_INTERVAL", "3")),  # Seconds between page loads across all browsers
+            direct_download=direct_download,
+            connections=int(os.getenv("SHAREPOINT_CONNECTIONS", "4"))  # Parallel range requests per video
+        )
+    else:
+        downloader = SimpleSharePointDownloader(
+            download_folder="downloads",
+            headless=False  # Set to True to run without showing browser
+        )
     
     try:
         # Check which files exist
@@ -1,9 +1,17 @@
 import json
 import os
+import sys
+import hashlib
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.sheets_reader import read_header_row, iter_column
+from scraper_common.urls import normalize_url, canonical_host, extract_urls
+from scraper_common.metrics import timed
+
 # Scopes required for reading Google Sheets
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 load_dotenv()
@@ -16,12 +24,13 @@ SHEET_NAME = 'Sheet1'  # Update this to your actual sheet name
 LINK_COLUMN = 'Link'
 
 class GoogleSheetsExtractor:
-    def __init__(self, spreadsheet_id, sheet_name, column_name):
+    def __init__(self, spreadsheet_id, sheet_name, column_name, service=None):
         self.spreadsheet_id = spreadsheet_id
         self.sheet_name = sheet_name
         self.column_name = column_name
-        self.service = None
-        self.authenticate()
+        self.service = service
+        if service is None:
+            self.authenticate()
     
     def authenticate(self):
         """Authenticate with Google Sheets API using service account"""
@@ -43,27 +52,18 @@ class GoogleSheetsExtractor:
             print(f"❌ Authentication error: {e}")
             raise
     
-    def get_sheet_data(self):
-        """Get all data from the specified sheet"""
+    def get_header_row(self):
+        """Get just the first row of the sheet"""
         try:
-            sheet = self.service.spreadsheets()
-            result = sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=f'{self.sheet_name}!A:Z'  # Get all columns
-            ).execute()
-            
-            values = result.get('values', [])
-            
-            if not values:
-                print('No data found in the sheet.')
-                return None
-            
-            return values
-        
+            return read_header_row(self.service, self.spreadsheet_id, self.sheet_name)
         except Exception as e:
-            print(f'Error getting sheet data: {e}')
+            print(f'Error getting header row: {e}')
             return None
     
+    def iter_column_values(self, column_index, start_row=2):
+        """Yield (row_number, cell_value) for the link column, fetched in batches of row windows"""
+        return iter_column(self.service, self.spreadsheet_id, self.sheet_name, column_index, start_row)
+    
     def find_column_index(self, headers, column_name):
         """Find the index of the specified column"""
         try:
@@ -77,91 +77,161 @@ class GoogleSheetsExtractor:
     
     def classify_link_type(self, url):
         """Classify the type of link (transfernow or wetransfer)"""
-        url_lower = url.lower()
+        host = canonical_host(urlsplit(url).hostname)
         
-        if 'transfernow.net' in url_lower:
+        if 'transfernow.net' in host:
             return 'transfernow'
-        elif 'wetransfer.com' in url_lower:
+        elif 'wetransfer.com' in host:
             return 'wetransfer'
         else:
             return 'unknown'
     
     def split_cell_links(self, cell_value):
-        """Split cell value by various delimiters to extract individual links"""
+        """Extract individual links from a cell, whatever separates them"""
         if not cell_value:
             return []
-        
-        # Split by common delimiters
-        delimiters = ['\n', '\r\n', '\r', '|', ';', ',']
-        links = [cell_value]
-        
-        for delimiter in delimiters:
-            new_links = []
-            for link in links:
-                new_links.extend([l.strip() for l in link.split(delimiter) if l.strip()])
-            links = new_links
-        
-        # Filter out empty strings and ensure we have valid URLs
-        valid_links = []
-        for link in links:
-            link = link.strip()
-            if link and ('http://' in link or 'https://' in link):
-                valid_links.append(link)
-        
-        return valid_links
+        return extract_urls(cell_value)
 
-    def extract_transfer_links(self):
-        """Extract transfer links from the specified column"""
-        data = self.get_sheet_data()
+    def parse_cell_links(self, cell_value):
+        """(url, type) for every TransferNow / WeTransfer link in a cell"""
+        found = []
+        for link_url in self.split_cell_links(cell_value):
+            link_type = self.classify_link_type(link_url)
+            
+            # Only process transfernow and wetransfer links
+            if link_type in ['transfernow', 'wetransfer']:
+                found.append((link_url, link_type))
+        return found
+
+    @timed('sheet_sync')
+    def extract_transfer_links(self, sync_state=None, full_rescan=False, on_row=None):
+        """Extract transfer links from the specified column
         
-        if not data:
-            return []
+        Only the link column is read, and only rows past the high-water mark
+        in sync_state unless full_rescan is set. Rows whose content hash has
+        not changed are skipped. on_row(row_number, cell_value, links) is
+        called for every new or changed row as it is read.
+        Returns (changed_rows, sync_state) where changed_rows maps a row
+        number to (cell_value, [(url, type), ...]), or (None, sync_state) on error.
+        """
+        sync_state = dict(sync_state or {})
         
-        # Get headers (first row)
-        headers = data[0]
-        print(f"Available columns: {headers}")
+        # Resolve the column from the header row only
+        headers = self.get_header_row()
+        if not headers:
+            print('No data found in the sheet.')
+            return None, sync_state
         
-        # Find the column index
         column_index = self.find_column_index(headers, self.column_name)
-        
         if column_index == -1:
             print(f"Column '{self.column_name}' not found!")
             print(f"Available columns: {headers}")
-            return []
+            return None, sync_state
         
         print(f"Found '{self.column_name}' at column index {column_index}")
         
-        # Extract transfer links
-        transfer_links = []
-        link_counter = 1
+        # A different sheet or a moved column invalidates the stored state
+        source = [self.spreadsheet_id, self.sheet_name, column_index]
+        if sync_state.get('source') != source or 'row_links' not in sync_state:
+            if sync_state:
+                print("ℹ️ Sheet or column changed since the last sync (or older sync state), rescanning all rows")
+            sync_state = {'source': source, 'last_row': 1, 'row_hashes': {}, 'row_links': {}}
+            full_rescan = True
+        
+        row_hashes = dict(sync_state.get('row_hashes', {}))
+        # Normalized URLs of every row with links, so unchanged rows are known without reading them
+        row_links = dict(sync_state.get('row_links', {}))
+        start_row = 2 if full_rescan else sync_state.get('last_row', 1) + 1
         
-        for row_index, row in enumerate(data[1:], start=2):  # Skip header, start from row 2
-            if column_index < len(row):
-                cell_value = row[column_index]
+        changed_rows = {}
+        seen_rows = set()
+        last_row = start_row - 1
+        try:
+            # Rows stream in window by window, the column is never held in memory as a whole
+            for row_index, cell_value in self.iter_column_values(column_index, start_row):
+                if not cell_value or not isinstance(cell_value, str):
+                    continue
+                
+                key = str(row_index)
+                seen_rows.add(key)
+                last_row = row_index
+                digest = hashlib.sha1(cell_value.encode('utf-8')).hexdigest()[:16]
+                if row_hashes.get(key) == digest:
+                    continue
                 
-                if cell_value and isinstance(cell_value, str):
-                    # Split the cell value to handle multiple links
-                    individual_links = self.split_cell_links(cell_value)
-                    
-                    for link_url in individual_links:
-                        link_type = self.classify_link_type(link_url)
-                        
-                        # Only process transfernow and wetransfer links
-                        if link_type in ['transfernow', 'wetransfer']:
-                            transfer_links.append({
-                                'id': f"link_{link_counter}",
-                                'row': row_index,
-                                'original_cell': cell_value[:100] + "..." if len(cell_value) > 100 else cell_value,
-                                'url': link_url,
-                                'type': link_type,
-                                'status': 'pending',
-                                'processed': 0  # New field: 0 = not processed, 1 = processed
-                            })
-                            link_counter += 1
+                row_hashes[key] = digest
+                changed_rows[row_index] = (cell_value, self.parse_cell_links(cell_value))
+                urls = [normalize_url(link_url) for link_url, _ in changed_rows[row_index][1]]
+                if urls:
+                    row_links[key] = urls
+                else:
+                    row_links.pop(key, None)
+                if on_row:
+                    on_row(row_index, *changed_rows[row_index])
+        except Exception as e:
+            print(f'Error getting column data: {e}')
+            return None, sync_state
         
-        return transfer_links
+        if full_rescan:
+            # Rows that were cleared since the last sync
+            for key in list(row_hashes):
+                if key not in seen_rows:
+                    del row_hashes[key]
+                    row_links.pop(key, None)
+                    changed_rows[int(key)] = ('', [])
+                    if on_row:
+                        on_row(int(key), '', [])
+        
+        sync_state['last_row'] = max(sync_state.get('last_row', 1), last_row)
+        sync_state['row_hashes'] = row_hashes
+        sync_state['row_links'] = row_links
+        return changed_rows, sync_state
     
-    def save_links_to_file(self, links, filename='transfer_links.json'):
+    def merge_links(self, existing_links, changed_rows):
+        """Merge links from changed rows into the existing list
+        
+        Links already known keep their id, status and processed history.
+        URLs are compared in normalized form, so a transfer that appears in
+        several rows (or is written slightly differently) is only listed once,
+        under the first row it was found in. A link that disappeared from a
+        changed row moves to another row listing it; unprocessed links no row
+        lists any more are dropped.
+        Returns (links, added) where added lists the new links.
+        """
+        merger = LinkMerger(existing_links)
+        for row_index in sorted(changed_rows):
+            cell_value, found = changed_rows[row_index]
+            merger.add_row(row_index, cell_value, found)
+        return merger.result()
+    
+    def sync_links_file(self, filename='transfer_links.json', full_rescan=False, on_links=None):
+        """Bring the links file up to date with the sheet without touching processed links
+        
+        on_links, if given, is called with the new links of each row as soon
+        as the row is read, so they can be processed before the sync ends.
+        Returns (links, added), or (None, []) if the sheet could not be read.
+        """
+        existing_links, metadata = load_links_file(filename)
+        merger = LinkMerger(existing_links)
+        
+        def merge_row(row_index, cell_value, found):
+            new_links = merger.add_row(row_index, cell_value, found)
+            if new_links and on_links:
+                on_links(new_links)
+        
+        changed_rows, sync_state = self.extract_transfer_links(metadata.get('sync'), full_rescan, on_row=merge_row)
+        if changed_rows is None:
+            return None, []
+        
+        links, added = merger.result(sync_state.get('row_links'))
+        print(f"🔄 {len(changed_rows)} new or changed rows, {len(added)} new links")
+        
+        if added or changed_rows or not os.path.exists(filename):
+            self.save_links_to_file(links, filename, sync_state)
+        return links, added
+    
+    @timed('state_write', store='json')
+    def save_links_to_file(self, links, filename='transfer_links.json', sync_state=None):
         """Save extracted links to a JSON file"""
         try:
             # Create a structured JSON with metadata
@@ -174,9 +244,14 @@ class GoogleSheetsExtractor:
                 },
                 'links': links
             }
+            if sync_state:
+                output_data['metadata']['sync'] = sync_state
             
-            with open(filename, 'w') as f:
+            # Write to a temporary file first so an interrupted save can't lose the link history
+            tmp_filename = filename + '.tmp'
+            with open(tmp_filename, 'w') as f:
                 json.dump(output_data, f, indent=2)
+            os.replace(tmp_filename, filename)
             print(f"✅ Links saved to {filename}")
             
             # Print summary
@@ -188,6 +263,101 @@ class GoogleSheetsExtractor:
         except Exception as e:
             print(f"❌ Error saving links: {e}")
 
+class LinkMerger:
+    """Merges the links of changed rows into the existing links, one row at a time
+    
+    Rows must be added in ascending order (cleared rows may follow at the
+    end) so new links get the same ids as a merge of the whole sheet.
+    """
+    def __init__(self, existing_links):
+        self.existing_links = existing_links
+        self.by_url = {}
+        for link in existing_links:
+            self.by_url.setdefault(normalize_url(link['url']), link)
+        self.next_id = 1 + max(
+            (int(link['id'].split('_')[-1]) for link in existing_links if link['id'].split('_')[-1].isdigit()),
+            default=0
+        )
+        self.changed_rows = set()
+        self.row_urls = {}  # Changed row -> normalized URLs in it
+        self.added = []
+        self.duplicates = 0
+    
+    def add_row(self, row_index, cell_value, found):
+        """Add the links found in one changed row; returns the ones that are new"""
+        self.changed_rows.add(row_index)
+        row_urls = self.row_urls.setdefault(row_index, set())
+        new_links = []
+        for link_url, link_type in found:
+            key = normalize_url(link_url)
+            row_urls.add(key)
+            if key in self.by_url:
+                if self.by_url[key]['row'] != row_index:
+                    self.duplicates += 1
+                continue
+            
+            link = {
+                'id': f"link_{self.next_id}",
+                'row': row_index,
+                'original_cell': cell_value[:100] + "..." if len(cell_value) > 100 else cell_value,
+                'url': link_url,
+                'type': link_type,
+                'status': 'pending',
+                'processed': 0  # New field: 0 = not processed, 1 = processed
+            }
+            self.by_url[key] = link
+            new_links.append(link)
+            self.next_id += 1
+        self.added.extend(new_links)
+        return new_links
+    
+    def result(self, row_links=None):
+        """(links, added) once all changed rows are in
+        
+        row_links maps the sheet's rows to the normalized URLs in them (the
+        sync state's), so a link removed from its row that an unchanged row
+        still lists moves to that row instead of being forgotten.
+        """
+        rows_by_url = {}
+        for row, keys in (row_links or {}).items():
+            if int(row) not in self.changed_rows:
+                for key in keys:
+                    rows_by_url.setdefault(key, set()).add(int(row))
+        for row, keys in self.row_urls.items():
+            for key in keys:
+                rows_by_url.setdefault(key, set()).add(row)
+        
+        links = []
+        for link in self.existing_links:
+            if link['row'] in self.changed_rows:
+                rows = rows_by_url.get(normalize_url(link['url']))
+                if rows and link['row'] not in rows:
+                    link['row'] = min(rows)
+                elif not rows and link.get('processed', 0) != 1:
+                    continue  # Forget unprocessed links whose cell no longer contains them
+            links.append(link)
+        links.extend(self.added)
+        
+        if self.duplicates:
+            print(f"ℹ️ Skipped {self.duplicates} links already listed for another row")
+        return links, self.added
+
+def load_links_file(filename):
+    """Links and metadata from an existing links file, or empty ones"""
+    try:
+        with open(filename, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return [], {}
+    except json.JSONDecodeError:
+        print(f"⚠️ Warning: {filename} is not valid JSON, starting a new links file")
+        return [], {}
+    
+    if isinstance(data, list):
+        # Older format without metadata
+        return data, {}
+    return data.get('links', []), data.get('metadata', {})
+
 def main():
     # Configuration - update these values
     spreadsheet_id = SPREADSHEET_ID
@@ -208,13 +378,14 @@ def main():
         # Create extractor instance
         extractor = GoogleSheetsExtractor(spreadsheet_id, sheet_name, column_name)
         
-        # Extract links
-        links = extractor.extract_transfer_links()
+        # Sync links: only new or changed rows are read, processed links are kept
+        full_rescan = '--full' in sys.argv
+        links, added = extractor.sync_links_file('transfer_links.json', full_rescan=full_rescan)
         
         if links:
-            print(f"\n✅ Found {len(links)} transfer links:")
+            print(f"\n✅ {len(links)} transfer links in total, {len(added)} new:")
             current_row = None
-            for i, link_info in enumerate(links, 1):
+            for i, link_info in enumerate(added, 1):
                 link_type = link_info['type'].upper()
                 url_preview = link_info['url'][:60] + "..." if len(link_info['url']) > 60 else link_info['url']
                 
@@ -227,9 +398,6 @@ def main():
                 
                 print(f"    {i}. [{link_type}] {url_preview}")
             
-            # Save to file
-            extractor.save_links_to_file(links, 'transfer_links.json')
-            
             # Also save just the URLs to a text file for reference
             with open('transfer_urls.txt', 'w') as f:
                 f.write("Transfer Links Extracted:\n")
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import threading
+
+# Phases a link goes through, in order
+STARTED = 'started'
+RESOLVED = 'resolved'  # The file URL is known
+DOWNLOADING = 'downloading'  # Bytes are arriving (with the current offset)
+DOWNLOADED = 'downloaded'
+EXTRACTED = 'extracted'
+FAILED = 'failed'
+
+FINISHED_PHASES = (EXTRACTED, FAILED)
+
+class JobJournal:
+    """Append-only record of how far each link got, used to pick up after a crash
+
+    Every event is one JSON line, flushed and fsynced before append()
+    returns, so a line that made it into the file survives a crash. The
+    state of a link is all of its events merged in order.
+    """
+    def __init__(self, path='transfer_journal.jsonl', progress_interval=10):
+        self.path = path
+        self.progress_interval = progress_interval
+        self.lock = threading.Lock()
+        self.states = self.replay()
+        self.last_progress = {}
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.end_torn_line()
+
+    def end_torn_line(self):
+        """Finish a line a crash cut short, so the next event doesn't get glued onto it"""
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b'\n'
+        if torn:
+            self.file.write('\n')
+            self.file.flush()
+
+    def replay(self):
+        """Latest merged state of every link found in the journal"""
+        states = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    link_id = event.pop('link_id', None)
+                    if link_id is None:
+                        continue
+                    if event.get('phase') == STARTED:
+                        # A fresh attempt, forget what earlier attempts recorded
+                        states[link_id] = {}
+                    states.setdefault(link_id, {}).update(event)
+        except FileNotFoundError:
+            pass
+        return states
+
+    def append(self, link_id, phase, **fields):
+        """Record that link_id reached phase"""
+        event = {'link_id': link_id, 'phase': phase, 'time': time.time(), **fields}
+        line = json.dumps(event) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            state = {} if phase == STARTED else self.states.get(link_id, {})
+            event.pop('link_id')
+            state.update(event)
+            self.states[link_id] = state
+
+    def progress(self, link_id, offset, total=None):
+        """Record the download offset, at most every progress_interval seconds per link"""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_progress.get(link_id, 0) < self.progress_interval:
+                return
+            self.last_progress[link_id] = now
+        self.append(link_id, DOWNLOADING, offset=offset, total=total)
+
+    def state(self, link_id):
+        with self.lock:
+            return dict(self.states.get(link_id, {}))
+
+    def compact(self):
+        """Rewrite the journal with one line per unfinished link"""
+        with self.lock:
+            self.file.close()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for link_id, state in self.states.items():
+                    if state.get('phase') not in FINISHED_PHASES:
+                        f.write(json.dumps({'link_id': link_id, **state}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.states = {
+                link_id: state for link_id, state in self.states.items()
+                if state.get('phase') not in FINISHED_PHASES
+            }
+            self.file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,216 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    row INTEGER,
+    url TEXT NOT NULL,
+    type TEXT,
+    original_cell TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    processed INTEGER NOT NULL DEFAULT 0,
+    processed_at TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS links_status ON links (processed, status, position);
+CREATE INDEX IF NOT EXISTS links_row ON links (row);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = ('id', 'row', 'original_cell', 'url', 'type', 'status', 'processed', 'processed_at', 'error')
+
+class LinkStore:
+    """Link state kept in SQLite so a status change is a single-row transaction
+
+    The database runs in WAL mode, so readers don't block the workers writing
+    status updates. transfer_links.json remains the exchange format: links
+    are imported from it and exported back to it.
+    """
+    def __init__(self, path='transfer_links.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Serialise writers (threads and other processes) around a block of statements"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @staticmethod
+    def to_dict(row):
+        """A link in the same shape as the entries of transfer_links.json"""
+        link = {column: row[column] for column in _COLUMNS}
+        for optional in ('processed_at', 'error'):
+            if link[optional] is None:
+                del link[optional]
+        return link
+
+    def import_json(self, filename):
+        """Add links from the extractor's JSON file
+
+        Links already in the store keep their status, so a re-extraction
+        never re-queues finished downloads. Pending links that are no longer
+        in the file are removed. Returns the number of links in the file.
+        """
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        links = data['links'] if isinstance(data, dict) else data
+        metadata = data.get('metadata', {}) if isinstance(data, dict) else {}
+
+        with self.transaction() as conn:
+            conn.executemany(
+                """
+                INSERT INTO links (id, position, row, url, type, original_cell, status, processed, processed_at, error)
+                VALUES (:id, :position, :row, :url, :type, :original_cell, :status, :processed, :processed_at, :error)
+                ON CONFLICT(id) DO UPDATE SET
+                    position = excluded.position,
+                    row = excluded.row,
+                    url = excluded.url,
+                    type = excluded.type,
+                    original_cell = excluded.original_cell
+                """,
+                (
+                    {
+                        'id': link['id'],
+                        'position': position,
+                        'row': link.get('row'),
+                        'url': link['url'],
+                        'type': link.get('type'),
+                        'original_cell': link.get('original_cell'),
+                        'status': link.get('status', 'pending'),
+                        'processed': link.get('processed', 0),
+                        'processed_at': link.get('processed_at'),
+                        'error': link.get('error')
+                    }
+                    for position, link in enumerate(links)
+                )
+            )
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS imported_ids (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM imported_ids")
+            conn.executemany("INSERT OR IGNORE INTO imported_ids (id) VALUES (?)", ((link['id'],) for link in links))
+            conn.execute(
+                "DELETE FROM links WHERE processed = 0 AND status = 'pending' AND id NOT IN (SELECT id FROM imported_ids)"
+            )
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                ((key, json.dumps(value)) for key, value in metadata.items())
+            )
+        return len(links)
+
+    def add_links(self, links):
+        """Append links that are not in the store yet (e.g. streamed from the extractor); existing ids are left alone"""
+        with self.transaction() as conn:
+            position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM links").fetchone()[0]
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO links (id, position, row, url, type, original_cell, status, processed)
+                VALUES (:id, :position, :row, :url, :type, :original_cell, 'pending', 0)
+                """,
+                (
+                    {
+                        'id': link['id'],
+                        'position': position + offset,
+                        'row': link.get('row'),
+                        'url': link['url'],
+                        'type': link.get('type'),
+                        'original_cell': link.get('original_cell')
+                    }
+                    for offset, link in enumerate(links)
+                )
+            )
+
+    def export_json(self, filename):
+        """Write all links back to the extractor's JSON format (atomically)"""
+        links = self.all_links()
+        metadata = self.metadata()
+        metadata.update({
+            'total_links': len(links),
+            'transfernow_count': len([l for l in links if l['type'] == 'transfernow']),
+            'wetransfer_count': len([l for l in links if l['type'] == 'wetransfer']),
+            'last_updated': datetime.now().isoformat()
+        })
+
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w') as f:
+            json.dump({'metadata': metadata, 'links': links}, f, indent=2)
+        os.replace(tmp_filename, filename)
+
+    def metadata(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT key, value FROM metadata").fetchall()
+        return {row['key']: json.loads(row['value']) for row in rows}
+
+    def all_links(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM links ORDER BY position").fetchall()
+        return [self.to_dict(row) for row in rows]
+
+    def pending_links(self):
+        """Links that have not been processed yet, in sheet order"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM links WHERE processed = 0 ORDER BY position"
+            ).fetchall()
+        return [self.to_dict(row) for row in rows]
+
+    def claim(self, link_id):
+        """Atomically mark a link as processing; False if someone else already has it"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE links SET status = 'processing', processed_at = ? "
+                "WHERE id = ? AND processed = 0 AND status != 'processing'",
+                (datetime.now().isoformat(), link_id)
+            )
+            return cursor.rowcount == 1
+
+    def requeue_stale(self, link_ids=None):
+        """Put links left in 'processing' by an interrupted run back to 'pending'; returns how many
+        
+        link_ids limits this to those links, e.g. the ones this process claimed.
+        """
+        query = "UPDATE links SET status = 'pending' WHERE processed = 0 AND status = 'processing'"
+        with self.transaction() as conn:
+            if link_ids is None:
+                return conn.execute(query).rowcount
+            return sum(conn.execute(query + " AND id = ?", (link_id,)).rowcount for link_id in link_ids)
+
+    def update_status(self, link_id, status, processed=None, error_message=None):
+        """Set the status (and optionally processed flag / error) of one link"""
+        assignments = ["status = ?", "processed_at = ?"]
+        params = [status, datetime.now().isoformat()]
+        if processed is not None:
+            assignments.append("processed = ?")
+            params.append(processed)
+        if error_message:
+            assignments.append("error = ?")
+            params.append(error_message)
+        params.append(link_id)
+
+        with self.transaction() as conn:
+            conn.execute(f"UPDATE links SET {', '.join(assignments)} WHERE id = ?", params)
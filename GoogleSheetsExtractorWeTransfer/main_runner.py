@@ -1,14 +1,13 @@
 #!/usr/bin/env python3
 """
 Main runner script for the Transfer Link Scraping System
-This script orchestrates the entire process:
+This script orchestrates the entire process in one pipeline:
 1. Extract links from Google Sheets
-2. Process and download files from those links
+2. Process and download files from those links, starting as soon as the first links are found
 """
 
 import os
 import sys
-import subprocess
 import json
 from datetime import datetime
 
@@ -17,6 +16,7 @@ def check_dependencies():
     required_files = [
         'google_sheets_extractor.py',
         'transfer_scraper.py',
+        'pipeline.py',
         'service-account-key.json',
         '.env'
     ]
@@ -35,82 +35,28 @@ def check_dependencies():
     
     return True
 
-def run_extraction():
-    """Run the Google Sheets extraction"""
-    print("🚀 Step 1: Extracting links from Google Sheets...")
+def run_pipeline():
+    """Extract links and download them as they are found, in this process"""
+    print("🚀 Extracting links from Google Sheets and downloading them as they are found...")
     print("-" * 50)
     
     try:
-        result = subprocess.run([sys.executable, 'google_sheets_extractor.py'], 
-                              capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            print("✅ Link extraction completed successfully!")
-            print(result.stdout)
-            return True
-        else:
-            print("❌ Link extraction failed!")
-            print("Error output:", result.stderr)
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("❌ Link extraction timed out!")
-        return False
+        # Imported here so a missing dependency is reported by check_dependencies first
+        from pipeline import run_pipeline as run_link_pipeline
+        counters = run_link_pipeline(full_rescan='--full' in sys.argv)
     except Exception as e:
-        print(f"❌ Error running extraction: {e}")
-        return False
-
-def check_extracted_links():
-    """Check if links were successfully extracted"""
-    try:
-        with open('transfer_links.json', 'r') as f:
-            data = json.load(f)
-        
-        links = data.get('links', [])
-        metadata = data.get('metadata', {})
-        
-        if not links:
-            print("❌ No links were extracted!")
-            return False
-        
-        print(f"📊 Found {len(links)} links:")
-        print(f"  - TransferNow: {metadata.get('transfernow_count', 0)}")
-        print(f"  - WeTransfer: {metadata.get('wetransfer_count', 0)}")
-        
-        return True
-        
-    except FileNotFoundError:
-        print("❌ transfer_links.json not found!")
+        print(f"❌ Error running the pipeline: {e}")
+        print("Run again to resume unfinished downloads.")
         return False
-    except Exception as e:
-        print(f"❌ Error checking extracted links: {e}")
-        return False
-
-def run_scraping():
-    """Run the transfer link scraping"""
-    print("\n🚀 Step 2: Scraping and downloading files...")
-    print("-" * 50)
     
-    try:
-        # Run the scraper
-        result = subprocess.run([sys.executable, 'transfer_scraper.py'], 
-                              text=True, timeout=7200)  # 2 hour timeout
-        
-        if result.returncode == 0:
-            print("✅ File scraping completed!")
-            return True
-        else:
-            print("❌ File scraping completed with some errors.")
-            print("Check the output above for details.")
-            return True  # Return True as partial success is still useful
-            
-    except subprocess.TimeoutExpired:
-        print("⚠️ File scraping timed out after 2 hours!")
-        print("Some downloads may still be in progress.")
-        return False
-    except Exception as e:
-        print(f"❌ Error running scraper: {e}")
+    if counters is None:
         return False
+    if counters.failed:
+        print("❌ File scraping completed with some errors.")
+        print("Check the output above for details.")
+    else:
+        print("✅ File scraping completed!")
+    return True  # Partial success is still useful
 
 def generate_summary_report():
     """Generate a summary report of the entire process"""
@@ -204,7 +150,7 @@ def main():
     print("This system will:")
     print("1. Extract transfer links from your Google Sheet")
     print("2. Download files from TransferNow and WeTransfer links")
-    print("3. Extract any zip files found")
+    print("3. Extract any archives found (zip, tar, 7z, rar)")
     print("4. Generate a summary report")
     print("=" * 80)
     
@@ -214,17 +160,7 @@ def main():
         return 1
     print("✅ All dependencies found!")
     
-    # Step 1: Extract links from Google Sheets
-    if not run_extraction():
-        print("❌ Process stopped due to extraction failure.")
-        return 1
-    
-    # Check if links were extracted
-    if not check_extracted_links():
-        print("❌ Process stopped - no links to process.")
-        return 1
-    
-    # Ask user confirmation before scraping
+    # Ask user confirmation before scraping (downloads start while links are still being extracted)
     print("\n" + "⚠️ " * 20)
     print("WARNING: The scraping process will start downloading files.")
     print("This may take a long time and use significant bandwidth.")
@@ -236,8 +172,8 @@ def main():
         print("❌ Process cancelled by user.")
         return 0
     
-    # Step 2: Scrape and download files
-    scraping_success = run_scraping()
+    # Steps 1 and 2: Extract links and download them, overlapped
+    scraping_success = run_pipeline()
     
     # Step 3: Generate summary report
     print("\n🚀 Step 3: Generating summary report...")
@@ -259,7 +195,7 @@ if __name__ == "__main__":
         sys.exit(exit_code)
     except KeyboardInterrupt:
         print("\n\n❌ Process interrupted by user (Ctrl+C)")
-        print("Any downloads in progress may continue in the background.")
+        print("Run again to resume unfinished downloads.")
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
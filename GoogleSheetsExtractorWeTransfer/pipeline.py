@@ -0,0 +1,293 @@
+import time
+import asyncio
+import threading
+import concurrent.futures
+from contextlib import asynccontextmanager
+from worker_pool import DEFAULT_HOST_LIMITS
+from job_journal import JobJournal
+from google_sheets_extractor import GoogleSheetsExtractor, SPREADSHEET_ID, SHEET_NAME, LINK_COLUMN
+from transfer_scraper import ScraperSettings, build_worker_pool, load_link_store, close_link_state
+
+QUEUE_SIZE = 50  # Links waiting for a worker; the extractor pauses when the queue is full
+REPORT_INTERVAL = 30  # Seconds between progress lines
+
+class PipelineStopped(Exception):
+    """The pipeline was interrupted while the extractor was still reading"""
+
+class HostLimiter:
+    """Per-host concurrency caps and spacing between starts, for asyncio workers
+
+    The asyncio counterpart of LinkQueue's host handling: hosts are link
+    types, each gets host_limits[host] slots (default_limit if not listed)
+    and new links on a host start at least min_interval seconds apart.
+    """
+    def __init__(self, host_limits=None, default_limit=1, min_interval=2.0):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.min_interval = min_interval
+        self.semaphores = {}
+        self.start_locks = {}
+        self.last_start = {}
+
+    @asynccontextmanager
+    async def slot(self, host):
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.default_limit))
+            self.start_locks[host] = asyncio.Lock()
+        async with self.semaphores[host]:
+            async with self.start_locks[host]:
+                delay = self.last_start.get(host, 0) + self.min_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.last_start[host] = time.monotonic()
+            yield
+
+class PipelineCounters:
+    """Live progress of a pipeline run"""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.found = 0  # New links the extractor streamed in
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0  # Already done or taken by another process
+        self.extracting = True
+
+    def line(self):
+        elapsed = time.monotonic() - self.started
+        done = self.completed + self.failed
+        rate = done / elapsed * 3600 if elapsed else 0
+        extraction = "extracting" if self.extracting else "extraction done"
+        return (f"📊 {extraction}, {self.found} new links | queued {self.queued} | running {self.active} | "
+                f"✅ {self.completed} ❌ {self.failed} ⏭️ {self.skipped} | {rate:.0f} links/h")
+
+class LinkPipeline:
+    """Extract -> scrape in one process: links flow from the sheet to the workers through a bounded queue
+
+    Pending links from earlier runs are queued alongside the new ones, which
+    go in as soon as the extractor has read their row. Links are sorted into
+    per-host queues, and a link is claimed in the store only once its host
+    has a free slot and a scraper is available, so none is processed twice.
+    On interruption the links still being scraped go back to 'pending'.
+    There is no overall timeout: the run lasts until the queue drains, and
+    each link is bounded by the scraper's own timeouts.
+    """
+    def __init__(self, extractor, store, worker_pool, links_file='transfer_links.json', full_rescan=False,
+                 queue_size=QUEUE_SIZE, report_interval=REPORT_INTERVAL):
+        self.extractor = extractor
+        self.store = store
+        self.worker_pool = worker_pool
+        self.links_file = links_file
+        self.full_rescan = full_rescan
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.limiter = HostLimiter(worker_pool.host_limits)
+        self.counters = PipelineCounters()
+        self.stopping = threading.Event()
+        self.executor = None
+        self.queue = None
+        self.routed = None  # Free places in the host queues
+        self.host_queues = {}
+        self.host_workers = []
+        self.scrapers = None  # (worker_id, scraper) pairs not in use
+        self.all_scrapers = []
+        self.running = set()  # Scraping threads, as concurrent futures
+
+    def run(self):
+        """Run the pipeline to completion; returns the counters"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        # Every worker blocks a thread while it scrapes, plus the extractor and store calls
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.worker_pool.num_workers + 4,
+            thread_name_prefix='pipeline'
+        )
+        loop.set_default_executor(self.executor)
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.routed = asyncio.Semaphore(self.queue_size)
+        self.scrapers = asyncio.Queue()
+        for worker_id in range(1, self.worker_pool.num_workers + 1):
+            scraper = await asyncio.to_thread(self.worker_pool.scraper_factory, self.worker_pool.base_download_dir)
+            self.all_scrapers.append(scraper)
+            self.scrapers.put_nowait((worker_id, scraper))
+
+        dispatcher = asyncio.create_task(self.dispatch())
+        reporter = asyncio.create_task(self.report_progress())
+        try:
+            await self.produce()
+            self.counters.extracting = False
+            await self.queue.put(None)
+            await dispatcher
+        except BaseException:
+            # Interrupted: let the extractor thread go and stop taking links
+            self.stopping.set()
+            for task in [dispatcher] + self.host_workers:
+                task.cancel()
+            await self.stop_running()
+            raise
+        finally:
+            reporter.cancel()
+            await self.close_scrapers()
+        print(self.counters.line())
+        return self.counters
+
+    async def stop_running(self):
+        """Hand the links still being scraped back to the queue and wait for their threads
+
+        A thread can't be cancelled, so the links are requeued first: if the
+        process is killed while waiting, the next run resumes them. Links
+        that finish in the meantime record their final status as usual.
+        """
+        claimed = self.worker_pool.claimed_links()
+        if claimed:
+            requeued = self.store.requeue_stale(claimed)
+            print(f"⏹️ Stopping: requeued {requeued} running links, waiting for their workers "
+                  f"(Ctrl+C again to quit now)")
+        running = [asyncio.wrap_future(future) for future in self.running]
+        if running:
+            await asyncio.wait(running)
+
+    async def close_scrapers(self):
+        for scraper in self.all_scrapers:
+            await asyncio.to_thread(scraper.close)
+
+    async def enqueue(self, link):
+        await self.queue.put(link)
+        self.counters.queued += 1
+
+    async def produce(self):
+        """Queue links left over from earlier runs while new ones stream in from the sheet"""
+        # Read before the extractor adds links, so none is queued twice
+        pending = await asyncio.to_thread(self.store.pending_links)
+        await asyncio.gather(self.queue_links(pending), self.stream_links())
+
+    async def queue_links(self, links):
+        for link in links:
+            await self.enqueue(link)
+
+    async def stream_links(self):
+        loop = asyncio.get_running_loop()
+
+        def on_links(links):
+            # Called on the extractor's thread; blocks while the queue is full
+            self.store.add_links(links)
+            for link in links:
+                self.counters.found += 1
+                future = asyncio.run_coroutine_threadsafe(self.enqueue(link), loop)
+                while True:
+                    if self.stopping.is_set():
+                        future.cancel()
+                        raise PipelineStopped()
+                    try:
+                        future.result(timeout=1)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        continue
+
+        print("📥 Streaming links from Google Sheets...")
+        links, added = await asyncio.to_thread(self.extractor.sync_links_file, self.links_file, self.full_rescan, on_links)
+        if links is None:
+            print("❌ Link extraction failed, finishing the links already queued")
+            return
+        print(f"✅ Link extraction finished: {len(links)} links, {len(added)} new")
+        # Row positions and links removed from the sheet, as the extractor saved them
+        await asyncio.to_thread(self.store.import_json, self.links_file)
+
+    async def dispatch(self):
+        """Move queued links to a queue per host, until the end marker
+
+        Each host has as many workers as it has slots, so links for a busy
+        host wait in its queue without holding up links for other hosts. At
+        most queue_size links wait in the host queues.
+        """
+        while True:
+            link = await self.queue.get()
+            if link is None:
+                break
+            host = link.get('type', 'unknown')
+            if host not in self.host_queues:
+                self.host_queues[host] = asyncio.Queue()
+                for _ in range(self.limiter.host_limits.get(host, self.limiter.default_limit)):
+                    self.host_workers.append(asyncio.create_task(self.host_worker(host), name=host))
+            await self.routed.acquire()
+            self.host_queues[host].put_nowait(link)
+
+        # One end marker per host worker, after every link of its host
+        for task in self.host_workers:
+            self.host_queues[task.get_name()].put_nowait(None)
+        await asyncio.gather(*self.host_workers)
+
+    async def host_worker(self, host):
+        """Process the links of one host with whichever scraper is free"""
+        host_queue = self.host_queues[host]
+        while True:
+            link = await host_queue.get()
+            if link is None:
+                return
+            self.routed.release()
+            self.counters.queued -= 1
+            try:
+                await self.process(link)
+            except Exception as e:
+                print(f"❌ Error processing link {link['id']}: {e}")
+                self.counters.failed += 1
+
+    async def process(self, link):
+        async with self.limiter.slot(link.get('type', 'unknown')):
+            worker_id, scraper = await self.scrapers.get()
+            self.counters.active += 1
+            # Claims the link in the store first; None if it was taken
+            future = self.executor.submit(self.worker_pool.process_one, worker_id, scraper, link)
+            self.running.add(future)
+            try:
+                success = await asyncio.wrap_future(future)
+            finally:
+                self.counters.active -= 1
+                if future.done():
+                    self.running.discard(future)
+                    self.scrapers.put_nowait((worker_id, scraper))
+        if success is None:
+            self.counters.skipped += 1
+        elif success:
+            self.counters.completed += 1
+        else:
+            self.counters.failed += 1
+
+    async def report_progress(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            print(self.counters.line())
+
+def run_pipeline(full_rescan=False):
+    """Extract links from the sheet and download them as they come in; returns the counters, or None"""
+    if not SPREADSHEET_ID:
+        print("❌ Error: Please set SPREADSHEET_ID in your .env file")
+        return None
+
+    settings = ScraperSettings()
+    settings.print_summary()
+    print("=" * 80)
+
+    store = load_link_store(settings.links_file, settings.links_db)
+    journal = JobJournal(settings.journal_file)
+    try:
+        # Links a crashed run left in 'processing' go back in the queue; their downloads are resumed
+        requeued = store.requeue_stale()
+        if requeued:
+            print(f"♻️ Requeued {requeued} links interrupted in a previous run")
+        journal.compact()
+
+        extractor = GoogleSheetsExtractor(SPREADSHEET_ID, SHEET_NAME, LINK_COLUMN)
+        driver_pool, worker_pool, blob_store = build_worker_pool(settings, store, journal, settings.num_workers)
+        try:
+            pipeline = LinkPipeline(extractor, store, worker_pool, settings.links_file, full_rescan)
+            return pipeline.run()
+        finally:
+            driver_pool.close()
+            if blob_store:
+                blob_store.close()
+    finally:
+        close_link_state(store, journal, settings.links_file)
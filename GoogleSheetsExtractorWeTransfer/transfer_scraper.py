@@ -9,97 +9,132 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import zipfile
-import glob
+import sys
+import threading
+from worker_pool import TransferWorkerPool, DEFAULT_HOST_LIMITS
+from link_store import LinkStore
+from job_journal import JobJournal, STARTED, RESOLVED, DOWNLOADED, EXTRACTED, FAILED
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.driver_pool import DriverPool, set_download_directory
+from scraper_common.archive_extract import extract_all
+from scraper_common.streaming_zip import OverlappedExtraction
+from scraper_common.blob_store import BlobStore
+from scraper_common.batch_profile import batch_mode_enabled, apply_batch_options, block_heavy_resources
+from scraper_common.metrics import get_metrics, span, timed
+from scraper_common.download_resolver import (
+    enable_network_capture, resolve_download_url, browser_session_headers, read_network_events, find_download
+)
+from scraper_common.http_download import SegmentedDownloader, DownloadError, parse_content_range, discard_response
+from scraper_common.download_watcher import DownloadWatcher, print_progress
+from scraper_common.waits import load_page, wait_for_staleness
+from scraper_common.selector_engine import find_cached
 
 class TransferScraper:
-    def __init__(self, download_directory):
+    def __init__(self, download_directory, driver_pool=None, direct_download=False, http_downloader=None, journal=None,
+                 overlap_extraction=False, blob_store=None, batch_mode=False):
         self.download_directory = download_directory
+        self.driver_pool = driver_pool
         self.driver = None
         self.wait = None
+        self.download_watcher = None
         
-    def setup_chrome_driver(self):
-        """Setup Chrome driver with download preferences"""
+        # Progress of the current link is journaled so a crashed run can resume it
+        self.journal = journal
+        self.link_id = None
+        
+        # Direct mode: the browser only resolves the file URL, the bytes are fetched over HTTP
+        self.direct_download = direct_download
+        self.http_downloader = http_downloader
+        if direct_download and http_downloader is None:
+            self.http_downloader = SegmentedDownloader()
+        
+        # Extract zips while they download instead of afterwards
+        self.overlap_extraction = overlap_extraction
+        
+        # Content-addressed store shared by all link folders (None disables deduplication)
+        self.blob_store = blob_store
+        
+        # Headless browser without images, fonts or background services
+        self.batch_mode = batch_mode
+        
+    @staticmethod
+    def build_chrome_options(download_directory=None, capture_network=False, batch_mode=False):
+        """Chrome options with download preferences"""
         chrome_options = Options()
         
         # Set download preferences
         prefs = {
-            "download.default_directory": self.download_directory,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True
         }
+        if download_directory:
+            prefs["download.default_directory"] = download_directory
         chrome_options.add_experimental_option("prefs", prefs)
         
-        # Optional: Run in headless mode (uncomment if you don't want to see the browser)
-        # chrome_options.add_argument("--headless")
-        
         # Disable notifications
         chrome_options.add_argument("--disable-notifications")
         
-        # Create driver
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Write downloads front to back so a partial .crdownload can be resumed over HTTP
+        chrome_options.add_argument("--disable-features=ParallelDownloading")
+        
+        # Needed to read the download URL back from network events (direct mode only, the log grows otherwise)
+        if capture_network:
+            enable_network_capture(chrome_options)
+        
+        # Batch mode runs headless with a trimmed profile so many more browsers fit on one host
+        if batch_mode:
+            apply_batch_options(chrome_options)
+        return chrome_options
+        
+    def setup_chrome_driver(self):
+        """Setup Chrome driver with download preferences (taken from the pool when one is set)"""
+        if self.driver_pool:
+            self.driver = self.driver_pool.acquire(self.download_directory)
+        else:
+            with span('driver_startup'):
+                self.driver = webdriver.Chrome(options=self.build_chrome_options(
+                    self.download_directory, capture_network=self.direct_download, batch_mode=self.batch_mode
+                ))
+            if self.batch_mode:
+                block_heavy_resources(self.driver)
         self.wait = WebDriverWait(self.driver, 20)
         return self.driver
 
+    def set_download_directory(self, download_directory):
+        """Send further downloads to another directory without restarting the browser"""
+        self.download_directory = download_directory
+        if self.driver:
+            set_download_directory(self.driver, download_directory)
+
     def wait_for_downloads_to_complete(self, timeout=300):
         """Wait for all downloads to complete with progress monitoring"""
         print("⏳ Waiting for downloads to complete...")
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            # Check for any .crdownload files (Chrome's temporary download files)
-            crdownload_files = [f for f in os.listdir(self.download_directory) if f.endswith('.crdownload')]
-            
-            if not crdownload_files:
-                print("✅ All downloads completed!")
-                return True
-            
-            # Show progress for each downloading file
-            print(f"📥 Still downloading... {len(crdownload_files)} files remaining")
-            for crdownload_file in crdownload_files:
-                file_path = os.path.join(self.download_directory, crdownload_file)
-                try:
-                    file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
-                    print(f"  - {crdownload_file}: {file_size:.1f} MB downloaded")
-                except:
-                    print(f"  - {crdownload_file}: downloading...")
-            
-            time.sleep(5)
+        watcher = self.download_watcher or DownloadWatcher(self.download_directory)
+        try:
+            with span('download', mode='browser') as current:
+                # Returns as soon as the last temporary file is renamed
+                if watcher.wait_for_completion(timeout, progress_callback=self.report_browser_progress):
+                    print("✅ All downloads completed!")
+                    downloaded = sum(
+                        entry.stat().st_size for entry in os.scandir(self.download_directory) if entry.is_file()
+                    )
+                    self.record_download_rate(current, downloaded)
+                    return True
+                current.fail('timeout')
+        finally:
+            if watcher is not self.download_watcher:
+                watcher.close()
         
         print("⚠️ Download timeout reached!")
         return False
 
     def extract_zip_files(self):
-        """Extract all zip files in the download directory"""
-        zip_files = glob.glob(os.path.join(self.download_directory, "*.zip"))
-        
-        if not zip_files:
-            print("ℹ️ No zip files found to extract")
+        """Extract the archives in the download directory that haven't been extracted yet"""
+        if not extract_all(self.download_directory):
+            print("ℹ️ No archives found to extract")
             return False
-        
-        for zip_file in zip_files:
-            print(f"📦 Extracting: {os.path.basename(zip_file)}")
-            try:
-                with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                    # Create extraction folder
-                    extract_folder = os.path.join(self.download_directory, "extracted")
-                    os.makedirs(extract_folder, exist_ok=True)
-                    
-                    zip_ref.extractall(extract_folder)
-                    print(f"✅ Extracted to: {extract_folder}")
-                    
-                    # List extracted files
-                    extracted_files = zip_ref.namelist()
-                    print(f"📁 Extracted {len(extracted_files)} files:")
-                    for file in extracted_files:
-                        print(f"  - {file}")
-                    
-            except zipfile.BadZipFile:
-                print(f"❌ Error: {zip_file} is not a valid zip file")
-            except Exception as e:
-                print(f"❌ Error extracting {zip_file}: {e}")
-        
         return True
 
     def download_transfernow_files(self, url):
@@ -107,7 +142,7 @@ class TransferScraper:
         print(f"🚀 Processing TransferNow URL: {url}")
         
         try:
-            self.driver.get(url)
+            load_page(self.driver, url)
             
             # Wait for page to load
             print("⏳ Looking for 'Download all' button...")
@@ -121,14 +156,10 @@ class TransferScraper:
                 "//*[contains(text(), 'Download all')]"
             ]
             
-            download_button = None
-            for selector in download_button_selectors:
-                try:
-                    download_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    print(f"✅ Found download button using selector: {selector}")
-                    break
-                except TimeoutException:
-                    continue
+            # All selectors are checked together, 20 seconds in total
+            download_button, selector = find_cached(self.driver, 'download_button', download_button_selectors, timeout=20, clickable=True)
+            if download_button:
+                print(f"✅ Found download button using selector: {selector}")
             
             if not download_button:
                 print("❌ Could not find download button. Page content:")
@@ -136,16 +167,21 @@ class TransferScraper:
                 print(page_text[:1000])
                 return False
             
+            if self.direct_download:
+                result = self.download_directly(download_button)
+                if result is not None:
+                    return result
+            
+            # Start watching before the click so the new download is recognised
+            self.download_watcher = DownloadWatcher(self.download_directory)
+            
             # Click the download button
             print("🖱️ Clicking 'Download all' button...")
             self.driver.execute_script("arguments[0].click();", download_button)
             
-            # Handle potential download dialog
+            # Handle potential download dialog (returns early once the download starts)
             print("🔍 Checking for download dialog...")
-            time.sleep(3)
-            
-            # Check if there's a confirmation dialog and handle it
-            self.handle_confirmation_dialog()
+            self.handle_confirmation_dialog(timeout=3)
             
             return self.monitor_download_progress()
             
@@ -158,7 +194,7 @@ class TransferScraper:
         print(f"🚀 Processing WeTransfer URL: {url}")
         
         try:
-            self.driver.get(url)
+            load_page(self.driver, url)
             
             # Wait for page to load
             print("⏳ Looking for 'Download' button...")
@@ -174,17 +210,17 @@ class TransferScraper:
                 "//button[contains(@class, 'button--download')]"
             ]
             
-            download_button = None
-            for selector in download_button_selectors:
-                try:
-                    download_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    button_text = download_button.text.lower()
-                    # Make sure we don't click the "Scan and download" button
-                    if 'scan' not in button_text:
-                        print(f"✅ Found download button: '{download_button.text}'")
-                        break
-                except TimeoutException:
-                    continue
+            # Make sure we don't click the "Scan and download" button
+            download_button, selector = find_cached(
+                self.driver,
+                'download_button',
+                download_button_selectors,
+                timeout=20,
+                clickable=True,
+                exclude_text=('scan',)
+            )
+            if download_button:
+                print(f"✅ Found download button: '{download_button.text}'")
             
             if not download_button:
                 print("❌ Could not find download button. Available buttons:")
@@ -197,29 +233,271 @@ class TransferScraper:
                         pass
                 return False
             
+            if self.direct_download:
+                result = self.download_directly(download_button)
+                if result is not None:
+                    return result
+            
+            # Start watching before the click so the new download is recognised
+            self.download_watcher = DownloadWatcher(self.download_directory)
+            
             # Click the download button
             print(f"🖱️ Clicking '{download_button.text}' button...")
             self.driver.execute_script("arguments[0].click();", download_button)
             
             # WeTransfer may have additional steps or dialogs
             print("⏳ Waiting for download to start...")
-            time.sleep(5)
-            
-            # Handle potential dialogs
-            self.handle_confirmation_dialog()
+            self.handle_confirmation_dialog(timeout=5)
             
-            # WeTransfer might redirect or show additional UI elements
-            # Wait a bit more for the actual download to start
-            time.sleep(10)
-            
-            return self.monitor_download_progress()
+            # WeTransfer might redirect or show additional UI elements before the download starts
+            return self.monitor_download_progress(start_timeout=25)
             
         except Exception as e:
             print(f"❌ Error processing WeTransfer: {e}")
             return False
 
-    def handle_confirmation_dialog(self):
-        """Handle potential confirmation dialogs"""
+    def download_directly(self, download_button):
+        """Resolve the final file URL in the browser and fetch the bytes over HTTP
+        
+        Returns None when no URL could be resolved so the caller can fall back
+        to a normal browser download.
+        """
+        print("🔗 Resolving direct download URL...")
+        url = resolve_download_url(
+            self.driver,
+            download_button,
+            after_click=lambda: self.handle_confirmation_dialog(timeout=0)
+        )
+        
+        # Re-allow browser downloads (needed for the fallback)
+        set_download_directory(self.driver, self.download_directory)
+        
+        if not url:
+            print("⚠️ Could not resolve a direct download URL, using the browser download")
+            return None
+        
+        print(f"✅ Resolved download URL: {url[:80]}...")
+        self.record(RESOLVED, url=url)
+        headers = browser_session_headers(self.driver, url)
+        
+        # The browser is free for the next link while the file downloads
+        self.close()
+        
+        # Segmented downloads fill the file out of order, so it can't be read while downloading
+        overlapped = None
+        if getattr(self.http_downloader, 'sequential_writes', False):
+            overlapped = self.start_overlapped_extraction()
+        
+        try:
+            with span('download', mode='http') as current:
+                file_path = self.http_downloader.download(
+                    url,
+                    self.download_directory,
+                    headers=headers,
+                    progress_callback=self.report_download_progress
+                )
+                self.record_download_rate(current, os.path.getsize(file_path))
+        except DownloadError as e:
+            print(f"❌ Direct download failed: {e}")
+            if overlapped:
+                overlapped.cancel()
+            return False
+        
+        return self.finish_download(file_path, overlapped)
+
+    def finish_download(self, file_path, overlapped=None):
+        """Journal a completed download and extract it"""
+        self.record(DOWNLOADED, path=file_path)
+        file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
+        print(f"🎉 Downloaded {os.path.basename(file_path)} ({file_size:.1f} MB)")
+        
+        # Let extraction running alongside the download finish; the step below then skips that zip
+        if overlapped:
+            overlapped.finish()
+        
+        # Extract archives if any
+        print("\n📦 Checking for archives to extract...")
+        self.extract_zip_files()
+        self.record(EXTRACTED)
+        return True
+
+    def start_overlapped_extraction(self):
+        """Start extracting the zip being downloaded into the link folder, if enabled"""
+        if not self.overlap_extraction:
+            return None
+        return OverlappedExtraction(self.download_directory, self.find_partial_download).start()
+
+    def record(self, phase, **fields):
+        """Add an event for the current link to the job journal"""
+        if self.journal and self.link_id:
+            with span('state_write', store='journal'):
+                self.journal.append(self.link_id, phase, **fields)
+
+    def record_download_rate(self, current, num_bytes):
+        """Attach the size of a finished download to its span and export its bytes/sec"""
+        seconds = current.elapsed()
+        current.set(link_id=self.link_id, bytes=num_bytes)
+        if seconds > 0:
+            get_metrics().observe('download_bytes_per_second', num_bytes / seconds, **current.labels)
+        get_metrics().count('downloaded_bytes', num_bytes, **current.labels)
+
+    def report_download_progress(self, downloaded, total, rate):
+        """Progress callback for HTTP downloads: print it and journal the offset"""
+        self.print_download_progress(downloaded, total, rate)
+        if self.journal and self.link_id:
+            self.journal.progress(self.link_id, downloaded, total)
+
+    def report_browser_progress(self, progress):
+        """Progress callback for browser downloads"""
+        print_progress(progress)
+        if self.journal and self.link_id:
+            self.journal.progress(self.link_id, sum(size for _, size, _ in progress))
+
+    def record_browser_download(self):
+        """Journal the URL of the download the browser just started, for resuming after a crash
+        
+        Only direct mode captures the network events this reads.
+        """
+        if not (self.direct_download and self.journal and self.link_id and self.driver):
+            return
+        url, filename = find_download(read_network_events(self.driver))
+        if url:
+            self.record(RESOLVED, url=url, filename=filename)
+
+    def partial_downloads(self):
+        """Paths of the downloads left unfinished in the link folder"""
+        try:
+            names = os.listdir(self.download_directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.download_directory, name) for name in names if name.endswith(('.crdownload', '.part'))]
+
+    def find_partial_download(self):
+        """Path of a download left unfinished in the link folder, or None"""
+        partials = self.partial_downloads()
+        return partials[0] if partials else None
+
+    def discard_partial_downloads(self):
+        """Delete unfinished downloads before the link starts again
+
+        The browser's new download would otherwise be waited for alongside a
+        file nobody is writing any more. Returns None, like a resume that
+        didn't happen.
+        """
+        for path in self.partial_downloads():
+            try:
+                os.remove(path)
+                print(f"🗑️ Removed the unfinished download {os.path.basename(path)}")
+            except OSError as e:
+                print(f"⚠️ Could not remove {path}: {e}")
+        return None
+
+    def resume_download(self, state):
+        """Finish what a previous (crashed) run of this link left behind
+        
+        Returns None when there is nothing to resume, so the link is processed
+        from scratch; a partial file that can't be resumed is deleted first.
+        """
+        phase = state.get('phase')
+        if phase == DOWNLOADED and os.path.exists(state.get('path', '')):
+            print("📦 Download finished in the previous run, extracting...")
+            self.close()
+            self.extract_zip_files()
+            self.record(EXTRACTED)
+            return True
+        
+        url = state.get('url')
+        partials = self.partial_downloads()
+        if not partials:
+            return None
+        if phase in (None, STARTED, EXTRACTED, FAILED) or not url or len(partials) > 1:
+            return self.discard_partial_downloads()
+        partial = partials[0]
+        
+        # Signed and session-bound URLs need the browser's cookies
+        downloader = self.http_downloader or SegmentedDownloader()
+        headers = self.resume_headers(url)
+        if not self.can_resume(downloader, url, headers, os.path.getsize(partial)):
+            print("⚠️ The download URL no longer serves the file, starting the link again")
+            return self.discard_partial_downloads()
+        
+        if partial.endswith('.part'):
+            dest_path = partial[:-len('.part')]
+        else:
+            # Chrome's partial file: continue it over HTTP under the final name
+            name = state.get('filename') or os.path.basename(partial)[:-len('.crdownload')]
+            if name.startswith('Unconfirmed '):
+                return self.discard_partial_downloads()
+            dest_path = os.path.join(self.download_directory, name)
+            os.replace(partial, dest_path + '.part')
+        
+        print(f"⏯️ Resuming download from the previous run: {os.path.basename(dest_path)}")
+        
+        # The browser isn't needed to resume
+        self.close()
+        try:
+            file_path = downloader.download(url, dest_path=dest_path, headers=headers,
+                                            progress_callback=self.report_download_progress)
+        except Exception as e:
+            # Typically an expired download URL
+            print(f"⚠️ Could not resume ({e}), starting the link again")
+            return self.discard_partial_downloads()
+        return self.finish_download(file_path)
+
+    def resume_headers(self, url):
+        """Cookies and user agent of the browser session, for continuing a download over HTTP"""
+        if not self.driver:
+            return {}
+        try:
+            headers = browser_session_headers(self.driver, url)
+        except Exception as e:
+            print(f"⚠️ Could not read the browser session: {e}")
+            return {}
+        if not headers.get('Referer', '').startswith('http'):
+            headers.pop('Referer', None)  # A blank page
+        return headers
+
+    def can_resume(self, downloader, url, headers, partial_size):
+        """True if url still serves the file in byte ranges and it is at least partial_size bytes
+        
+        An expired or sign-in bound URL answers with a web page, which must
+        not be appended to the partial file.
+        """
+        try:
+            response = downloader.request(url, headers, start=0, end=0)
+        except Exception as e:
+            print(f"⚠️ Could not reach the download URL: {e}")
+            return False
+        try:
+            if response.status != 206 or 'text/html' in response.headers.get('Content-Type', '').lower():
+                return False
+            content_range = parse_content_range(response.headers.get('Content-Range'))
+            return bool(content_range and content_range[2] is not None and content_range[2] >= partial_size)
+        finally:
+            discard_response(response)
+
+    def print_download_progress(self, downloaded, total, rate):
+        """Progress callback for direct downloads"""
+        downloaded_mb = downloaded / (1024 * 1024)
+        rate_mb = rate / (1024 * 1024)
+        if total:
+            percent = downloaded * 100 / total
+            print(f"  📥 {downloaded_mb:.1f} / {total / (1024 * 1024):.1f} MB ({percent:.0f}%) at {rate_mb:.1f} MB/s")
+        else:
+            print(f"  📥 {downloaded_mb:.1f} MB at {rate_mb:.1f} MB/s")
+
+    def download_started(self):
+        """True once the watched download directory has a new or in-progress file"""
+        watcher = self.download_watcher
+        return bool(watcher and watcher.started())
+
+    @timed('dialog', kind='confirmation')
+    def handle_confirmation_dialog(self, timeout=3):
+        """Handle potential confirmation dialogs
+        
+        Waits up to timeout seconds for a dialog to appear, but returns as soon
+        as the download has started without one.
+        """
         try:
             confirm_selectors = [
                 "//button[contains(text(), 'Allow')]",
@@ -230,62 +508,75 @@ class TransferScraper:
                 "//button[contains(text(), 'Accept')]"
             ]
             
-            for selector in confirm_selectors:
-                try:
-                    confirm_button = self.driver.find_element(By.XPATH, selector)
-                    print(f"🔘 Found confirmation button: {confirm_button.text}")
-                    confirm_button.click()
-                    print("✅ Clicked confirmation button")
-                    time.sleep(2)
-                    break
-                except NoSuchElementException:
-                    continue
+            confirm_button, _ = find_cached(
+                self.driver,
+                'confirm_dialog',
+                confirm_selectors,
+                timeout=timeout,
+                clickable=True,
+                stop=self.download_started
+            )
+            if confirm_button:
+                print(f"🔘 Found confirmation button: {confirm_button.text}")
+                confirm_button.click()
+                print("✅ Clicked confirmation button")
+                wait_for_staleness(self.driver, confirm_button, timeout=2)
         except Exception as e:
             print(f"ℹ️ No confirmation dialog found: {e}")
 
-    def monitor_download_progress(self):
+    def monitor_download_progress(self, start_timeout=15):
         """Monitor download progress and return success status"""
-        # Wait a bit more for download to start
-        time.sleep(5)
-        
-        # Check if download started
-        print("🔍 Checking if downloads have started...")
-        files_before = set(os.listdir(self.download_directory))
-        time.sleep(10)  # Wait 10 seconds
-        files_after = set(os.listdir(self.download_directory))
-        
-        new_files = files_after - files_before
-        if new_files or any(f.endswith('.crdownload') for f in files_after):
-            print("✅ Download started successfully!")
-            
-            # Wait for downloads to complete
-            if self.wait_for_downloads_to_complete():
-                print("🎉 All downloads completed successfully!")
-                
-                # List downloaded files
-                final_files = [f for f in os.listdir(self.download_directory) if not f.endswith('.crdownload')]
-                print(f"📁 Downloaded {len(final_files)} files:")
-                for file in final_files:
-                    file_path = os.path.join(self.download_directory, file)
-                    file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
-                    print(f"  - {file} ({file_size:.1f} MB)")
-                
-                # Extract zip files if any
-                print("\n📦 Checking for zip files to extract...")
-                self.extract_zip_files()
+        if self.download_watcher is None:
+            self.download_watcher = DownloadWatcher(self.download_directory)
+        overlapped = None
+        
+        try:
+            # Check if download started
+            print("🔍 Checking if downloads have started...")
+            if self.download_watcher.wait_for_start(timeout=start_timeout):
+                print("✅ Download started successfully!")
+                self.record_browser_download()
+                overlapped = self.start_overlapped_extraction()
                 
-                return True
+                # Wait for downloads to complete
+                if self.wait_for_downloads_to_complete():
+                    print("🎉 All downloads completed successfully!")
+                    self.record(DOWNLOADED, path=self.download_directory)
+                    if overlapped:
+                        overlapped.finish()
+                    
+                    # List downloaded files
+                    final_files = [f for f in os.listdir(self.download_directory) if not f.endswith('.crdownload')]
+                    print(f"📁 Downloaded {len(final_files)} files:")
+                    for file in final_files:
+                        file_path = os.path.join(self.download_directory, file)
+                        file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
+                        print(f"  - {file} ({file_size:.1f} MB)")
+                    
+                    # Extract archives if any
+                    print("\n📦 Checking for archives to extract...")
+                    self.extract_zip_files()
+                    self.record(EXTRACTED)
+                    
+                    return True
+                else:
+                    print("⚠️ Download timed out!")
+                    return False
             else:
-                print("⚠️ Download timed out!")
+                print("❌ Download may not have started. Check manually.")
                 return False
-        else:
-            print("❌ Download may not have started. Check manually.")
-            return False
+        finally:
+            if overlapped:
+                overlapped.cancel()
+            self.download_watcher.close()
+            self.download_watcher = None
 
+    @timed('link')
     def process_link(self, link_data):
         """Process a single link based on its type"""
         url = link_data['url']
         link_type = link_data['type']
+        self.link_id = link_data['id']
         
         print(f"\n{'='*60}")
         print(f"Processing Link ID: {link_data['id']}")
@@ -293,158 +584,228 @@ class TransferScraper:
         print(f"URL: {url}")
         print(f"{'='*60}")
         
-        if link_type == 'transfernow':
-            return self.download_transfernow_files(url)
-        elif link_type == 'wetransfer':
-            return self.download_wetransfer_files(url)
-        else:
-            print(f"❌ Unsupported link type: {link_type}")
+        try:
+            # Pick up a download an interrupted run left behind
+            result = None
+            if self.journal:
+                result = self.resume_download(self.journal.state(self.link_id))
+            
+            if result is None:
+                self.record(STARTED, url=url)
+                if link_type == 'transfernow':
+                    result = self.download_transfernow_files(url)
+                elif link_type == 'wetransfer':
+                    result = self.download_wetransfer_files(url)
+                else:
+                    print(f"❌ Unsupported link type: {link_type}")
+                    result = False
+            
+            if result:
+                self.store_download(url)
+            else:
+                self.record(FAILED)
+            return result
+        except Exception as e:
+            self.record(FAILED, error=str(e))
+            raise
+        finally:
+            self.link_id = None
+
+    def reuse_stored_download(self, link_data):
+        """Link the files of a transfer that was already downloaded into this link's folder
+        
+        Returns True if the blob store had the transfer, so nothing needs downloading.
+        """
+        if not self.blob_store or not self.blob_store.materialize(link_data['url'], self.download_directory):
             return False
+        print(f"♻️ {link_data['id']}: same transfer was downloaded before, linked from the blob store")
+        return True
 
-    def close(self):
-        """Close the browser"""
+    def store_download(self, url):
+        """Move the link folder's files into the blob store, keeping hardlinks in place"""
+        if not self.blob_store:
+            return
+        try:
+            files, saved = self.blob_store.ingest(url, self.download_directory)
+            if saved:
+                print(f"🔗 {saved / (1024 * 1024):.1f} MB were already stored, deduplicated {len(files)} files")
+        except OSError as e:
+            print(f"⚠️ Warning: Could not add downloads to the blob store: {e}")
+
+    def close(self, healthy=True):
+        """Close the browser, or hand it back to the pool for the next job"""
+        if self.download_watcher:
+            self.download_watcher.close()
+            self.download_watcher = None
         if self.driver:
-            print("🚪 Closing browser...")
-            time.sleep(3)  # Keep browser open briefly to see results
-            self.driver.quit()
+            if self.driver_pool:
+                self.driver_pool.release(self.driver, healthy=healthy)
+            else:
+                print("🚪 Closing browser...")
+                self.driver.quit()
+            self.driver = None
+            self.wait = None
 
-def load_links_from_json(filename='transfer_links.json'):
-    """Load links from the JSON file created by the Google Sheets extractor"""
+def load_link_store(links_file, db_file):
+    """Open the link state database and bring in any new links from the extractor's JSON file"""
+    store = LinkStore(db_file)
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        
-        if 'links' in data:
-            return data['links'], data.get('metadata', {})
-        else:
-            # Fallback for older format
-            return data, {}
-            
+        store.import_json(links_file)
     except FileNotFoundError:
-        print(f"❌ Error: {filename} not found!")
-        print("Please run the Google Sheets extractor first to generate the links file.")
-        return [], {}
-    except json.JSONDecodeError:
-        print(f"❌ Error: Invalid JSON in {filename}")
-        return [], {}
+        if not store.all_links():
+            print(f"❌ Error: {links_file} not found!")
+            print("Please run the Google Sheets extractor first to generate the links file.")
+    except (json.JSONDecodeError, KeyError):
+        print(f"❌ Error: Invalid JSON in {links_file}")
     except Exception as e:
         print(f"❌ Error loading links: {e}")
-        return [], {}
+    return store
+
+class ScraperSettings:
+    """Configuration of a scraping run, read from the environment"""
+    def __init__(self):
+        self.links_file = "transfer_links.json"
+        self.links_db = os.getenv("TRANSFER_LINKS_DB", "transfer_links.db")  # Link state while scraping
+        self.journal_file = os.getenv("TRANSFER_JOURNAL", "transfer_journal.jsonl")  # Per-link progress for crash recovery
+        self.base_download_dir = os.path.join(os.getcwd(), "Downloads")
+        self.num_workers = int(os.getenv("TRANSFER_WORKERS", "3"))  # Number of parallel workers
+        self.num_browsers = int(os.getenv("TRANSFER_BROWSERS", str(self.num_workers)))  # Size of the browser pool
+        self.direct_download = os.getenv("TRANSFER_DIRECT_DOWNLOAD", "0") == "1"  # Fetch files over HTTP instead of Chrome
+        self.download_connections = int(os.getenv("TRANSFER_CONNECTIONS", "4"))  # Parallel range requests per file
+        self.overlap_extraction = os.getenv("TRANSFER_OVERLAP_EXTRACTION", "0") == "1"  # Unzip while downloading
+        self.deduplicate = os.getenv("TRANSFER_DEDUP", "0") == "1"  # Store identical files once, hardlinked into link folders
+        self.batch_mode = batch_mode_enabled()  # SCRAPER_BATCH_MODE=1: headless, trimmed browsers
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)  # Max concurrent links per host
+        self.max_jobs_per_browser = 20  # Recycle a browser after this many links
+        self.max_browser_memory_mb = 2048  # ...or when it grows beyond this
+    
+    def print_summary(self):
+        print(f"📂 Base Download Directory: {self.base_download_dir}")
+        print(f"📄 Links File: {self.links_file}")
+        print(f"👷 Workers: {self.num_workers}, browsers: {self.num_browsers} (per-host limits: {self.host_limits})")
+        if self.direct_download:
+            print(f"⬇️ Download mode: direct HTTP ({self.download_connections} connections per file)")
+        else:
+            print("⬇️ Download mode: browser")
+        if self.batch_mode:
+            print("🕶️ Batch mode: headless browsers without images, fonts or media")
+        if self.overlap_extraction:
+            if self.direct_download and self.download_connections > 1:
+                print("ℹ️ Extraction during download needs TRANSFER_CONNECTIONS=1 in direct mode, zips are extracted afterwards")
+            else:
+                print("📦 Zips are extracted while they download")
 
-def update_link_status(filename, link_id, status, processed=None, error_message=None):
-    """Update the status and processed field of a link in the JSON file"""
+def build_worker_pool(settings, store, journal, warm_browsers):
+    """A pool of browsers, the worker pool downloading with them and the blob store (or None)
+    
+    The caller closes the browser pool and the blob store.
+    """
+    driver_pool = DriverPool(
+        size=settings.num_browsers,
+        options_factory=lambda download_dir: TransferScraper.build_chrome_options(
+            download_dir, capture_network=settings.direct_download, batch_mode=settings.batch_mode
+        ),
+        max_jobs_per_driver=settings.max_jobs_per_browser,
+        max_memory_mb=settings.max_browser_memory_mb,
+        on_launch=block_heavy_resources if settings.batch_mode else None
+    )
+    driver_pool.warm(min(settings.num_browsers, warm_browsers))
+    http_downloader = SegmentedDownloader(connections=settings.download_connections) if settings.direct_download else None
+    blob_store = BlobStore(os.path.join(settings.base_download_dir, ".blobs")) if settings.deduplicate else None
+    
+    pool = TransferWorkerPool(
+        num_workers=settings.num_workers,
+        base_download_dir=settings.base_download_dir,
+        scraper_factory=lambda download_dir: TransferScraper(
+            download_dir,
+            driver_pool=driver_pool,
+            direct_download=settings.direct_download,
+            http_downloader=http_downloader,
+            journal=journal,
+            overlap_extraction=settings.overlap_extraction,
+            blob_store=blob_store,
+            batch_mode=settings.batch_mode
+        ),
+        status_callback=timed('state_write', store='sqlite')(store.update_status),
+        host_limits=settings.host_limits,
+        claim_callback=timed('state_write', store='sqlite')(store.claim)
+    )
+    return driver_pool, pool, blob_store
+
+def close_link_state(store, journal, links_file):
+    """Export the link states back to the JSON file and close the store and journal"""
+    # Keep the JSON file in sync for the extractor and the report
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        
-        # Find and update the link
-        for link in data['links']:
-            if link['id'] == link_id:
-                link['status'] = status
-                link['processed_at'] = datetime.now().isoformat()
-                if processed is not None:
-                    link['processed'] = processed
-                if error_message:
-                    link['error'] = error_message
-                break
-        
-        # Save updated data
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-            
+        with span('state_write', store='json'):
+            store.export_json(links_file)
     except Exception as e:
-        print(f"⚠️ Warning: Could not update link status: {e}")
+        print(f"⚠️ Warning: Could not export link status to {links_file}: {e}")
+    store.close()
+    journal.close()
 
 def main():
-    # Configuration
-    LINKS_FILE = "transfer_links.json"
-    BASE_DOWNLOAD_DIR = os.path.join(os.getcwd(), "Downloads")
+    settings = ScraperSettings()
     
     print("🚀 Starting Transfer Link Scraper")
-    print(f"📂 Base Download Directory: {BASE_DOWNLOAD_DIR}")
-    print(f"📄 Links File: {LINKS_FILE}")
+    settings.print_summary()
     print("=" * 80)
     
-    # Load links from JSON file
-    links, metadata = load_links_from_json(LINKS_FILE)
-    
-    if not links:
-        print("❌ No links to process!")
-        return
-    
-    # Filter out already processed links
-    unprocessed_links = [link for link in links if link.get('processed', 0) == 0]
-    processed_count = len(links) - len(unprocessed_links)
-    
-    print(f"📊 Link Status:")
-    print(f"  - Total links: {len(links)}")
-    print(f"  - Already processed: {processed_count}")
-    print(f"  - To be processed: {len(unprocessed_links)}")
-    
-    if metadata:
-        print(f"📈 Link Types:")
-        print(f"  - TransferNow: {metadata.get('transfernow_count', 0)}")
-        print(f"  - WeTransfer: {metadata.get('wetransfer_count', 0)}")
-    
-    if not unprocessed_links:
-        print("✅ All links have already been processed!")
-        return
-    
-    # Process each unprocessed link
-    successful_downloads = 0
-    failed_downloads = 0
-    
-    for i, link_data in enumerate(unprocessed_links, 1):
-        print(f"\n🔄 Processing link {i}/{len(unprocessed_links)} (ID: {link_data['id']})")
-        print(f"📍 From Row {link_data['row']} in Google Sheet")
+    # Load links into the state database (new links from the JSON file are added)
+    store = load_link_store(settings.links_file, settings.links_db)
+    journal = JobJournal(settings.journal_file)
+    try:
+        # Links a crashed run left in 'processing' go back in the queue; their downloads are resumed
+        requeued = store.requeue_stale()
+        if requeued:
+            print(f"♻️ Requeued {requeued} links interrupted in a previous run")
+        journal.compact()
+        
+        links = store.all_links()
+        metadata = store.metadata()
         
-        # Mark as being processed
-        update_link_status(LINKS_FILE, link_data['id'], 'processing', processed=0)
+        if not links:
+            print("❌ No links to process!")
+            return
         
-        # Create a specific download directory for this link
-        link_download_dir = os.path.join(BASE_DOWNLOAD_DIR, f"Link_{link_data['id']}")
-        os.makedirs(link_download_dir, exist_ok=True)
+        # Filter out already processed links
+        unprocessed_links = store.pending_links()
+        processed_count = len(links) - len(unprocessed_links)
         
-        # Create scraper instance
-        scraper = TransferScraper(link_download_dir)
+        print(f"📊 Link Status:")
+        print(f"  - Total links: {len(links)}")
+        print(f"  - Already processed: {processed_count}")
+        print(f"  - To be processed: {len(unprocessed_links)}")
         
+        if metadata:
+            print(f"📈 Link Types:")
+            print(f"  - TransferNow: {metadata.get('transfernow_count', 0)}")
+            print(f"  - WeTransfer: {metadata.get('wetransfer_count', 0)}")
+        
+        if not unprocessed_links:
+            print("✅ All links have already been processed!")
+            return
+        
+        # Process the links with a pool of long-lived browsers; status changes are single-row updates
+        driver_pool, pool, blob_store = build_worker_pool(settings, store, journal, len(unprocessed_links))
         try:
-            # Setup browser
-            scraper.setup_chrome_driver()
-            
-            # Process the link
-            success = scraper.process_link(link_data)
-            
-            if success:
-                print(f"✅ Successfully processed link {i}")
-                successful_downloads += 1
-                update_link_status(LINKS_FILE, link_data['id'], 'completed', processed=1)
-            else:
-                print(f"❌ Failed to process link {i}")
-                failed_downloads += 1
-                update_link_status(LINKS_FILE, link_data['id'], 'failed', processed=1, error_message='Download failed')
-                
-        except Exception as e:
-            print(f"❌ Error processing link {i}: {e}")
-            failed_downloads += 1
-            update_link_status(LINKS_FILE, link_data['id'], 'error', processed=1, error_message=str(e))
-            
+            successful_downloads, failed_downloads = pool.run(unprocessed_links)
         finally:
-            scraper.close()
-            
-        # Add delay between downloads to be respectful
-        if i < len(unprocessed_links):
-            print("⏳ Waiting 10 seconds before next download...")
-            time.sleep(10)
-    
-    # Final summary
-    print("\n" + "=" * 80)
-    print("📊 FINAL SUMMARY")
-    print("=" * 80)
-    print(f"✅ Successful downloads: {successful_downloads}")
-    print(f"❌ Failed downloads: {failed_downloads}")
-    print(f"📁 Download directory: {BASE_DOWNLOAD_DIR}")
-    print("=" * 80)
+            driver_pool.close()
+            if blob_store:
+                blob_store.close()
+        
+        # Final summary
+        print("\n" + "=" * 80)
+        print("📊 FINAL SUMMARY")
+        print("=" * 80)
+        print(f"✅ Successful downloads: {successful_downloads}")
+        print(f"❌ Failed downloads: {failed_downloads}")
+        if pool.skipped_links:
+            print(f"⏭️ Skipped (processed by another run): {pool.skipped_links}")
+        print(f"📁 Download directory: {settings.base_download_dir}")
+        print("=" * 80)
+    finally:
+        close_link_state(store, journal, settings.links_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,215 @@
+import os
+import time
+import threading
+from collections import Counter, deque
+
+# Default number of links per host that may be processed at the same time
+DEFAULT_HOST_LIMITS = {
+    'wetransfer': 2,
+    'transfernow': 2
+}
+
+class LinkQueue:
+    """Shared queue of links that respects per-host concurrency caps"""
+    def __init__(self, links, host_limits=None, default_limit=1, min_interval=2.0):
+        self.pending = deque(links)
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.min_interval = min_interval
+        self.active = Counter()
+        self.last_start = {}
+        self.condition = threading.Condition()
+
+    def host_key(self, link_data):
+        """Hosts are identified by the link type (wetransfer / transfernow)"""
+        return link_data.get('type', 'unknown')
+
+    def get(self):
+        """Block until a link whose host has a free slot is available, None once the queue is drained"""
+        with self.condition:
+            while True:
+                if not self.pending:
+                    return None
+
+                wait_time = None
+                now = time.monotonic()
+                for index, link_data in enumerate(self.pending):
+                    host = self.host_key(link_data)
+                    if self.active[host] >= self.host_limits.get(host, self.default_limit):
+                        continue
+
+                    # Space out new requests to the same host
+                    next_start = self.last_start.get(host, 0) + self.min_interval
+                    if next_start > now:
+                        delay = next_start - now
+                        wait_time = delay if wait_time is None else min(wait_time, delay)
+                        continue
+
+                    del self.pending[index]
+                    self.active[host] += 1
+                    self.last_start[host] = now
+                    return link_data
+
+                self.condition.wait(timeout=wait_time)
+
+    def task_done(self, link_data):
+        """Release the host slot held by a link"""
+        with self.condition:
+            host = self.host_key(link_data)
+            self.active[host] = max(0, self.active[host] - 1)
+            self.condition.notify_all()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.pending)
+
+class TransferWorkerPool:
+    """Run N long-lived scrapers that pull links off a shared queue"""
+    def __init__(self, num_workers, base_download_dir, scraper_factory, status_callback, host_limits=None,
+                 claim_callback=None):
+        self.num_workers = max(1, num_workers)
+        self.base_download_dir = base_download_dir
+        self.scraper_factory = scraper_factory
+        self.status_callback = status_callback
+        self.host_limits = host_limits
+        # Marks a link as processing unless another worker or process already has it
+        self.claim_callback = claim_callback
+        self.successful_downloads = 0
+        self.failed_downloads = 0
+        self.skipped_links = 0
+        self.claimed = set()  # Links being processed right now
+        self.counter_lock = threading.Lock()
+
+    def run(self, links):
+        """Process all links and return (successful, failed) counts"""
+        link_queue = LinkQueue(links, host_limits=self.host_limits)
+        num_workers = min(self.num_workers, len(links))
+
+        print(f"👷 Starting {num_workers} workers for {len(links)} links")
+
+        threads = []
+        for worker_id in range(1, num_workers + 1):
+            thread = threading.Thread(
+                target=self.worker_loop,
+                args=(worker_id, link_queue),
+                name=f"transfer-worker-{worker_id}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        return self.successful_downloads, self.failed_downloads
+
+    def worker_loop(self, worker_id, link_queue):
+        """Main loop of a single worker: one long-lived scraper, many links"""
+        scraper = self.scraper_factory(self.base_download_dir)
+        try:
+            while True:
+                link_data = link_queue.get()
+                if link_data is None:
+                    break
+
+                try:
+                    self.process_one(worker_id, scraper, link_data)
+                finally:
+                    link_queue.task_done(link_data)
+        except Exception as e:
+            print(f"[W{worker_id}] ❌ Worker stopped: {e}")
+        finally:
+            scraper.close()
+
+    def process_one(self, worker_id, scraper, link_data):
+        """Process one link, downloading into its own Link_{id} folder
+        
+        Returns None without touching the link if it can't be claimed. An
+        error saving the link's state (say, a locked database) fails the link
+        instead of stopping the worker; a claimed link goes back to 'pending'.
+        """
+        link_id = link_data['id']
+        try:
+            if self.claim_callback:
+                claimed = self.claim_callback(link_id)
+            else:
+                self.status_callback(link_id, 'processing', processed=0)
+                claimed = True
+        except Exception as e:
+            print(f"[W{worker_id}] ❌ Could not claim link {link_id}: {e}")
+            self.record_result(False)
+            return False
+        if not claimed:
+            print(f"[W{worker_id}] ⏭️ Link {link_id} is done or being processed elsewhere, skipping")
+            with self.counter_lock:
+                self.skipped_links += 1
+            return None
+
+        with self.counter_lock:
+            self.claimed.add(link_id)
+        try:
+            return self.process_claimed(worker_id, scraper, link_data)
+        except Exception as e:
+            print(f"[W{worker_id}] ❌ Error handling link {link_id}: {e}")
+            self.record_result(False)
+            self.requeue(worker_id, link_id, e)
+            return False
+        finally:
+            with self.counter_lock:
+                self.claimed.discard(link_id)
+
+    def requeue(self, worker_id, link_id, error):
+        """Hand a claimed link back as 'pending' after an error; the next run's requeue_stale is the fallback"""
+        try:
+            self.status_callback(link_id, 'pending', processed=0, error_message=str(error))
+        except Exception as e:
+            print(f"[W{worker_id}] ⚠️ Could not requeue link {link_id}, it stays in progress until the next run: {e}")
+
+    def claimed_links(self):
+        """Ids of the links workers are processing at the moment"""
+        with self.counter_lock:
+            return list(self.claimed)
+
+    def process_claimed(self, worker_id, scraper, link_data):
+        link_id = link_data['id']
+        print(f"\n[W{worker_id}] 🔄 Processing link {link_id} (Row {link_data['row']})")
+
+        link_download_dir = os.path.join(self.base_download_dir, f"Link_{link_id}")
+        os.makedirs(link_download_dir, exist_ok=True)
+
+        success = False
+        try:
+            # With a driver pool this hands out a warm browser pointed at the link folder
+            scraper.download_directory = link_download_dir
+            
+            # A transfer already downloaded for another link needs no browser at all
+            if scraper.reuse_stored_download(link_data):
+                success = True
+            else:
+                scraper.setup_chrome_driver()
+                success = scraper.process_link(link_data)
+        except Exception as e:
+            print(f"[W{worker_id}] ❌ Error processing link {link_id}: {e}")
+            self.status_callback(link_id, 'error', processed=1, error_message=str(e))
+            self.record_result(False)
+            return False
+        finally:
+            # A browser that failed may still hold a stuck download, so it is recycled
+            scraper.close(healthy=success)
+
+        # Counted once the status is saved, so a failed write isn't counted twice
+        if success:
+            print(f"[W{worker_id}] ✅ Successfully processed link {link_id}")
+            self.status_callback(link_id, 'completed', processed=1)
+        else:
+            print(f"[W{worker_id}] ❌ Failed to process link {link_id}")
+            self.status_callback(link_id, 'failed', processed=1, error_message='Download failed')
+        self.record_result(success)
+        return success
+
+    def record_result(self, success):
+        with self.counter_lock:
+            if success:
+                self.successful_downloads += 1
+            else:
+                self.failed_downloads += 1
@@ -10,23 +10,104 @@ import time
 import os
 import re
 from urllib.parse import urlparse
+from urllib3.exceptions import HTTPError
+from scraper_common.driver_pool import DriverPool
+from scraper_common.download_watcher import DownloadWatcher
+from scraper_common.waits import load_page, wait_until, wait_for_network_idle, wait_for_staleness
+from scraper_common.selector_engine import find_cached
+from scraper_common.metrics import timed
+from scraper_common.http_download import DownloadError
+from scraper_common.sheet_export import iter_export_rows
+
+SHEET_NAME = 'India vs Eng Women'
+LINK_COLUMN = 3  # Column D
+SHAREPOINT_HOST = 'setindia-my.sharepoint.com'
+SHAREPOINT_PATTERN = re.compile(r'https://setindia-my\.sharepoint\.com[^\s<>"\'\\]*')
+HARVEST_PAUSE_MS = 150  # Time for the grid to render the rows scrolled into view
+HARVEST_MAX_PAGES = 2000
+HARVEST_TIMEOUT = 300
+
+# Runs in the page as one async script: scrolls the sheet's grid a page at a
+# time, collecting the text of cells mentioning the host and every matching
+# a[href], then scans the page HTML (which carries the sheet's data) once.
+HARVEST_SCRIPT = r"""
+var host = arguments[0], pause = arguments[1], maxPages = arguments[2], done = arguments[arguments.length - 1];
+var texts = new Set(), hrefs = new Set();
+
+function collect() {
+    document.querySelectorAll("[role='gridcell'], td, div[class*='cell']").forEach(function (cell) {
+        var text = cell.textContent;
+        if (text && text.indexOf(host) !== -1) texts.add(text);
+    });
+    document.querySelectorAll('a[href]').forEach(function (link) {
+        if (link.href.indexOf(host) !== -1) hrefs.add(link.href);
+    });
+}
+
+function findScroller() {
+    // The grid is the element with the most content scrolled out of view
+    var best = document.scrollingElement || document.documentElement;
+    var most = best.scrollHeight - best.clientHeight;
+    document.querySelectorAll('div').forEach(function (element) {
+        var hidden = element.scrollHeight - element.clientHeight;
+        if (hidden > most && /(auto|scroll)/.test(getComputedStyle(element).overflowY)) {
+            best = element;
+            most = hidden;
+        }
+    });
+    return best;
+}
+
+function finish(scroller) {
+    scroller.scrollTop = 0;
+    var html = document.documentElement.innerHTML
+        .split('\\/').join('/').split('\\u0026').join('&').split('&amp;').join('&');
+    var escaped = host.replace(/[.]/g, '\\.');
+    var matches = html.match(new RegExp('https://' + escaped + '[^\\s<>"\'\\\\]*', 'g')) || [];
+    done({texts: Array.from(texts), hrefs: Array.from(hrefs), html: Array.from(new Set(matches))});
+}
+
+var scroller = findScroller(), page = 0;
+function step() {
+    collect();
+    var atEnd = scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 1;
+    if (atEnd || ++page >= maxPages) {
+        finish(scroller);
+        return;
+    }
+    scroller.scrollTop += Math.max(scroller.clientHeight * 0.9, 100);
+    setTimeout(step, pause);
+}
+step();
+"""
+
+def unique_links(links):
+    """Links without trailing punctuation, each once, in the order first seen"""
+    seen = set()
+    unique = []
+    for link in links:
+        clean_link = link.rstrip('.,;)')
+        if clean_link not in seen:
+            seen.add(clean_link)
+            unique.append(clean_link)
+    return unique
 
 class SharePointVideoDownloader:
-    def __init__(self, download_folder=None):
+    def __init__(self, download_folder=None, driver_pool=None, harvest=True, export_format=None):
         self.download_folder = download_folder or os.path.join(os.getcwd(), "downloads")
+        self.driver_pool = driver_pool
+        self.owns_pool = driver_pool is None
+        self.harvest = harvest  # Read the whole grid in one script instead of clicking cells
+        self.export_format = export_format  # 'csv' or 'html' reads the sheet's export instead of the Sheets UI
         self.setup_driver()
         
-    def setup_driver(self):
-        """Setup Chrome driver with download preferences"""
+    def build_chrome_options(self, download_directory=None):
+        """Chrome options with download preferences"""
         chrome_options = Options()
         
-        # Create download directory if it doesn't exist
-        if not os.path.exists(self.download_folder):
-            os.makedirs(self.download_folder)
-        
         # Set download preferences
         prefs = {
-            "download.default_directory": self.download_folder,
+            "download.default_directory": download_directory or self.download_folder,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True,
@@ -40,8 +121,18 @@ class SharePointVideoDownloader:
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        return chrome_options
+    
+    def setup_driver(self):
+        """Get a Chrome driver from the driver pool"""
+        # Create download directory if it doesn't exist
+        if not os.path.exists(self.download_folder):
+            os.makedirs(self.download_folder)
+        
+        if self.driver_pool is None:
+            self.driver_pool = DriverPool(size=1, options_factory=self.build_chrome_options)
         
-        self.driver = webdriver.Chrome(options=chrome_options)
+        self.driver = self.driver_pool.acquire(self.download_folder)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         self.wait = WebDriverWait(self.driver, 20)
     
@@ -49,8 +140,7 @@ class SharePointVideoDownloader:
         """Navigate to Google Sheets and select the correct sheet"""
         try:
             print("Navigating to Google Sheets...")
-            self.driver.get(sheet_url)
-            time.sleep(3)
+            load_page(self.driver, sheet_url)
             
             # Wait for the page to load
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
@@ -66,9 +156,6 @@ class SharePointVideoDownloader:
     def select_sheet_tab(self):
         """Select the 'India vs Eng Women' sheet tab"""
         try:
-            # Wait a bit for the sheet to fully load
-            time.sleep(5)
-            
             # Try different selectors for sheet tabs
             possible_selectors = [
                 "//div[contains(text(), 'India vs Eng Women')]",
@@ -77,12 +164,15 @@ class SharePointVideoDownloader:
                 "//*[contains(text(), 'India') and contains(text(), 'Eng') and contains(text(), 'Women')]"
             ]
             
+            # Wait for the sheet tabs to render
+            wait_until(lambda: self.driver.find_elements(By.XPATH, " | ".join(possible_selectors)), 5)
+            
             for selector in possible_selectors:
                 try:
                     sheet_tab = self.driver.find_element(By.XPATH, selector)
                     sheet_tab.click()
                     print("Successfully clicked on 'India vs Eng Women' tab")
-                    time.sleep(3)
+                    wait_for_network_idle(self.driver, timeout=3)
                     return True
                 except:
                     continue
@@ -94,11 +184,74 @@ class SharePointVideoDownloader:
             print(f"Error selecting sheet tab: {e}")
             return False
     
+    @timed('link_harvest')
     def extract_video_links(self):
+        """Extract SharePoint video links from the sheet"""
+        if self.harvest:
+            video_links = self.harvest_video_links()
+            if video_links:
+                return video_links
+            print("Falling back to clicking cells...")
+        return self.click_video_links()
+    
+    def harvest_video_links(self):
+        """Collect links from every row of the grid with one in-page script; None if the script failed"""
+        script_timeout = None
+        try:
+            print("Harvesting video links from the whole sheet...")
+            wait_until(lambda: self.driver.find_elements(By.XPATH, "//div[contains(@class, 'cell') or contains(@role, 'gridcell')] | //td"), 5)
+            
+            script_timeout = self.driver.timeouts.script
+            self.driver.set_script_timeout(HARVEST_TIMEOUT)
+            found = self.driver.execute_async_script(HARVEST_SCRIPT, SHAREPOINT_HOST, HARVEST_PAUSE_MS, HARVEST_MAX_PAGES)
+        except Exception as e:
+            print(f"Error harvesting links: {e}")
+            return None
+        finally:
+            if script_timeout is not None:
+                # Later scripts on this driver keep their own timeout
+                try:
+                    self.driver.set_script_timeout(script_timeout)
+                except Exception as e:
+                    print(f"Warning: Could not restore the script timeout: {e}")
+        
+        candidates = list(found.get('hrefs', []))
+        for text in found.get('texts', []):
+            candidates.extend(SHAREPOINT_PATTERN.findall(text))
+        # The HTML scan also sees cut-off previews of links
+        candidates.extend(match for match in found.get('html', []) if len(match) > 50)
+        video_links = unique_links(candidates)
+        
+        print(f"Total SharePoint video links found: {len(video_links)}")
+        return video_links
+    
+    @timed('sheets_read', request='export')
+    def read_links_from_export(self, sheet_url, sheet_name=SHEET_NAME):
+        """Read the links in column D from the sheet's export, without the browser; None if it can't be read"""
+        try:
+            print(f"Reading the sheet's {self.export_format.upper()} export...")
+            candidates = []
+            for row_number, cells, links in iter_export_rows(sheet_url, self.export_format, sheet_name):
+                cell = cells[LINK_COLUMN] if len(cells) > LINK_COLUMN else ''
+                candidates.extend(link for link in links.get(LINK_COLUMN, []) if SHAREPOINT_HOST in link)
+                candidates.extend(SHAREPOINT_PATTERN.findall(cell))
+        except (DownloadError, HTTPError, OSError, ValueError) as e:
+            print(f"Could not read the sheet export: {e}")
+            return None
+        
+        video_links = unique_links(candidates)
+        print(f"Total SharePoint video links found: {len(video_links)}")
+        return video_links
+    
+    def click_video_links(self):
         """Extract SharePoint video links by clicking on cells in column D"""
         try:
             print("Extracting video links by clicking cells in column D...")
-            time.sleep(5)
+            cell_xpath = "//div[contains(@class, 'cell') or contains(@role, 'gridcell')] | //td"
+            link_xpath = "//a[contains(@href, 'setindia-my.sharepoint.com')]"
+            
+            # Wait for the grid to render
+            wait_until(lambda: self.driver.find_elements(By.XPATH, cell_xpath), 5)
             
             video_links = []
             
@@ -124,10 +277,9 @@ class SharePointVideoDownloader:
                             from selenium.webdriver.common.action_chains import ActionChains
                             actions = ActionChains(self.driver)
                             actions.move_to_element(cell).perform()
-                            time.sleep(1)
                             
                             # Look for clickable link that appears on hover
-                            clickable_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'setindia-my.sharepoint.com')]")
+                            clickable_links = wait_until(lambda: self.driver.find_elements(By.XPATH, link_xpath), 1) or []
                             for link in clickable_links:
                                 href = link.get_attribute('href')
                                 if href and href not in video_links:
@@ -139,10 +291,9 @@ class SharePointVideoDownloader:
                         # Method 2: Try clicking the cell
                         try:
                             cell.click()
-                            time.sleep(1)
                             
                             # Look for clickable links after clicking
-                            clickable_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'setindia-my.sharepoint.com')]")
+                            clickable_links = wait_until(lambda: self.driver.find_elements(By.XPATH, link_xpath), 1) or []
                             for link in clickable_links:
                                 href = link.get_attribute('href')
                                 if href and href not in video_links:
@@ -184,6 +335,7 @@ class SharePointVideoDownloader:
             print(f"Error extracting video links: {e}")
             return []
     
+    @timed('video_download', scraper='sheet_ui')
     def download_video_from_sharepoint(self, sharepoint_url, video_index):
         """Download video from SharePoint URL"""
         try:
@@ -193,8 +345,7 @@ class SharePointVideoDownloader:
             self.driver.execute_script("window.open('');")
             self.driver.switch_to.window(self.driver.window_handles[-1])
             
-            self.driver.get(sharepoint_url)
-            time.sleep(5)
+            load_page(self.driver, sharepoint_url)
             
             # Wait for page to load
             self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
@@ -210,13 +361,8 @@ class SharePointVideoDownloader:
                 "//i[contains(@class, 'ms-Icon--Download')]/.."
             ]
             
-            download_button = None
-            for selector in download_selectors:
-                try:
-                    download_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    break
-                except:
-                    continue
+            # All selectors are checked together, 20 seconds in total
+            download_button, _ = find_cached(self.driver, 'download_button', download_selectors, timeout=20, clickable=True)
             
             if not download_button:
                 print(f"Could not find download button for video {video_index + 1}")
@@ -224,16 +370,20 @@ class SharePointVideoDownloader:
                 self.driver.switch_to.window(self.driver.window_handles[0])
                 return False
             
-            # Click download button
-            download_button.click()
-            print(f"Clicked download button for video {video_index + 1}")
-            time.sleep(3)
-            
-            # Handle the dialog box about video-only download
-            self.handle_download_dialogs()
-            
-            # Wait for download to start
-            time.sleep(5)
+            # Start watching before the click so the new download is recognised
+            watcher = DownloadWatcher(self.download_folder)
+            try:
+                # Click download button
+                download_button.click()
+                print(f"Clicked download button for video {video_index + 1}")
+                
+                # Handle the dialog box about video-only download
+                self.handle_download_dialogs()
+                
+                # Wait for download to start
+                watcher.wait_for_start(timeout=5)
+            finally:
+                watcher.close()
             
             # Close the SharePoint tab
             self.driver.close()
@@ -250,6 +400,7 @@ class SharePointVideoDownloader:
                 self.driver.switch_to.window(self.driver.window_handles[0])
             return False
     
+    @timed('dialog', kind='sharepoint_download')
     def handle_download_dialogs(self):
         """Handle various download dialog boxes"""
         try:
@@ -262,15 +413,11 @@ class SharePointVideoDownloader:
             ]
             
             # Try to find and click the dialog download button
-            for selector in dialog_selectors:
-                try:
-                    dialog_button = self.wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    dialog_button.click()
-                    print("Clicked download button in dialog")
-                    time.sleep(2)
-                    break
-                except:
-                    continue
+            dialog_button, _ = find_cached(self.driver, 'download_dialog', dialog_selectors, timeout=20, clickable=True)
+            if dialog_button:
+                dialog_button.click()
+                print("Clicked download button in dialog")
+                wait_for_staleness(self.driver, dialog_button, timeout=2)
             
             # Handle potential "Allow download" dialog
             allow_selectors = [
@@ -280,17 +427,11 @@ class SharePointVideoDownloader:
                 "//button[contains(text(), 'OK')]"
             ]
             
-            for selector in allow_selectors:
-                try:
-                    allow_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    allow_button.click()
-                    print("Clicked allow button in dialog")
-                    time.sleep(2)
-                    break
-                except:
-                    continue
+            allow_button, _ = find_cached(self.driver, 'allow_dialog', allow_selectors, timeout=5, clickable=True)
+            if allow_button:
+                allow_button.click()
+                print("Clicked allow button in dialog")
+                wait_for_staleness(self.driver, allow_button, timeout=2)
                     
         except TimeoutException:
             print("No additional dialogs found or they timed out")
@@ -303,12 +444,21 @@ class SharePointVideoDownloader:
             print("Starting SharePoint video downloader...")
             print(f"Download folder: {self.download_folder}")
             
-            # Navigate to Google Sheets
-            if not self.navigate_to_google_sheets(sheet_url):
-                return False
+            # Read the links from the sheet's export when asked, else from the Sheets UI
+            video_links = None
+            if self.export_format:
+                video_links = self.read_links_from_export(sheet_url)
+                if video_links == []:
+                    # CSV holds only cell text, so links behind their labels need the browser
+                    print("No links in the export, reading the sheet in the browser instead")
             
-            # Extract video links
-            video_links = self.extract_video_links()
+            if not video_links:
+                # Navigate to Google Sheets
+                if not self.navigate_to_google_sheets(sheet_url):
+                    return False
+                
+                # Extract video links
+                video_links = self.extract_video_links()
             
             if not video_links:
                 print("No SharePoint video links found in the sheet")
@@ -341,7 +491,9 @@ class SharePointVideoDownloader:
     def cleanup(self):
         """Clean up resources"""
         try:
-            self.driver.quit()
+            self.driver_pool.release(self.driver)
+            if self.owns_pool:
+                self.driver_pool.close()
             print("Browser closed successfully")
         except:
             pass
@@ -351,9 +503,10 @@ def main():
     # Configuration
     SHEET_URL = "https://docs.google.com/spreadsheets/d/1dHItb5n2rNc_6v7LZ6XJeMeQzsO33aNzz5bFmNRkeg0/edit?usp=sharing"
     DOWNLOAD_FOLDER = os.path.join(os.getcwd(), "SharePoint_Videos")  # Change this to your desired folder
+    EXPORT_FORMAT = "csv"  # "html" keeps hyperlinks (needs #gid= in SHEET_URL); None reads the sheet in Chrome
     
     # Create downloader instance
-    downloader = SharePointVideoDownloader(download_folder=DOWNLOAD_FOLDER)
+    downloader = SharePointVideoDownloader(download_folder=DOWNLOAD_FOLDER, export_format=EXPORT_FORMAT)
     
     # Run the process
     downloader.run(SHEET_URL)
@@ -7,107 +7,86 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import zipfile
-import glob
+from scraper_common.driver_pool import DriverPool
+from scraper_common.download_watcher import DownloadWatcher, print_progress
+from scraper_common.waits import load_page
+from scraper_common.selector_engine import find_cached
+from scraper_common.archive_extract import extract_all
+from scraper_common.batch_profile import batch_mode_enabled, apply_batch_options, block_heavy_resources
 
-def setup_chrome_driver(download_directory):
-    """Setup Chrome driver with download preferences"""
+def build_chrome_options(download_directory=None):
+    """Chrome options with download preferences"""
     chrome_options = Options()
     
     # Set download preferences
     prefs = {
-        "download.default_directory": download_directory,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True
     }
+    if download_directory:
+        prefs["download.default_directory"] = download_directory
     chrome_options.add_experimental_option("prefs", prefs)
     
-    # Optional: Run in headless mode (uncomment if you don't want to see the browser)
-    # chrome_options.add_argument("--headless")
-    
     # Disable notifications
     chrome_options.add_argument("--disable-notifications")
     
-    # Create driver
-    driver = webdriver.Chrome(options=chrome_options)
-    return driver
+    # SCRAPER_BATCH_MODE=1 runs headless with a trimmed profile
+    if batch_mode_enabled():
+        apply_batch_options(chrome_options)
+    return chrome_options
+
+def setup_chrome_driver(download_directory, driver_pool):
+    """Get a Chrome driver from the pool, downloading into download_directory"""
+    return driver_pool.acquire(download_directory)
 
-def wait_for_downloads_to_complete(download_directory, timeout=300):
+def wait_for_downloads_to_complete(download_directory, timeout=300, watcher=None):
     """Wait for all downloads to complete with progress monitoring"""
     print("Waiting for downloads to complete...")
-    start_time = time.time()
+    own_watcher = watcher is None
+    if own_watcher:
+        watcher = DownloadWatcher(download_directory)
     
-    while time.time() - start_time < timeout:
-        # Check for any .crdownload files (Chrome's temporary download files)
-        crdownload_files = [f for f in os.listdir(download_directory) if f.endswith('.crdownload')]
-        
-        if not crdownload_files:
+    try:
+        # Returns as soon as the last .crdownload file is renamed
+        if watcher.wait_for_completion(timeout, progress_callback=print_progress):
             print("All downloads completed!")
             return True
-        
-        # Show progress for each downloading file
-        print(f"Still downloading... {len(crdownload_files)} files remaining")
-        for crdownload_file in crdownload_files:
-            file_path = os.path.join(download_directory, crdownload_file)
-            try:
-                file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
-                print(f"  - {crdownload_file}: {file_size:.1f} MB downloaded")
-            except:
-                print(f"  - {crdownload_file}: downloading...")
-        
-        time.sleep(5)
+    finally:
+        if own_watcher:
+            watcher.close()
     
     print("Download timeout reached!")
     return False
+
 def extract_zip_files(download_directory):
-    """Extract all zip files in the download directory"""
-    zip_files = glob.glob(os.path.join(download_directory, "*.zip"))
-    
-    if not zip_files:
-        print("No zip files found to extract")
+    """Extract the archives in the download directory that haven't been extracted yet"""
+    if not extract_all(download_directory):
+        print("No archives found to extract")
         return False
-    
-    for zip_file in zip_files:
-        print(f"Extracting: {os.path.basename(zip_file)}")
-        try:
-            with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                # Create extraction folder
-                extract_folder = os.path.join(download_directory, "extracted")
-                os.makedirs(extract_folder, exist_ok=True)
-                
-                zip_ref.extractall(extract_folder)
-                print(f"Extracted to: {extract_folder}")
-                
-                # List extracted files
-                extracted_files = zip_ref.namelist()
-                print(f"Extracted {len(extracted_files)} files:")
-                for file in extracted_files:
-                    print(f"  - {file}")
-                
-        except zipfile.BadZipFile:
-            print(f"Error: {zip_file} is not a valid zip file")
-        except Exception as e:
-            print(f"Error extracting {zip_file}: {e}")
-    
     return True
 
-def download_transfernow_files(url, download_directory):
+def download_transfernow_files(url, download_directory, driver_pool=None):
     """Main function to download files from TransferNow"""
     
     # Create download directory if it doesn't exist
     os.makedirs(download_directory, exist_ok=True)
     print(f"Download directory: {download_directory}")
     
-    # Setup driver
-    driver = setup_chrome_driver(download_directory)
+    # Setup driver (pass a shared driver_pool to reuse warm browsers across calls)
+    owns_pool = driver_pool is None
+    if owns_pool:
+        driver_pool = DriverPool(
+            size=1,
+            options_factory=build_chrome_options,
+            on_launch=block_heavy_resources if batch_mode_enabled() else None
+        )
+    driver = setup_chrome_driver(download_directory, driver_pool)
+    watcher = None
     
     try:
         print(f"Opening URL: {url}")
-        driver.get(url)
-        
-        # Wait for page to load
-        wait = WebDriverWait(driver, 20)
+        load_page(driver, url)
         
         # Wait for the download all button to be present and clickable
         print("Looking for 'Download all' button...")
@@ -121,14 +100,10 @@ def download_transfernow_files(url, download_directory):
             "//*[contains(text(), 'Download all')]"
         ]
         
-        download_button = None
-        for selector in download_button_selectors:
-            try:
-                download_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                print(f"Found download button using selector: {selector}")
-                break
-            except TimeoutException:
-                continue
+        # All selectors are checked together, 20 seconds in total
+        download_button, selector = find_cached(driver, 'download_button', download_button_selectors, timeout=20, clickable=True)
+        if download_button:
+            print(f"Found download button using selector: {selector}")
         
         if not download_button:
             print("Could not find download button. Let's check what's available on the page:")
@@ -138,13 +113,15 @@ def download_transfernow_files(url, download_directory):
             print(page_text[:1000])  # Print first 1000 characters
             return False
         
+        # Start watching before the click so the new download is recognised
+        watcher = DownloadWatcher(download_directory)
+        
         # Click the download button
         print("Clicking 'Download all' button...")
         driver.execute_script("arguments[0].click();", download_button)
         
         # Handle potential download dialog
         print("Checking for download dialog...")
-        time.sleep(3)  # Wait a bit for any dialogs to appear
         
         # Check if there's a confirmation dialog and handle it
         try:
@@ -157,34 +134,29 @@ def download_transfernow_files(url, download_directory):
                 "//button[contains(text(), 'Continue')]"
             ]
             
-            for selector in confirm_selectors:
-                try:
-                    confirm_button = driver.find_element(By.XPATH, selector)
-                    print(f"Found confirmation button: {confirm_button.text}")
-                    confirm_button.click()
-                    print("Clicked confirmation button")
-                    break
-                except NoSuchElementException:
-                    continue
+            # Give a dialog up to 3 seconds to appear, unless the download starts first
+            confirm_button, _ = find_cached(
+                driver,
+                'confirm_dialog',
+                confirm_selectors,
+                timeout=3,
+                clickable=True,
+                stop=watcher.started
+            )
+            if confirm_button:
+                print(f"Found confirmation button: {confirm_button.text}")
+                confirm_button.click()
+                print("Clicked confirmation button")
         except Exception as e:
             print(f"No confirmation dialog found or error handling it: {e}")
         
-        # Wait a bit more for download to start
-        time.sleep(5)
-        
         # Check if download started by looking for files in download directory
         print("Checking if downloads have started...")
-        files_before = set(os.listdir(download_directory))
-        time.sleep(10)  # Wait 10 seconds
-        files_after = set(os.listdir(download_directory))
-        
-        new_files = files_after - files_before
-        if new_files or any(f.endswith('.crdownload') for f in files_after):
+        if watcher.wait_for_start(timeout=15):
             print("Download started successfully!")
             
             # Wait for downloads to complete
-            # Wait for downloads to complete
-            if wait_for_downloads_to_complete(download_directory):
+            if wait_for_downloads_to_complete(download_directory, watcher=watcher):
                 print("All downloads completed successfully!")
                 
                 # List downloaded files
@@ -195,8 +167,8 @@ def download_transfernow_files(url, download_directory):
                     file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
                     print(f"  - {file} ({file_size:.1f} MB)")
                 
-                # Extract zip files if any
-                print("\nChecking for zip files to extract...")
+                # Extract archives if any
+                print("\nChecking for archives to extract...")
                 extract_zip_files(download_directory)
                 
                 return True
@@ -212,10 +184,16 @@ def download_transfernow_files(url, download_directory):
         return False
     
     finally:
-        # Keep browser open for a few seconds to see the result
-        print("Keeping browser open for 5 seconds...")
-        time.sleep(5)
-        driver.quit()
+        if watcher:
+            watcher.close()
+        if owns_pool:
+            # Keep browser open for a few seconds to see the result
+            print("Keeping browser open for 5 seconds...")
+            time.sleep(5)
+            driver_pool.release(driver)
+            driver_pool.close()
+        else:
+            driver_pool.release(driver)
 
 if __name__ == "__main__":
     # Configuration
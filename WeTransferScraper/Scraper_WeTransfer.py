@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -6,24 +7,31 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import zipfile
-import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraper_common.driver_pool import DriverPool
+from scraper_common.download_watcher import DownloadWatcher
+from scraper_common.waits import load_page, wait_for_network_idle, wait_for_staleness, get_site_timeouts
+from scraper_common.selector_engine import find_cached, probe
+from scraper_common.archive_extract import extract_all
+from scraper_common.batch_profile import batch_mode_enabled, apply_batch_options, block_heavy_resources
 
 # CONFIGURATION - Update these values
 WETRANSFER_URL = "https://we.tl/t-UL1BUR0T7q"  # Replace with your WeTransfer link
 DOWNLOAD_FOLDER = "WeTransfer_Downloads"  # Folder name where files will be saved
 
-def setup_chrome_driver(download_directory):
-    """Setup Chrome driver with download preferences"""
+def build_chrome_options(download_directory=None):
+    """Chrome options with download preferences"""
     chrome_options = Options()
     
     # Set download preferences
     prefs = {
-        "download.default_directory": download_directory,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True
     }
+    if download_directory:
+        prefs["download.default_directory"] = download_directory
     chrome_options.add_experimental_option("prefs", prefs)
     
     # Disable notifications and popups
@@ -31,77 +39,52 @@ def setup_chrome_driver(download_directory):
     chrome_options.add_argument("--disable-popup-blocking")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     
-    # Optional: Uncomment to run in headless mode (no browser window)
-    # chrome_options.add_argument("--headless")
-    
-    # Create driver
-    driver = webdriver.Chrome(options=chrome_options)
+    # SCRAPER_BATCH_MODE=1 runs headless with a trimmed profile
+    if batch_mode_enabled():
+        apply_batch_options(chrome_options)
+    return chrome_options
+
+def setup_chrome_driver(download_directory, driver_pool):
+    """Get a Chrome driver from the pool, downloading into download_directory"""
+    driver = driver_pool.acquire(download_directory)
     
     # Make browser look more human-like
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     
     return driver
 
-def wait_for_downloads_to_complete(download_directory, timeout=600):
+def print_download_progress(progress):
+    """Show size and speed of each file that is still downloading"""
+    print(f"📥 Still downloading... {len(progress)} files in progress")
+    for name, size, rate in progress:
+        speed = f" @ {rate / (1024 * 1024):.1f} MB/s" if rate is not None else ""
+        print(f"  - {name}: {size / (1024 * 1024):.1f} MB{speed}")
+
+def wait_for_downloads_to_complete(download_directory, timeout=600, watcher=None):
     """Wait for all downloads to complete with progress monitoring"""
     print("⏳ Waiting for downloads to complete...")
-    start_time = time.time()
+    own_watcher = watcher is None
+    if own_watcher:
+        watcher = DownloadWatcher(download_directory)
     
-    while time.time() - start_time < timeout:
-        # Check for Chrome's temporary download files
-        temp_files = []
-        for ext in ['.crdownload', '.tmp', '.part']:
-            temp_files.extend([f for f in os.listdir(download_directory) if f.endswith(ext)])
-        
-        if not temp_files:
+    try:
+        # Wakes up on every rename, so completion is seen immediately
+        if watcher.wait_for_completion(timeout, progress_callback=print_download_progress, progress_interval=10):
             print("✅ All downloads completed!")
             return True
-        
-        # Show progress
-        print(f"📥 Still downloading... {len(temp_files)} files in progress")
-        for temp_file in temp_files:
-            file_path = os.path.join(download_directory, temp_file)
-            try:
-                file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
-                print(f"  - {temp_file}: {file_size:.1f} MB")
-            except:
-                print(f"  - {temp_file}: downloading...")
-        
-        time.sleep(10)
+    finally:
+        if own_watcher:
+            watcher.close()
     
     print("⚠️ Download timeout reached!")
     return False
 
 def extract_archives(download_directory):
-    """Extract any zip files found in the download directory"""
-    archive_files = []
-    for ext in ['*.zip', '*.rar', '*.7z']:
-        archive_files.extend(glob.glob(os.path.join(download_directory, ext)))
-    
-    if not archive_files:
+    """Extract any archives (zip, tar, 7z, rar) found in the download directory"""
+    if not extract_all(download_directory):
         print("ℹ️ No archive files found to extract")
-        return
-    
-    for archive_file in archive_files:
-        print(f"📦 Extracting: {os.path.basename(archive_file)}")
-        try:
-            if archive_file.endswith('.zip'):
-                with zipfile.ZipFile(archive_file, 'r') as zip_ref:
-                    extract_folder = os.path.join(download_directory, "extracted")
-                    os.makedirs(extract_folder, exist_ok=True)
-                    zip_ref.extractall(extract_folder)
-                    
-                    extracted_files = zip_ref.namelist()
-                    print(f"✅ Extracted {len(extracted_files)} files to: {extract_folder}")
-                    for file in extracted_files:
-                        print(f"  - {file}")
-            else:
-                print(f"⚠️ Unsupported archive format: {archive_file}")
-                
-        except Exception as e:
-            print(f"❌ Error extracting {archive_file}: {e}")
 
-def download_wetransfer_files(url, download_directory):
+def download_wetransfer_files(url, download_directory, driver_pool=None):
     """Main function to download files from WeTransfer"""
     
     # Create download directory
@@ -113,55 +96,28 @@ def download_wetransfer_files(url, download_directory):
     print(f"📂 Download Directory: {download_path}")
     print("=" * 60)
     
-    # Setup driver
-    driver = setup_chrome_driver(download_path)
+    # Setup driver (pass a shared driver_pool to reuse warm browsers across calls)
+    owns_pool = driver_pool is None
+    if owns_pool:
+        driver_pool = DriverPool(
+            size=1,
+            options_factory=build_chrome_options,
+            on_launch=block_heavy_resources if batch_mode_enabled() else None
+        )
+    driver = setup_chrome_driver(download_path, driver_pool)
+    watcher = None
     
     try:
         print("🌐 Opening WeTransfer link...")
-        driver.get(url)
+        load_page(driver, url)
         
         # Wait for page to load and handle redirects (we.tl links redirect)
         wait = WebDriverWait(driver, 30)
-        time.sleep(5)  # Give time for any redirects
+        wait_for_network_idle(driver, timeout=5)
         
         print(f"🔍 Current page: {driver.current_url}")
         print(f"📄 Page title: {driver.title}")
         
-        # Sometimes WeTransfer shows an age verification, terms, or cookie consent page first
-        print("🔍 Checking for any initial dialogs or consent pages...")
-        time.sleep(3)
-        
-        # Look for common dialog buttons that might appear first
-        initial_buttons = [
-            "//button[contains(text(), 'I agree')]",
-            "//button[contains(text(), 'Accept')]",
-            "//button[contains(text(), 'Accept all')]",
-            "//button[contains(text(), 'Continue')]",
-            "//button[contains(text(), 'Proceed')]",
-            "//button[contains(text(), 'Allow')]",
-            "//a[contains(text(), 'Continue')]",
-            "//button[contains(@class, 'accept')]",
-            "//button[contains(@class, 'consent')]"
-        ]
-        
-        for selector in initial_buttons:
-            try:
-                button = driver.find_element(By.XPATH, selector)
-                if button.is_displayed():
-                    print(f"🔘 Found initial dialog button: '{button.text}' - clicking...")
-                    driver.execute_script("arguments[0].click();", button)
-                    time.sleep(5)  # Wait after clicking
-                    break
-            except NoSuchElementException:
-                continue
-        
-        # Wait for the main transfer page to load
-        print("⏳ Waiting for transfer page to fully load...")
-        time.sleep(5)
-        
-        # Now look for the main download button
-        print("🔍 Looking for 'Download' button...")
-        
         # Extended WeTransfer download button selectors for different layouts
         download_selectors = [
             # Standard download buttons
@@ -188,28 +144,50 @@ def download_wetransfer_files(url, download_directory):
             "//a[contains(@class, 'download')]"
         ]
         
-        download_button = None
-        for i, selector in enumerate(download_selectors):
-            try:
-                print(f"  Trying selector {i+1}/{len(download_selectors)}...")
-                potential_buttons = driver.find_elements(By.XPATH, selector)
-                
-                for button in potential_buttons:
-                    if button.is_displayed() and button.is_enabled():
-                        button_text = button.text.lower() if button.text else ""
-                        
-                        # Skip scan buttons and make sure it's a download button
-                        if 'scan' not in button_text and ('download' in button_text or 'download' in button.get_attribute('class').lower()):
-                            download_button = button
-                            print(f"✅ Found download button: '{button.text or button.get_attribute('class')}'")
-                            break
-                
-                if download_button:
-                    break
-                    
-            except Exception as e:
-                print(f"  Selector {i+1} failed: {e}")
-                continue
+        # Sometimes WeTransfer shows an age verification, terms, or cookie consent page first
+        print("🔍 Checking for any initial dialogs or consent pages...")
+        
+        # Look for common dialog buttons that might appear first
+        initial_buttons = [
+            "//button[contains(text(), 'I agree')]",
+            "//button[contains(text(), 'Accept')]",
+            "//button[contains(text(), 'Accept all')]",
+            "//button[contains(text(), 'Continue')]",
+            "//button[contains(text(), 'Proceed')]",
+            "//button[contains(text(), 'Allow')]",
+            "//a[contains(text(), 'Continue')]",
+            "//button[contains(@class, 'accept')]",
+            "//button[contains(@class, 'consent')]"
+        ]
+        
+        # A dialog or the download button, whichever shows up first
+        button, _ = find_cached(
+            driver,
+            'consent_dialog',
+            initial_buttons,
+            timeout=3,
+            clickable=True,
+            stop=lambda: probe(driver, download_selectors, clickable=True)[0] is not None
+        )
+        if button:
+            print(f"🔘 Found initial dialog button: '{button.text}' - clicking...")
+            driver.execute_script("arguments[0].click();", button)
+            wait_for_staleness(driver, button, timeout=5)  # Wait for the dialog to go away
+        
+        # Wait for the main transfer page to load and look for the main download button
+        print("🔍 Looking for 'Download' button...")
+        with get_site_timeouts().measure(driver.current_url, 'transfer_page') as timeout:
+            # Skip scan buttons; all selectors are checked in one probe
+            download_button, selector = find_cached(
+                driver,
+                'download_button',
+                download_selectors,
+                timeout=timeout,
+                clickable=True,
+                exclude_text=('scan',)
+            )
+        if download_button:
+            print(f"✅ Found download button: '{download_button.text or download_button.get_attribute('class')}'")
         
         if not download_button:
             print("❌ Could not find download button!")
@@ -231,12 +209,10 @@ def download_wetransfer_files(url, download_directory):
         # Scroll to button and click it
         print(f"🖱️ Clicking '{download_button.text}' button...")
         driver.execute_script("arguments[0].scrollIntoView(true);", download_button)
-        time.sleep(2)
-        driver.execute_script("arguments[0].click();", download_button)
         
-        # Wait for any additional dialogs or redirects
-        print("⏳ Waiting for download to start...")
-        time.sleep(10)
+        # Start watching before the click so the new download is recognised
+        watcher = DownloadWatcher(download_directory)
+        driver.execute_script("arguments[0].click();", download_button)
         
         # Check for any confirmation dialogs
         confirmation_selectors = [
@@ -247,33 +223,30 @@ def download_wetransfer_files(url, download_directory):
             "//button[contains(text(), 'Continue')]"
         ]
         
-        for selector in confirmation_selectors:
-            try:
-                confirm_button = driver.find_element(By.XPATH, selector)
-                if confirm_button.is_displayed():
-                    print(f"🔘 Found confirmation button: '{confirm_button.text}' - clicking...")
-                    confirm_button.click()
-                    time.sleep(3)
-                    break
-            except NoSuchElementException:
-                continue
+        # Wait for any additional dialogs or redirects, unless the download starts first
+        print("⏳ Waiting for download to start...")
+        confirm_button, _ = find_cached(
+            driver,
+            'confirm_dialog',
+            confirmation_selectors,
+            timeout=10,
+            clickable=True,
+            stop=watcher.started
+        )
+        if confirm_button:
+            print(f"🔘 Found confirmation button: '{confirm_button.text}' - clicking...")
+            confirm_button.click()
+            wait_for_staleness(driver, confirm_button, timeout=3)
         
         # Monitor download progress
         print("🔍 Checking if download has started...")
         
-        # Check files before and after waiting
-        files_before = set(os.listdir(download_directory))
-        time.sleep(15)  # Wait for download to start
-        files_after = set(os.listdir(download_directory))
-        
-        new_files = files_after - files_before
-        temp_files = [f for f in files_after if f.endswith(('.crdownload', '.tmp', '.part'))]
-        
-        if new_files or temp_files:
+        # Returns as soon as a new or temporary file shows up
+        if watcher.wait_for_start(timeout=15):
             print("✅ Download started successfully!")
             
             # Wait for downloads to complete
-            if wait_for_downloads_to_complete(download_directory):
+            if wait_for_downloads_to_complete(download_directory, watcher=watcher):
                 print("🎉 Download completed successfully!")
                 
                 # List final files
@@ -309,10 +282,16 @@ def download_wetransfer_files(url, download_directory):
         return False
     
     finally:
-        print("\n⏳ Keeping browser open for 5 seconds to see results...")
-        time.sleep(5)
-        print("🚪 Closing browser...")
-        driver.quit()
+        if watcher:
+            watcher.close()
+        if owns_pool:
+            print("\n⏳ Keeping browser open for 5 seconds to see results...")
+            time.sleep(5)
+            print("🚪 Closing browser...")
+            driver_pool.release(driver)
+            driver_pool.close()
+        else:
+            driver_pool.release(driver)
 
 def main():
     """Main execution function"""
@@ -0,0 +1 @@
+"""Offline benchmarks: local stand-ins for the transfer sites, SharePoint and the Sheets API"""
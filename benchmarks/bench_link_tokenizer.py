@@ -0,0 +1,129 @@
+"""Micro-benchmark for split_cell_links: the old six-pass splitter against the regex tokenizer
+
+    python benchmarks/bench_link_tokenizer.py                 # 100k cells, best of 5
+    python benchmarks/bench_link_tokenizer.py --cells 500000 --repeat 3 --verbose
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from benchmarks.run_benchmarks import load_module
+from benchmarks.fake_sheets import FakeSheetsService
+
+def legacy_split_cell_links(cell_value):
+    """split_cell_links as it was: one split pass per delimiter, then a substring check"""
+    if not cell_value:
+        return []
+
+    delimiters = ['\n', '\r\n', '\r', '|', ';', ',']
+    links = [cell_value]
+
+    for delimiter in delimiters:
+        new_links = []
+        for link in links:
+            new_links.extend([l.strip() for l in link.split(delimiter) if l.strip()])
+        links = new_links
+
+    valid_links = []
+    for link in links:
+        link = link.strip()
+        if link and ('http://' in link or 'https://' in link):
+            valid_links.append(link)
+
+    return valid_links
+
+def random_token(rng, length):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') for _ in range(length))
+
+def random_link(rng):
+    """A transfer link in one of the shapes found in the sheets"""
+    shape = rng.random()
+    if shape < 0.45:
+        url = f"https://wetransfer.com/downloads/{random_token(rng, 34)}/{random_token(rng, 6)}"
+    elif shape < 0.6:
+        url = f"https://we.tl/t-{random_token(rng, 10)}"
+    elif shape < 0.9:
+        url = f"https://www.transfernow.net/dl/{random_token(rng, 14)}"
+    else:
+        url = f"https://drive.google.com/file/d/{random_token(rng, 28)}/view"
+    if rng.random() < 0.2:
+        url += "?utm_campaign=WT_email_tracking&utm_source=notify_recipient_email&trk=TRN_TDL_01"
+    return url
+
+def synthetic_corpus(num_cells, seed=1):
+    """Cells as people fill them in: empty, bare links, several links, links in sentences or brackets"""
+    rng = random.Random(seed)
+    cells = []
+    for _ in range(num_cells):
+        kind = rng.random()
+        if kind < 0.35:
+            cells.append('')
+        elif kind < 0.4:
+            cells.append(rng.choice(['sent by mail', 'resend', 'n/a', 'pending']))
+        elif kind < 0.75:
+            cells.append(random_link(rng))
+        elif kind < 0.85:
+            separator = rng.choice(['\n', '\r\n', ', ', ' | ', '; '])
+            cells.append(separator.join(random_link(rng) for _ in range(rng.randint(2, 4))))
+        elif kind < 0.93:
+            cells.append(f"Files: {random_link(rng)} (expires in 7 days)")
+        elif kind < 0.97:
+            cells.append(f"({random_link(rng)})")
+        else:
+            cells.append(random_link(rng) + random_link(rng))  # Pasted twice without a gap
+    return cells
+
+def best_time(function, cells, repeat):
+    """Fastest of repeat passes over all cells, and the last pass's results"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [function(cell) for cell in cells]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark split_cell_links over a synthetic corpus of sheet cells")
+    parser.add_argument('--cells', type=int, default=100000, help="cells in the corpus (default: 100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="passes per implementation, the best counts (default: 5)")
+    parser.add_argument('--seed', type=int, default=1, help="corpus random seed (default: 1)")
+    parser.add_argument('--verbose', action='store_true', help="show some cells the two implementations read differently")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    extractor_module = load_module(
+        'transfer_sheets_extractor', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'google_sheets_extractor.py'))
+    extractor = extractor_module.GoogleSheetsExtractor('benchmark-sheet', 'Sheet1', 'Link', service=FakeSheetsService([]))
+
+    cells = synthetic_corpus(args.cells, args.seed)
+    print(f"🧪 {len(cells)} cells, {sum(len(cell) for cell in cells) / (1024 * 1024):.1f} MB of text")
+
+    legacy_seconds, legacy_results = best_time(legacy_split_cell_links, cells, args.repeat)
+    current_seconds, current_results = best_time(extractor.split_cell_links, cells, args.repeat)
+
+    differing = [index for index, (old, new) in enumerate(zip(legacy_results, current_results)) if old != new]
+
+    print("\n" + "=" * 72)
+    print(f"{'Implementation':<28} {'Best s':>8} {'Cells/s':>12} {'Links':>10}")
+    print("-" * 72)
+    for name, seconds, results in (('six-pass split (old)', legacy_seconds, legacy_results),
+                                   ('regex tokenizer', current_seconds, current_results)):
+        print(f"{name:<28} {seconds:>8.3f} {len(cells) / seconds:>12.0f} {sum(len(r) for r in results):>10}")
+    print("=" * 72)
+    print(f"⚡ Speedup: {legacy_seconds / current_seconds:.1f}x")
+    print(f"🔍 Cells read differently: {len(differing)} (trailing text and brackets, glued links, tracking parameters)")
+
+    if args.verbose:
+        for index in differing[:5]:
+            print(f"\n  cell: {cells[index]!r}")
+            print(f"  old:  {legacy_results[index]}")
+            print(f"  new:  {current_results[index]}")
+
+if __name__ == "__main__":
+    main()
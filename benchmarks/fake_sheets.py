@@ -0,0 +1,121 @@
+import re
+import time
+import random
+
+RANGE_PATTERN = re.compile(r"(?:(?P<sheet>.+)!)?(?P<first_col>[A-Z]*)(?P<first_row>\d*):(?P<last_col>[A-Z]*)(?P<last_row>\d*)")
+
+def column_index(letters):
+    """0-based column index for a column letter (A -> 0, AA -> 26)"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+class FakeRequest:
+    def __init__(self, service, result):
+        self.service = service
+        self.result = result
+
+    def execute(self):
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        return self.result
+
+class FakeValues:
+    def __init__(self, service):
+        self.service = service
+
+    def get(self, spreadsheetId, range, majorDimension='ROWS'):
+        self.service.calls['get'] += 1
+        return FakeRequest(self.service, self.service.read_range(range))
+
+    def batchGet(self, spreadsheetId, ranges, majorDimension='ROWS'):
+        self.service.calls['batchGet'] += 1
+        return FakeRequest(self.service, {
+            'spreadsheetId': spreadsheetId,
+            'valueRanges': [self.service.read_range(value_range) for value_range in ranges]
+        })
+
+class FakeSpreadsheets:
+    def __init__(self, service):
+        self.service = service
+
+    def values(self):
+        return FakeValues(self.service)
+
+    def get(self, spreadsheetId, fields=None, ranges=None):
+        self.service.calls['spreadsheet'] += 1
+        return FakeRequest(self.service, {'sheets': [{'properties': {
+            'title': self.service.sheet_name,
+            'gridProperties': {'rowCount': self.service.row_count}
+        }}]})
+
+class FakeSheetsService:
+    """In-memory stand-in for the Sheets API client: service.spreadsheets().values().get/batchGet
+
+    rows is the sheet as a list of rows (the first one being the header).
+    The grid has grid_rows rows (at least len(rows)), reported by
+    spreadsheets().get as gridProperties.rowCount. Ranges are answered like
+    the real API: trailing empty cells and rows are trimmed, a range with no
+    data has no 'values' and a range starting beyond the grid is an error. Every execute() waits latency seconds to
+    stand in for the round trip.
+    """
+    def __init__(self, rows, latency=0.0, grid_rows=None, sheet_name='Sheet1'):
+        self.rows = rows
+        self.latency = latency
+        self.row_count = max(grid_rows or 0, len(rows))
+        self.sheet_name = sheet_name
+        self.calls = {'get': 0, 'batchGet': 0, 'spreadsheet': 0}
+
+    def spreadsheets(self):
+        return FakeSpreadsheets(self)
+
+    def read_range(self, a1_range):
+        match = RANGE_PATTERN.fullmatch(a1_range)
+        if not match:
+            raise ValueError(f"Unsupported range: {a1_range}")
+        first_row = int(match.group('first_row') or 1)
+        last_row = min(int(match.group('last_row') or self.row_count), self.row_count)
+        if first_row > self.row_count:
+            raise ValueError(f"Range ({a1_range}) exceeds grid limits. Max rows: {self.row_count}")
+        first_col = column_index(match.group('first_col')) if match.group('first_col') else 0
+        last_col = column_index(match.group('last_col')) if match.group('last_col') else None
+
+        values = []
+        for row in self.rows[first_row - 1:last_row]:
+            cells = row[first_col:None if last_col is None else last_col + 1]
+            while cells and cells[-1] == '':
+                cells = cells[:-1]
+            values.append(list(cells))
+        while values and not values[-1]:
+            values.pop()
+
+        result = {'range': a1_range, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+def benchmark_sheet(num_rows, link_urls, header, link_fill=0.6, multi_link=0.1, duplicates=0.05, seed=1):
+    """A sheet of num_rows data rows whose header column holds links in the shapes people type them
+
+    About link_fill of the rows have a link, multi_link of those list
+    several (newline, comma or ' | ' separated) and duplicates repeat a link
+    from an earlier row. link_urls(n) gives the n-th distinct link.
+    """
+    rng = random.Random(seed)
+    rows = [['Name', header, 'Notes']]
+    used = []
+    next_link = 0
+    for row in range(num_rows):
+        cell = ''
+        if rng.random() < link_fill:
+            if used and rng.random() < duplicates:
+                cell = rng.choice(used)
+            else:
+                count = rng.randint(2, 3) if rng.random() < multi_link else 1
+                urls = [link_urls(next_link + offset) for offset in range(count)]
+                next_link += count
+                cell = rng.choice(['\n', ', ', ' | ']).join(urls)
+                used.append(urls[0])
+        rows.append([f'Entry {row + 1}', cell, rng.choice(['', 'ok', 'resend'])])
+    return rows
@@ -0,0 +1,342 @@
+import os
+import re
+import html
+import time
+import struct
+import zipfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_FILE_SIZE = 20 * 1024 * 1024
+
+# Page hosts contain the real domains so the scrapers classify the links as usual;
+# Chrome resolves every *.localhost name to the loopback address
+SITE_HOSTS = {
+    'wetransfer': 'wetransfer.com.localhost',
+    'transfernow': 'transfernow.net.localhost',
+    'sharepoint': 'bench.sharepoint.com.localhost'
+}
+
+WETRANSFER_PAGE = """<!DOCTYPE html>
+<html><head><title>WeTransfer - {link_id}</title></head>
+<body>
+<h1>Your transfer is ready</h1>
+<p>1 item, {size_mb:.1f} MB</p>
+<button class="transfer__button--scan" onclick="return false">Scan and download</button>
+<button class="transfer__button--download" data-testid="download-button" onclick="startDownload(this)">Download</button>
+<div id="confirm" style="display:none">
+  <p>Do you want to download this transfer?</p>
+  <button onclick="location.href='{file_url}'; this.parentNode.remove()">Accept</button>
+</div>
+<script>
+function startDownload(button) {{
+  button.remove();
+  if ({dialog}) {{ document.getElementById('confirm').style.display = 'block'; }}
+  else {{ location.href = '{file_url}'; }}
+}}
+</script>
+</body></html>
+"""
+
+TRANSFERNOW_PAGE = """<!DOCTYPE html>
+<html><head><title>TransferNow - {link_id}</title></head>
+<body>
+<h1>Files available for download</h1>
+<p>{link_id}.zip - {size_mb:.1f} MB</p>
+<button class="download-all" onclick="startDownload(this)">Download all</button>
+<div id="confirm" style="display:none">
+  <p>Continue to your files?</p>
+  <button onclick="location.href='{file_url}'; this.parentNode.remove()">Continue</button>
+</div>
+<script>
+function startDownload(button) {{
+  button.remove();
+  if ({dialog}) {{ document.getElementById('confirm').style.display = 'block'; }}
+  else {{ location.href = '{file_url}'; }}
+}}
+</script>
+</body></html>
+"""
+
+SHAREPOINT_PAGE = """<!DOCTYPE html>
+<html><head><title>{link_id}.mp4</title></head>
+<body>
+<div data-automationid="videoPlayer" class="od-VideoPlayer">
+  <video width="640" height="360" preload="none"></video>
+</div>
+<div class="ms-CommandBar">
+  <button class="ms-Button" data-automationid="downloadButton" aria-label="Download" onclick="showDialog(this)">Download</button>
+</div>
+<div id="dialog" role="dialog" class="ms-Dialog" style="display:none">
+  <p>The download is video only. Captions and transcripts aren't included.</p>
+  <button class="ms-Button ms-Button--primary" data-automationid="primaryButton" aria-label="Download video"
+          onclick="location.href='{file_url}'; document.getElementById('dialog').remove()"><span>Download</span></button>
+  <button class="ms-Button" onclick="document.getElementById('dialog').style.display='none'">Cancel</button>
+</div>
+<script>
+function showDialog(button) {{
+  button.remove();
+  document.getElementById('dialog').style.display = 'block';
+}}
+</script>
+</body></html>
+"""
+
+class Payload:
+    """A downloadable file: a shared body on disk with per-link bytes around it
+
+    Every link gets different content (so deduplication doesn't hide the
+    download work) without writing a separate large file per link.
+    """
+    def __init__(self, path, body_size, head=b'', tail=b''):
+        self.path = path
+        self.body_size = body_size
+        self.head = head
+        self.tail = tail
+        self.size = len(head) + body_size + len(tail)
+
+    def iter_range(self, start, end):
+        """Chunks of bytes start..end (inclusive)"""
+        parts = ((0, self.head), (len(self.head), None), (len(self.head) + self.body_size, self.tail))
+        position = start
+        with open(self.path, 'rb') as f:
+            for offset, data in parts:
+                length = self.body_size if data is None else len(data)
+                if position > end or position >= offset + length:
+                    continue
+                if data is not None:
+                    yield data[position - offset:end + 1 - offset]
+                    position = min(end + 1, offset + length)
+                    continue
+                f.seek(position - offset)
+                while position <= end and position < offset + length:
+                    chunk = f.read(min(CHUNK_SIZE, end + 1 - position, offset + length - position))
+                    if not chunk:
+                        return
+                    position += len(chunk)
+                    yield chunk
+
+def write_random_file(path, size):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            chunk = os.urandom(min(CHUNK_SIZE * 16, remaining))
+            f.write(chunk)
+            remaining -= len(chunk)
+
+class FixtureServer:
+    """Local stand-ins for the transfer sites and SharePoint, on one threaded HTTP server
+
+    Pages carry the buttons and dialogs the scrapers' selectors look for;
+    clicking through them downloads a file of file_size bytes. Every
+    request waits latency seconds before answering and file bodies are sent
+    at no more than bandwidth bytes/sec per connection (0 for no limit).
+    Range requests are supported so resumed and segmented downloads work.
+    """
+    def __init__(self, data_dir, file_size=DEFAULT_FILE_SIZE, latency=0.0, bandwidth=0, dialog=True, host='127.0.0.1'):
+        self.data_dir = data_dir
+        self.file_size = file_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.dialog = dialog
+        self.host = host
+        self.server = None
+        self.requests = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+        self.video_path = os.path.join(data_dir, 'video.bin')
+        self.zip_path = os.path.join(data_dir, 'transfer.zip')
+
+    @property
+    def port(self):
+        return self.server.server_port
+
+    def prepare_files(self):
+        """Random video bytes and a zip holding them, made once per size"""
+        if not os.path.exists(self.video_path) or os.path.getsize(self.video_path) != self.file_size:
+            write_random_file(self.video_path, self.file_size)
+            if os.path.exists(self.zip_path):
+                os.remove(self.zip_path)
+        if not os.path.exists(self.zip_path):
+            # Stored, since random data doesn't compress; the zip is about file_size as well
+            with zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_STORED) as zip_ref:
+                zip_ref.write(self.video_path, 'video.mp4')
+
+    def payload(self, name):
+        """The file served as name, or None"""
+        match = re.fullmatch(r'([\w-]+)\.(zip|mp4)', name)
+        if not match:
+            return None
+        link_id, extension = match.groups()
+        if extension == 'zip':
+            # A per-link archive comment replaces the empty one at the end of the zip
+            comment = f'benchmark link {link_id}'.encode('utf-8')
+            body_size = os.path.getsize(self.zip_path) - 2
+            return Payload(self.zip_path, body_size, tail=struct.pack('<H', len(comment)) + comment)
+        return Payload(self.video_path, self.file_size, head=f'benchmark link {link_id}\n'.encode('utf-8'))
+
+    def page_url(self, site, link_id):
+        host = f"{SITE_HOSTS[site]}:{self.port}"
+        if site == 'wetransfer':
+            return f"http://{host}/downloads/{link_id}"
+        if site == 'transfernow':
+            return f"http://{host}/dl/{link_id}"
+        return f"http://{host}/sites/bench/_layouts/15/stream.aspx?id={link_id}"
+
+    def file_url(self, name):
+        return f"http://{self.host}:{self.port}/files/{name}"
+
+    def render_page(self, path, query):
+        """HTML for a page path, or None"""
+        size_mb = self.file_size / (1024 * 1024)
+        dialog = 'true' if self.dialog else 'false'
+        match = re.fullmatch(r'/(downloads|dl)/([\w-]+)', path)
+        if match:
+            kind, link_id = match.groups()
+            template = WETRANSFER_PAGE if kind == 'downloads' else TRANSFERNOW_PAGE
+            return template.format(link_id=html.escape(link_id), size_mb=size_mb, dialog=dialog,
+                                   file_url=self.file_url(f'{link_id}.zip'))
+        if path.endswith('/stream.aspx'):
+            link_id = query.get('id', ['video'])[0]
+            if not re.fullmatch(r'[\w-]+', link_id):
+                return None
+            return SHAREPOINT_PAGE.format(link_id=link_id, file_url=self.file_url(f'{link_id}.mp4'))
+        return None
+
+    def start(self):
+        self.prepare_files()
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def respond(self, send_body):
+                with fixtures.lock:
+                    fixtures.requests += 1
+                if fixtures.latency:
+                    time.sleep(fixtures.latency)
+
+                parts = urlsplit(self.path)
+                if parts.path.startswith('/files/'):
+                    self.send_file(parts.path[len('/files/'):], send_body)
+                    return
+                if parts.path.endswith('/_layouts/15/download.aspx'):
+                    # SharePoint's direct download: SourceUrl is the stream.aspx id here
+                    source = parse_qs(parts.query).get('SourceUrl', [''])[0].rsplit('/', 1)[-1]
+                    self.send_file(source if '.' in source else f'{source}.mp4', send_body)
+                    return
+
+                page = fixtures.render_page(parts.path, parse_qs(parts.query))
+                if page is None:
+                    self.send_error(404)
+                    return
+                body = page.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def send_file(self, name, send_body):
+                payload = fixtures.payload(name)
+                if payload is None:
+                    self.send_error(404)
+                    return
+
+                start, end = 0, payload.size - 1
+                match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        if match.group(2):
+                            end = min(int(match.group(2)), end)
+                    else:
+                        start = max(0, payload.size - int(match.group(2)))
+                    if start > end:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{payload.size}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{payload.size}')
+                else:
+                    self.send_response(200)
+
+                content_type = 'application/zip' if name.endswith('.zip') else 'video/mp4'
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('ETag', f'"{payload.size}-{fixtures.file_size}"')
+                self.end_headers()
+                if not send_body:
+                    return
+
+                started = time.monotonic()
+                sent = 0
+                try:
+                    for chunk in payload.iter_range(start, end):
+                        self.wfile.write(chunk)
+                        sent += len(chunk)
+                        if fixtures.bandwidth:
+                            # Hold the connection to the configured rate
+                            ahead = sent / fixtures.bandwidth - (time.monotonic() - started)
+                            if ahead > 0:
+                                time.sleep(ahead)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client cancelled or paused the download
+                finally:
+                    with fixtures.lock:
+                        fixtures.bytes_sent += sent
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"🧪 Fixture sites on port {self.port} ({self.file_size / (1024 * 1024):.1f} MB files, "
+              f"{self.latency * 1000:.0f} ms latency, "
+              f"{'unlimited' if not self.bandwidth else f'{self.bandwidth / (1024 * 1024):.1f} MB/s'} bandwidth)")
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def transfer_links(self, count):
+        """Links in the extractor's transfer_links.json format, alternating WeTransfer and TransferNow"""
+        links = []
+        for index in range(count):
+            site = 'wetransfer' if index % 2 == 0 else 'transfernow'
+            url = self.page_url(site, f'bench{index + 1}')
+            links.append({
+                'id': f"link_{index + 1}",
+                'row': index + 2,
+                'original_cell': url,
+                'url': url,
+                'type': site,
+                'status': 'pending',
+                'processed': 0
+            })
+        return links
+
+    def sharepoint_links(self, count):
+        """Links for sharepoint_links.json"""
+        return [
+            {'row': index + 2, 'link': self.page_url('sharepoint', f'video{index + 1}')}
+            for index in range(count)
+        ]
@@ -0,0 +1,399 @@
+"""Offline benchmarks for the scrapers and extractors, against local stand-in sites
+
+Each target runs in its own process and working directory so browsers,
+caches and metrics don't leak between runs:
+
+    python benchmarks/run_benchmarks.py                      # all targets
+    python benchmarks/run_benchmarks.py extractors --rows 100000
+    python benchmarks/run_benchmarks.py transfer --links 30 --file-mb 50 --bandwidth-mbps 20
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+import importlib.util
+
+try:
+    import psutil  # Optional: peak memory of the whole process tree, browsers included
+except ImportError:
+    psutil = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from benchmarks.fixtures import FixtureServer, SITE_HOSTS
+from benchmarks.fake_sheets import FakeSheetsService, benchmark_sheet
+
+TARGETS = ('extractors', 'transfer', 'sharepoint')
+SPREADSHEET_ID = 'benchmark-sheet'
+
+def load_module(name, path):
+    """Import a script by path under a unique name (both extractors are called google_sheets_extractor)"""
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def read_spans(metrics_file, name):
+    """(duration, ok) of every span called name in a metrics JSON Lines file"""
+    spans = []
+    try:
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') == 'span' and record.get('name') == name:
+                    spans.append((record['duration'], record.get('ok', True)))
+    except FileNotFoundError:
+        pass
+    return spans
+
+class ResourceSampler:
+    """CPU time from getrusage and peak memory, sampled over the process tree when psutil is available"""
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_tree_rss = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.started = self.cpu_seconds()
+        if psutil is not None:
+            self.thread.start()
+        return self
+
+    @staticmethod
+    def cpu_seconds():
+        total = 0.0
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+            usage = resource.getrusage(who)
+            total += usage.ru_utime + usage.ru_stime
+        return total
+
+    def run(self):
+        process = psutil.Process()
+        while not self.stop_event.is_set():
+            rss = 0
+            try:
+                for member in [process] + process.children(recursive=True):
+                    try:
+                        rss += member.memory_info().rss
+                    except psutil.Error:
+                        pass
+            except psutil.Error:
+                pass
+            self.peak_tree_rss = max(self.peak_tree_rss, rss)
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        """{cpu_seconds, peak_rss_mb}; without psutil the peak is the largest single process"""
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        # ru_maxrss is in kilobytes on Linux
+        peak_kb = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+        peak = self.peak_tree_rss / (1024 * 1024) if self.peak_tree_rss else peak_kb / 1024
+        return {'cpu_seconds': round(self.cpu_seconds() - self.started, 2), 'peak_rss_mb': round(peak, 1)}
+
+def link_result(target, metrics_file, span_name, links, wall, completed=None, skip=0):
+    """Throughput and per-link latency from the spans the target recorded (after the first skip)"""
+    spans = read_spans(metrics_file, span_name)[skip:]
+    durations = [duration for duration, ok in spans if ok]
+    if completed is None:
+        completed = len(durations)
+    return {
+        'target': target,
+        'links': links,
+        'completed': completed,
+        'wall_seconds': round(wall, 2),
+        'links_per_hour': round(completed / wall * 3600, 1) if wall else None,
+        'latency_span': span_name,
+        'p50_seconds': percentile(durations, 0.5),
+        'p95_seconds': percentile(durations, 0.95)
+    }
+
+def start_fixtures(args):
+    return FixtureServer(
+        os.path.join(args.work_dir, 'fixtures'),
+        file_size=int(args.file_mb * 1024 * 1024),
+        latency=args.latency_ms / 1000,
+        bandwidth=int(args.bandwidth_mbps * 1024 * 1024),
+        dialog=not args.no_dialog
+    ).start()
+
+def bench_transfer(args, metrics_file):
+    """transfer_scraper.main() over fixture WeTransfer / TransferNow links"""
+    fixtures = start_fixtures(args)
+    try:
+        links = fixtures.transfer_links(args.links)
+        with open('transfer_links.json', 'w') as f:
+            json.dump({'metadata': {'total_links': len(links)}, 'links': links}, f, indent=2)
+        os.environ['TRANSFER_WORKERS'] = str(args.workers)
+        os.environ['TRANSFER_DIRECT_DOWNLOAD'] = '1' if args.direct else '0'
+
+        transfer_scraper = load_module(
+            'transfer_scraper', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'transfer_scraper.py'))
+        started = time.monotonic()
+        transfer_scraper.main()
+        wall = time.monotonic() - started
+    finally:
+        fixtures.stop()
+    return [link_result('transfer_scraper.main', metrics_file, 'link', len(links), wall)]
+
+def wait_for_files(directory, count, timeout):
+    """Wait until directory holds count finished files; the number finished"""
+    deadline = time.monotonic() + timeout
+    while True:
+        names = os.listdir(directory)
+        finished = [name for name in names if not name.endswith(('.crdownload', '.tmp'))]
+        if (len(finished) >= count and len(finished) == len(names)) or time.monotonic() > deadline:
+            return len(finished)
+        time.sleep(0.2)
+
+def bench_sharepoint(args, metrics_file):
+    """The SharePoint downloader's download_from_file() over fixture SharePoint links
+
+    Serial with --sharepoint-workers 1, otherwise ParallelSharePointDownloader.
+    """
+    fixtures = start_fixtures(args)
+    try:
+        links = fixtures.sharepoint_links(args.links)
+        with open('sharepoint_links.json', 'w') as f:
+            json.dump(links, f, indent=2)
+
+        selenium_downloader = load_module(
+            'selenium_downloader', os.path.join(REPO_ROOT, 'GoogleSheetsExtractor', 'selenium_downloader.py'))
+        started = time.monotonic()
+        if args.sharepoint_workers > 1 or args.direct:
+            name = 'ParallelSharePointDownloader.download_from_file'
+            downloader = selenium_downloader.ParallelSharePointDownloader(
+                download_folder='downloads', headless=args.headless, concurrency=args.sharepoint_workers,
+                session_file='sharepoint_session.json', direct_download=args.direct,
+                sharepoint_hosts=(SITE_HOSTS['sharepoint'],))
+        else:
+            name = 'SimpleSharePointDownloader.download_from_file'
+            downloader = selenium_downloader.SimpleSharePointDownloader(download_folder='downloads', headless=args.headless)
+        try:
+            downloader.download_from_file('sharepoint_links.json')
+            # Clicking download returns before the file arrives, so a link only counts once its file is complete
+            completed = wait_for_files(downloader.download_folder, len(links), timeout=args.file_timeout)
+            wall = time.monotonic() - started
+        finally:
+            downloader.close()
+    finally:
+        fixtures.stop()
+    return [link_result(name, metrics_file, 'video_download', len(links), wall, completed)]
+
+def bench_extractors(args, metrics_file):
+    """Both Sheets extractors over a fake sheet: a full sync, an unchanged incremental sync and the SharePoint pass
+
+    Their latency is per Sheets request, and "links" are the links found.
+    """
+    latency = args.sheet_latency_ms / 1000
+    transfer_rows = benchmark_sheet(
+        args.rows,
+        lambda n: f'https://wetransfer.com/downloads/{n:08x}a1b2/c3d4' if n % 2 == 0
+        else f'https://www.transfernow.net/dl/2024{n:06d}/AbCd{n}',
+        header='Link'
+    )
+    sharepoint_rows = benchmark_sheet(
+        args.rows,
+        lambda n: f'https://contoso.sharepoint.com/:v:/s/team/E{n:07d}Xy?e=Ab{n}',
+        header='VIDEO LINK'
+    )
+    results = []
+
+    transfer_extractor = load_module(
+        'transfer_sheets_extractor', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'google_sheets_extractor.py'))
+    extractor = transfer_extractor.GoogleSheetsExtractor(
+        SPREADSHEET_ID, 'Sheet1', 'Link', service=FakeSheetsService(transfer_rows, latency))
+    for label in ('full', 'incremental'):
+        before = len(read_spans(metrics_file, 'sheets_read'))
+        sampler = ResourceSampler().start()
+        started = time.monotonic()
+        links, added = extractor.sync_links_file('transfer_links.json')
+        wall = time.monotonic() - started
+        result = link_result(f'transfer extractor ({label} sync)', metrics_file, 'sheets_read',
+                             len(links or []), wall, completed=len(added), skip=before)
+        result.update(sampler.stop(), rows=args.rows)
+        results.append(result)
+
+    sharepoint_extractor = load_module(
+        'sharepoint_sheets_extractor', os.path.join(REPO_ROOT, 'GoogleSheetsExtractor', 'google_sheets_extractor.py'))
+    extractor = sharepoint_extractor.GoogleSheetsExtractor(
+        SPREADSHEET_ID, 'Sheet1', 'VIDEO LINK', service=FakeSheetsService(sharepoint_rows, latency))
+    before = len(read_spans(metrics_file, 'sheets_read'))
+    sampler = ResourceSampler().start()
+    started = time.monotonic()
+    links = extractor.extract_sharepoint_links()
+    extractor.save_links_to_file(links)
+    wall = time.monotonic() - started
+    result = link_result('SharePoint extractor', metrics_file, 'sheets_read', len(links), wall,
+                         completed=len(links), skip=before)
+    result.update(sampler.stop(), rows=args.rows)
+    results.append(result)
+    return results
+
+BENCHMARKS = {
+    'extractors': bench_extractors,
+    'transfer': bench_transfer,
+    'sharepoint': bench_sharepoint
+}
+
+def run_child(args):
+    """Run one target in this process (started by the parent in the target's directory)"""
+    metrics_file = os.path.abspath('metrics.jsonl')
+    # Set before anything creates the metrics singleton; caches stay inside the benchmark directory
+    os.environ['SCRAPER_METRICS_FILE'] = metrics_file
+    os.environ['SCRAPER_TIMEOUTS_FILE'] = os.path.abspath('site_timeouts.json')
+    os.environ['SCRAPER_SELECTOR_CACHE'] = os.path.abspath('selector_cache.json')
+    os.environ['SCRAPER_BATCH_MODE'] = '1' if args.batch else '0'
+
+    sampler = ResourceSampler().start()
+    results = BENCHMARKS[args.child](args, metrics_file)
+    resources = sampler.stop()
+    for result in results:
+        # Targets with several phases measure each of them themselves
+        for key, value in resources.items():
+            result.setdefault(key, value)
+    with open('result.json', 'w') as f:
+        json.dump(results, f, indent=2)
+
+def run_target(target, args):
+    """Run a target in a child process; its result rows, or None if it failed"""
+    directory = os.path.join(args.work_dir, target)
+    os.makedirs(directory, exist_ok=True)
+    result_path = os.path.join(directory, 'result.json')
+    if os.path.exists(result_path):
+        os.remove(result_path)
+
+    command = [sys.executable, os.path.abspath(__file__), '--child', target] + child_args(args)
+    print(f"⏱️ Running {target} benchmark...")
+    log_path = os.path.join(directory, 'output.log')
+    with open(log_path, 'w') as log:
+        output = None if args.verbose else log
+        try:
+            subprocess.run(command, cwd=directory, stdout=output, stderr=subprocess.STDOUT if output else None,
+                           timeout=args.timeout or None, check=False)
+        except subprocess.TimeoutExpired:
+            print(f"❌ {target} benchmark timed out after {args.timeout} seconds")
+
+    try:
+        with open(result_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"❌ {target} benchmark failed, see {log_path}")
+        return None
+
+def child_args(args):
+    """The options again, for the child process"""
+    values = [
+        '--links', str(args.links), '--file-mb', str(args.file_mb), '--latency-ms', str(args.latency_ms),
+        '--bandwidth-mbps', str(args.bandwidth_mbps), '--workers', str(args.workers),
+        '--sharepoint-workers', str(args.sharepoint_workers), '--rows', str(args.rows),
+        '--sheet-latency-ms', str(args.sheet_latency_ms), '--file-timeout', str(args.file_timeout),
+        '--work-dir', args.work_dir
+    ]
+    for flag in ('direct', 'headless', 'batch', 'no_dialog'):
+        if getattr(args, flag):
+            values.append('--' + flag.replace('_', '-'))
+    return values
+
+def format_seconds(value):
+    return '-' if value is None else f'{value:.2f}'
+
+def print_report(results):
+    print("\n" + "=" * 118)
+    print(f"{'Target':<46} {'Links':>6} {'Done':>6} {'Wall s':>8} {'Links/h':>10} {'p50 s':>7} {'p95 s':>7} "
+          f"{'(span)':<14} {'CPU s':>7} {'RSS MB':>7}")
+    print("-" * 118)
+    for result in results:
+        links_per_hour = result['links_per_hour']
+        print(f"{result['target']:<46} {result['links']:>6} {result['completed']:>6} {result['wall_seconds']:>8.2f} "
+              f"{'-' if links_per_hour is None else f'{links_per_hour:.0f}':>10} "
+              f"{format_seconds(result['p50_seconds']):>7} {format_seconds(result['p95_seconds']):>7} "
+              f"{result['latency_span']:<14} {result['cpu_seconds']:>7.2f} {result['peak_rss_mb']:>7.1f}")
+    print("=" * 118)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local stand-in sites")
+    parser.add_argument('targets', nargs='*', metavar='target',
+                        help=f"what to benchmark: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument('--links', type=int, default=10, help="links per scraper run (default: 10)")
+    parser.add_argument('--file-mb', type=float, default=20, help="size of every downloaded file (default: 20)")
+    parser.add_argument('--latency-ms', type=float, default=50, help="fixture response latency (default: 50)")
+    parser.add_argument('--bandwidth-mbps', type=float, default=0,
+                        help="per-connection download rate in MB/s, 0 for no limit (default: 0)")
+    parser.add_argument('--no-dialog', action='store_true', help="start transfer downloads without the confirmation dialog")
+    parser.add_argument('--workers', type=int, default=3, help="TRANSFER_WORKERS for the transfer scraper (default: 3)")
+    parser.add_argument('--sharepoint-workers', type=int, default=1,
+                        help="browsers for the SharePoint downloader, more than 1 runs it in parallel (default: 1)")
+    parser.add_argument('--direct', action='store_true', help="download over HTTP: TRANSFER_DIRECT_DOWNLOAD=1, SharePoint direct download")
+    parser.add_argument('--headless', action='store_true', help="run the SharePoint downloader headless")
+    parser.add_argument('--batch', action='store_true', help="use the batch browser profile (SCRAPER_BATCH_MODE=1)")
+    parser.add_argument('--rows', type=int, default=20000, help="rows in the fake sheets (default: 20000)")
+    parser.add_argument('--sheet-latency-ms', type=float, default=150,
+                        help="latency of every fake Sheets API call (default: 150)")
+    parser.add_argument('--file-timeout', type=float, default=600,
+                        help="how long to wait for SharePoint downloads to finish (default: 600)")
+    parser.add_argument('--timeout', type=float, default=0, help="limit per target in seconds (default: none)")
+    parser.add_argument('--work-dir', help="keep the benchmark files here instead of a temporary directory")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the scrapers' output")
+    parser.add_argument('--child', choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target {unknown[0]!r} (choose from {', '.join(TARGETS)})")
+    args.targets = args.targets or list(TARGETS)
+    return args
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    keep = bool(args.work_dir)
+    args.work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix='scraper-bench-'))
+    os.makedirs(args.work_dir, exist_ok=True)
+    print(f"📂 Benchmark directory: {args.work_dir}")
+
+    results = []
+    try:
+        for target in dict.fromkeys(args.targets):
+            target_results = run_target(target, args)
+            if target_results:
+                results.extend(target_results)
+    finally:
+        if not keep:
+            shutil.rmtree(args.work_dir, ignore_errors=True)
+
+    if results:
+        print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
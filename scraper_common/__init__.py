@@ -0,0 +1 @@
+"""Shared building blocks for the scrapers in this repository"""
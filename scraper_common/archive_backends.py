@@ -0,0 +1,451 @@
+import os
+import bz2
+import gzip
+import lzma
+import shutil
+import tarfile
+import tempfile
+import threading
+import subprocess
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard  # Optional: .tar.zst without an external tool
+except ImportError:
+    zstandard = None
+
+try:
+    import rarfile  # Optional: .rar through the unrar tool when 7-Zip isn't installed
+except ImportError:
+    rarfile = None
+
+CHUNK_SIZE = 1024 * 1024  # Members are copied 1 MB at a time
+EXTRACT_WORKERS = 4
+TMP_SUFFIX = '.extracting'
+
+# Magic numbers, checked against the start of the file
+ZIP_MAGIC = (b'PK\x03\x04', b'PK\x05\x06', b'PK\x07\x08')
+SEVEN_ZIP_MAGIC = b"7z\xbc\xaf\x27\x1c"
+RAR_MAGIC = b'Rar!\x1a\x07'
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b'ustar'
+TAR_BLOCK = 512
+TAR_CHECKSUM = slice(148, 156)
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gz',
+    b'BZh': 'bz2',
+    b'\xfd7zXZ\x00': 'xz',
+    b'\x28\xb5\x2f\xfd': 'zst',
+}
+
+# Zip containers that are documents, not archives to unpack
+ZIP_DOCUMENT_EXTENSIONS = ('.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub', '.jar', '.apk', '.ipa')
+
+Member = namedtuple('Member', 'name size is_dir ref')
+
+def is_tar_header(block):
+    """Whether a 512-byte block is a tar header: the ustar magic, or a valid checksum for old v7 tars"""
+    if len(block) < TAR_BLOCK:
+        return False
+    if block[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+        return True
+    try:
+        checksum = int(block[TAR_CHECKSUM].strip(b'\0 ').decode('ascii') or '-1', 8)
+    except ValueError:
+        return False
+    # The checksum field itself counts as eight spaces
+    return checksum == sum(block[:148]) + 8 * ord(' ') + sum(block[156:TAR_BLOCK])
+
+def decompressed_head(path, compression, size=TAR_BLOCK):
+    """The first size bytes of a compressed file once decompressed, b'' if it can't be decoded"""
+    try:
+        if compression == 'zst':
+            with open(path, 'rb') as raw:
+                return zstandard.ZstdDecompressor().stream_reader(raw).read(size)
+        opener = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}[compression]
+        with opener(path, 'rb') as f:
+            return f.read(size)
+    except Exception:
+        # Truncated or corrupt streams aren't anything we can extract either
+        return b''
+
+def detect_format(path):
+    """Archive format from the file's magic bytes: (format, compression), or (None, None)
+
+    Compressed streams (gzip, bzip2, xz, zstd) only count as 'tar' when
+    their first decompressed block is a tar header, so a plain report.csv.gz
+    is left alone. Without the zstandard package a zstd stream can't be
+    looked into and is taken to be a tar.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(TAR_BLOCK)
+    except OSError:
+        return None, None
+
+    if head.startswith(ZIP_MAGIC):
+        if path.lower().endswith(ZIP_DOCUMENT_EXTENSIONS):
+            return None, None
+        return 'zip', None
+    if head.startswith(SEVEN_ZIP_MAGIC):
+        return '7z', None
+    if head.startswith(RAR_MAGIC):
+        return 'rar', None
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            if compression == 'zst' and zstandard is None:
+                return 'tar', compression
+            if is_tar_header(decompressed_head(path, compression)):
+                return 'tar', compression
+            return None, None
+    if is_tar_header(head):
+        return 'tar', None
+    return None, None
+
+def member_path(extract_folder, name):
+    """Destination of an archive member, refusing names that escape the folder"""
+    root = os.path.realpath(extract_folder)
+    target = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, target]) != root:
+        raise ValueError(f"Unsafe path in archive: {name}")
+    return target
+
+def write_member(stream, extract_folder, name, chunk_size=CHUNK_SIZE):
+    """Stream one member to a temp file next to its destination, then rename it into place"""
+    target = member_path(extract_folder, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = target + TMP_SUFFIX
+    try:
+        with open(tmp_path, 'wb') as dest:
+            shutil.copyfileobj(stream, dest, chunk_size)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ArchiveBackend:
+    """One way of reading one or more archive formats
+
+    Backends that can open members independently (random_access) are
+    extracted by a thread pool, one archive handle per worker. Others are
+    read in a single pass, streaming each member as it comes.
+    """
+    name = None
+    formats = ()
+    random_access = True
+
+    def available(self):
+        return True
+
+    def supports(self, archive_format, compression=None):
+        return archive_format in self.formats
+
+    def open(self, path, compression=None):
+        return path
+
+    def close(self, handle):
+        pass
+
+    def members(self, handle):
+        """Members of the archive, for random access backends"""
+        raise NotImplementedError
+
+    def open_member(self, handle, member):
+        raise NotImplementedError
+
+    def iter_streams(self, handle):
+        """(member, stream) pairs in archive order, for single pass backends"""
+        for member in self.members(handle):
+            with self.open_member(handle, member) as stream:
+                yield member, stream
+
+    def extract(self, path, extract_folder, compression=None, workers=EXTRACT_WORKERS, chunk_size=CHUNK_SIZE):
+        """Extract the archive into extract_folder; returns the extracted file names"""
+        if self.random_access:
+            return self.extract_parallel(path, extract_folder, compression, workers, chunk_size)
+        return self.extract_sequential(path, extract_folder, compression, chunk_size)
+
+    def extract_parallel(self, path, extract_folder, compression, workers, chunk_size):
+        handles = threading.local()
+        opened = []
+        opened_lock = threading.Lock()
+
+        def worker_handle():
+            if not hasattr(handles, 'handle'):
+                handles.handle = self.open(path, compression)
+                with opened_lock:
+                    opened.append(handles.handle)
+            return handles.handle
+
+        def extract_one(member):
+            if member.is_dir:
+                os.makedirs(member_path(extract_folder, member.name), exist_ok=True)
+                return None
+            with self.open_member(worker_handle(), member) as stream:
+                write_member(stream, extract_folder, member.name, chunk_size)
+            return member.name
+
+        handle = self.open(path, compression)
+        try:
+            members = self.members(handle)
+        finally:
+            self.close(handle)
+
+        # Largest first so one big member doesn't end up running alone at the end
+        members.sort(key=lambda member: member.size, reverse=True)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(members)))) as executor:
+                names = list(executor.map(extract_one, members))
+        finally:
+            for handle in opened:
+                self.close(handle)
+        return sorted(name for name in names if name)
+
+    def extract_sequential(self, path, extract_folder, compression, chunk_size):
+        names = []
+        handle = self.open(path, compression)
+        try:
+            for member, stream in self.iter_streams(handle):
+                if member.is_dir:
+                    os.makedirs(member_path(extract_folder, member.name), exist_ok=True)
+                    continue
+                write_member(stream, extract_folder, member.name, chunk_size)
+                names.append(member.name)
+        finally:
+            self.close(handle)
+        return sorted(names)
+
+    def extract_staged(self, path, extract_folder, extract_command):
+        """Let a tool extract everything into a staging folder, then rename the files into place
+
+        Used where per-member reads would decompress the archive over and
+        over (solid archives). The staging folder sits inside extract_folder
+        so the renames never cross filesystems.
+        """
+        os.makedirs(extract_folder, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=extract_folder)
+        try:
+            result = subprocess.run(extract_command(path, staging), stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"{self.name} failed: {result.stderr.strip()}")
+
+            names = []
+            for root, dirs, files in os.walk(staging):
+                for directory in dirs:
+                    name = os.path.relpath(os.path.join(root, directory), staging)
+                    os.makedirs(member_path(extract_folder, name), exist_ok=True)
+                for file_name in files:
+                    staged = os.path.join(root, file_name)
+                    name = os.path.relpath(staged, staging)
+                    target = member_path(extract_folder, name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(staged, target)
+                    names.append(name.replace(os.sep, '/'))
+            return sorted(names)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+class ZipBackend(ArchiveBackend):
+    name = 'zipfile'
+    formats = ('zip',)
+
+    def open(self, path, compression=None):
+        return zipfile.ZipFile(path, 'r')
+
+    def close(self, handle):
+        handle.close()
+
+    def members(self, handle):
+        return [Member(info.filename, info.file_size, info.is_dir(), info) for info in handle.infolist()]
+
+    def open_member(self, handle, member):
+        return handle.open(member.ref)
+
+class TarBackend(ArchiveBackend):
+    """tarfile, plain or compressed; zstd needs the zstandard package"""
+    name = 'tarfile'
+    formats = ('tar',)
+    random_access = False
+
+    def supports(self, archive_format, compression=None):
+        if archive_format != 'tar':
+            return False
+        return compression != 'zst' or zstandard is not None
+
+    def open(self, path, compression=None):
+        raw = open(path, 'rb')
+        try:
+            if compression == 'zst':
+                stream = zstandard.ZstdDecompressor().stream_reader(raw)
+                return raw, tarfile.open(fileobj=stream, mode='r|')
+            # Stream mode reads the (decompressed) archive once, front to back
+            return raw, tarfile.open(fileobj=raw, mode='r|*')
+        except BaseException:
+            raw.close()
+            raise
+
+    def close(self, handle):
+        raw, tar = handle
+        tar.close()
+        raw.close()
+
+    def iter_streams(self, handle):
+        raw, tar = handle
+        for info in tar:
+            if info.isdir():
+                yield Member(info.name, 0, True, info), None
+            elif info.isfile():
+                # Links and device files are skipped
+                yield Member(info.name, info.size, False, info), tar.extractfile(info)
+
+class CommandBackend(ArchiveBackend):
+    """A command line archiver found on PATH"""
+    commands = ()
+
+    def __init__(self):
+        self.command = next((path for path in map(shutil.which, self.commands) if path), None)
+
+    def available(self):
+        return self.command is not None
+
+class ProcessStream:
+    """Read side of a command's stdout; closing it checks the exit status"""
+    def __init__(self, args):
+        self.process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+
+    def read(self, size=-1):
+        return self.process.stdout.read(size)
+
+    def close(self):
+        self.process.stdout.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"{os.path.basename(self.process.args[0])} exited with status {self.process.returncode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except RuntimeError:
+            if exc_type is None:
+                raise
+
+def listing_fields(block):
+    """The 'Key = value' lines of a block of 7z l -slt output"""
+    return dict(line.split(' = ', 1) for line in block.splitlines() if ' = ' in line)
+
+def parse_7z_listing(output):
+    """(solid, members) from the output of 7z l -slt
+
+    The archive's own block (Type, Solid, ...) comes after a '--' line and
+    the members, one block each, after a '----------' line.
+    """
+    head, separator, body = output.partition('\n----------\n')
+    if not separator:
+        head, body = output, ''  # No members
+    archive = listing_fields(head.rpartition('\n--\n')[2])
+    solid = archive.get('Solid') == '+'
+
+    members = []
+    for block in body.split('\n\n'):
+        fields = listing_fields(block)
+        if 'Path' not in fields or 'Size' not in fields:
+            continue
+        is_dir = fields.get('Folder') == '+' or fields.get('Attributes', '').startswith('D')
+        size = int(fields['Size']) if fields['Size'].isdigit() else 0
+        members.append(Member(fields['Path'].replace(os.sep, '/'), size, is_dir, fields['Path']))
+    return solid, members
+
+class SevenZipBackend(CommandBackend):
+    """7-Zip: members are piped out one per process, in parallel, unless the archive is solid"""
+    name = '7-Zip'
+    commands = ('7zz', '7z', '7za')
+
+    def supports(self, archive_format, compression=None):
+        if archive_format == 'rar':
+            # The standalone 7za has no RAR codec
+            return os.path.basename(self.command or '') in ('7zz', '7z')
+        return archive_format in ('7z', 'zip', 'tar')
+
+    def listing(self, path):
+        # Without -ba, whose output leaves out the archive block that says whether it is solid
+        result = subprocess.run([self.command, 'l', '-slt', '--', path], stdin=subprocess.DEVNULL,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"7-Zip could not list {path}: {result.stderr.strip()}")
+        return parse_7z_listing(result.stdout)
+
+    def members(self, handle):
+        return self.listing(handle)[1]
+
+    def open_member(self, handle, member):
+        # -spd: the member name is a literal path, not a wildcard
+        return ProcessStream([self.command, 'x', '-so', '-spd', '-y', '--', handle, member.ref])
+
+    def extract(self, path, extract_folder, compression=None, workers=EXTRACT_WORKERS, chunk_size=CHUNK_SIZE):
+        solid, members = self.listing(path)
+        if solid:
+            return self.extract_staged(path, extract_folder,
+                                       lambda path, staging: [self.command, 'x', '-y', f'-o{staging}', '--', path])
+        return super().extract(path, extract_folder, compression, workers, chunk_size)
+
+class BsdtarBackend(CommandBackend):
+    """libarchive's bsdtar reads zip, tar (any compression), 7z and rar in one pass"""
+    name = 'bsdtar'
+    commands = ('bsdtar',)
+
+    def supports(self, archive_format, compression=None):
+        return archive_format in ('zip', 'tar', '7z', 'rar')
+
+    def extract(self, path, extract_folder, compression=None, workers=EXTRACT_WORKERS, chunk_size=CHUNK_SIZE):
+        return self.extract_staged(path, extract_folder,
+                                   lambda path, staging: [self.command, '-x', '-f', path, '-C', staging])
+
+class RarfileBackend(ArchiveBackend):
+    """The rarfile package (which drives unrar); solid archives are read in order"""
+    name = 'rarfile'
+    formats = ('rar',)
+
+    def available(self):
+        return rarfile is not None
+
+    def open(self, path, compression=None):
+        return rarfile.RarFile(path)
+
+    def close(self, handle):
+        handle.close()
+
+    def members(self, handle):
+        return [Member(info.filename, info.file_size, info.is_dir(), info) for info in handle.infolist()]
+
+    def open_member(self, handle, member):
+        return handle.open(member.ref)
+
+    def extract(self, path, extract_folder, compression=None, workers=EXTRACT_WORKERS, chunk_size=CHUNK_SIZE):
+        with rarfile.RarFile(path) as rar:
+            solid = rar.is_solid()
+        if solid:
+            return self.extract_sequential(path, extract_folder, compression, chunk_size)
+        return self.extract_parallel(path, extract_folder, compression, workers, chunk_size)
+
+# In order of preference; the first available backend supporting a format is used
+BACKENDS = [ZipBackend(), TarBackend(), SevenZipBackend(), RarfileBackend(), BsdtarBackend()]
+
+def register_backend(backend, first=False):
+    """Add a backend to the registry (first=True to prefer it over the built-in ones)"""
+    if first:
+        BACKENDS.insert(0, backend)
+    else:
+        BACKENDS.append(backend)
+
+def find_backend(archive_format, compression=None):
+    for backend in BACKENDS:
+        if backend.available() and backend.supports(archive_format, compression):
+            return backend
+    return None
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from scraper_common.metrics import span
+from scraper_common.archive_backends import CHUNK_SIZE, EXTRACT_WORKERS, TMP_SUFFIX, detect_format, find_backend
+
+MANIFEST_NAME = '.extract_manifest.json'  # Kept in the extraction folder
+IGNORED_SUFFIXES = ('.part', '.segments', '.crdownload', '.tmp', TMP_SUFFIX)  # Unfinished files
+
+_manifest_lock = threading.Lock()
+
+def file_hash(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(extract_folder):
+    try:
+        with open(os.path.join(extract_folder, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(extract_folder, manifest):
+    path = os.path.join(extract_folder, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Warning: Could not save extraction manifest: {e}")
+
+def already_extracted(archive_path, extract_folder, entry):
+    """True if a manifest entry describes this archive and its files are still there
+
+    Size and mtime are checked first. Only if the mtime changed (e.g. the
+    same file was downloaded again) and the entry has a hash is the archive
+    hashed and compared; without one it counts as a different archive.
+    """
+    if not entry:
+        return False
+    stat = os.stat(archive_path)
+    if stat.st_size != entry.get('size'):
+        return False
+    if stat.st_mtime != entry.get('mtime'):
+        if not entry.get('sha256') or file_hash(archive_path) != entry['sha256']:
+            return False
+    return all(os.path.exists(os.path.join(extract_folder, name)) for name in entry.get('files', []))
+
+def record_extraction(archive_path, extract_folder, files, sha256=None):
+    """Add an archive to the manifest so it isn't extracted again
+
+    The archive is identified by size and mtime; pass sha256 when the
+    caller already has it; it is never computed here, as that would mean
+    reading the whole archive a second time.
+    """
+    stat = os.stat(archive_path)
+    entry = {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'files': files,
+        'extracted_at': time.time()
+    }
+    if sha256:
+        entry['sha256'] = sha256
+    with _manifest_lock:
+        manifest = load_manifest(extract_folder)
+        manifest[os.path.basename(archive_path)] = entry
+        save_manifest(extract_folder, manifest)
+
+def find_archives(directory):
+    """Files in directory (not below it) that are archives, judged by content"""
+    archives = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if not entry.is_file() or entry.name.endswith(IGNORED_SUFFIXES):
+            continue
+        if detect_format(entry.path)[0]:
+            archives.append(entry.path)
+    return archives
+
+def extract_archive(archive_path, extract_folder, workers=EXTRACT_WORKERS, force=False):
+    """Extract one archive unless the manifest shows it was already extracted
+
+    The format is detected from the file's content and handed to the first
+    available backend for it. Returns the list of extracted file names, or
+    None if the archive could not be extracted.
+    """
+    archive_name = os.path.basename(archive_path)
+    archive_format, compression = detect_format(archive_path)
+    if not archive_format:
+        print(f"⚠️ Not a recognised archive: {archive_name}")
+        return None
+    backend = find_backend(archive_format, compression)
+    if backend is None:
+        print(f"⚠️ No extractor available for {archive_format} archives ({archive_name}); "
+              f"install 7-Zip or bsdtar")
+        return None
+    os.makedirs(extract_folder, exist_ok=True)
+
+    with _manifest_lock:
+        entry = load_manifest(extract_folder).get(archive_name)
+    if not force and already_extracted(archive_path, extract_folder, entry):
+        print(f"⏭️ Already extracted: {archive_name}")
+        return entry['files']
+
+    print(f"📦 Extracting: {archive_name} ({archive_format}, {backend.name})")
+    started = time.monotonic()
+    try:
+        with span('extraction', format=archive_format, backend=backend.name) as current:
+            current.set(archive=archive_name, bytes=os.path.getsize(archive_path))
+            files = backend.extract(archive_path, extract_folder, compression, workers)
+            current.set(files=len(files))
+    except Exception as e:
+        print(f"❌ Error extracting {archive_path}: {e}")
+        return None
+
+    record_extraction(archive_path, extract_folder, files)
+    print(f"✅ Extracted {len(files)} files to {extract_folder} in {time.monotonic() - started:.1f}s")
+    return files
+
+def extract_all(download_directory, extract_folder=None, workers=EXTRACT_WORKERS):
+    """Extract every archive in download_directory into <download_directory>/extracted
+
+    Returns False if there was nothing to extract.
+    """
+    archives = find_archives(download_directory)
+    if not archives:
+        return False
+
+    extract_folder = extract_folder or os.path.join(download_directory, "extracted")
+    for archive_path in archives:
+        extract_archive(archive_path, extract_folder, workers)
+    return True
@@ -0,0 +1,66 @@
+import os
+
+BATCH_WINDOW_SIZE = (1280, 800)  # Fixed viewport; small, but wide enough for the sites' desktop layouts
+
+# Chrome switches for unattended runs: no window, no background services
+BATCH_ARGUMENTS = (
+    "--headless=new",
+    f"--window-size={BATCH_WINDOW_SIZE[0]},{BATCH_WINDOW_SIZE[1]}",
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check"
+)
+BATCH_DISABLED_FEATURES = ("Translate", "MediaRouter", "OptimizationHints", "AutofillServerCommunication")
+
+# Requests blocked over CDP. Network.setBlockedURLs matches the URL whatever
+# the request is for, downloads included, and a transfer can be a single
+# .jpg or .ttf, so file extensions aren't blocked: images are off through the
+# content setting instead. Only streaming manifests and segments, which are
+# never what a transfer hands out, are cut off.
+BLOCKED_URL_PATTERNS = [
+    # Streaming media (SharePoint's player, HLS / DASH)
+    "*videomanifest*", "*.m3u8*", "*.mpd", "*.mpd?*", "*.m4s", "*.m4s?*"
+]
+
+def batch_mode_enabled():
+    """True when SCRAPER_BATCH_MODE=1 asks for the headless, trimmed browser profile"""
+    return os.getenv("SCRAPER_BATCH_MODE", "0") == "1"
+
+def apply_batch_options(chrome_options):
+    """Turn Chrome options into the batch profile: headless, small viewport, no background work, no images"""
+    # Chrome only honours the last --disable-features switch, so merge with one already set
+    features = list(BATCH_DISABLED_FEATURES)
+    for argument in list(chrome_options.arguments):
+        if argument.startswith("--disable-features="):
+            features = argument.split("=", 1)[1].split(",") + features
+            chrome_options.arguments.remove(argument)
+        elif argument.startswith(("--window-size=", "--headless", "--start-maximized")):
+            chrome_options.arguments.remove(argument)
+
+    for argument in BATCH_ARGUMENTS:
+        if argument not in chrome_options.arguments:
+            chrome_options.add_argument(argument)
+    chrome_options.add_argument("--disable-features=" + ",".join(dict.fromkeys(features)))
+
+    # Images are also off at the content-settings level (this doesn't affect downloads)
+    prefs = dict(chrome_options.experimental_options.get("prefs", {}))
+    prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option("prefs", prefs)
+    return chrome_options
+
+def block_heavy_resources(driver):
+    """Block streaming media for the browser's tab over CDP"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"⚠️ Warning: Could not block page resources: {e}")
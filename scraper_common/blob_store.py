@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import errno
+import hashlib
+import threading
+from scraper_common.urls import normalize_url
+from scraper_common.archive_extract import MANIFEST_NAME
+
+CHUNK_SIZE = 1024 * 1024
+SKIPPED_SUFFIXES = ('.part', '.segments', '.crdownload', '.tmp', '.extracting')  # Unfinished files
+SKIPPED_NAMES = (MANIFEST_NAME,)  # Bookkeeping that differs per folder
+SAVE_INTERVAL = 30  # Seconds between index writes; close() writes the rest
+
+class BlobStore:
+    """Content-addressed file store; link folders hold hardlinks to its blobs
+
+    Every file is stored once under blobs/<sha256[:2]>/<sha256>, however many
+    link folders (or archives) contain it. An index maps each transfer URL to
+    the files it produced, so a transfer that shows up again is linked in
+    from the store instead of being downloaded. The store must be on the same
+    filesystem as the link folders.
+
+    A hardlink is the same file as its blob: editing a stored file in place
+    in one link folder changes it in every folder that has the same content.
+
+    Files that are already hardlinks to a blob are recognised by their inode
+    and not hashed again. The index is written at most every save_interval
+    seconds and on close().
+    """
+    def __init__(self, root, save_interval=SAVE_INTERVAL):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.index_path = os.path.join(root, 'index.json')
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = self.load_index()
+        self.inodes = self.load_inodes()
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_inodes(self):
+        """(device, inode) -> digest of the stored blobs, so linked files need no hashing"""
+        inodes = {}
+        for files in self.index.values():
+            for digest in files.values():
+                try:
+                    stat = os.stat(self.blob_path(digest))
+                except OSError:
+                    continue
+                inodes[(stat.st_dev, stat.st_ino)] = digest
+        return inodes
+
+    def save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not save blob index: {e}")
+            return
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def close(self):
+        """Write index changes that haven't been saved yet"""
+        with self.lock:
+            if self.dirty:
+                self.save_index()
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    @staticmethod
+    def file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def replace_with_link(source, dest):
+        """Atomically make dest a hardlink to source"""
+        tmp_path = dest + '.link.tmp'
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        os.link(source, tmp_path)
+        os.replace(tmp_path, dest)
+
+    def add(self, path):
+        """Store a file and turn it into a hardlink to its blob
+
+        Returns (digest, duplicate) where duplicate tells that the content was
+        already stored, or (None, False) if the file can't be hardlinked.
+        """
+        stat = os.stat(path)
+        with self.lock:
+            digest = self.inodes.get((stat.st_dev, stat.st_ino))
+        if digest and os.path.exists(self.blob_path(digest)):
+            return digest, False  # Already a link to its blob
+
+        digest = self.file_hash(path)
+        blob = self.blob_path(digest)
+        duplicate = False
+        try:
+            with self.lock:
+                if os.path.exists(blob):
+                    # Same content stored before: drop this copy in favour of the blob
+                    if not os.path.samefile(blob, path):
+                        self.replace_with_link(blob, path)
+                        duplicate = True
+                else:
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    os.link(path, blob)
+                blob_stat = os.stat(blob)
+                self.inodes[(blob_stat.st_dev, blob_stat.st_ino)] = digest
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                return None, False  # Another filesystem, or no hardlinks here
+            raise
+        return digest, duplicate
+
+    def ingest(self, url, directory):
+        """Store every finished file under directory and remember them as the files of url
+
+        Returns (files, bytes_saved) where bytes_saved counts the data that
+        was already in the store (and now takes no extra space).
+        """
+        files = {}
+        saved = 0
+        for root, dirs, names in os.walk(directory):
+            for name in names:
+                if name.endswith(SKIPPED_SUFFIXES) or name in SKIPPED_NAMES:
+                    continue
+                path = os.path.join(root, name)
+                digest, duplicate = self.add(path)
+                if digest is None:
+                    continue
+                if duplicate:
+                    saved += os.path.getsize(path)
+                files[os.path.relpath(path, directory).replace(os.sep, '/')] = digest
+
+        with self.lock:
+            self.index[normalize_url(url)] = files
+            self.dirty = True
+            if time.monotonic() - self.last_save >= self.save_interval:
+                self.save_index()
+        return files, saved
+
+    def materialize(self, url, directory):
+        """Link the files stored for url into directory; False if url isn't in the store (or a blob is gone)"""
+        with self.lock:
+            files = self.index.get(normalize_url(url))
+        if not files:
+            return False
+        if not all(os.path.exists(self.blob_path(digest)) for digest in files.values()):
+            return False
+
+        for name, digest in files.items():
+            dest = os.path.join(directory, *name.split('/'))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if os.path.exists(dest) and os.path.samefile(dest, self.blob_path(digest)):
+                continue
+            self.replace_with_link(self.blob_path(digest), dest)
+        return True
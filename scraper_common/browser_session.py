@@ -0,0 +1,52 @@
+import os
+import json
+from urllib.parse import urlparse
+
+# Fields Network.setCookies accepts; the rest of what getAllCookies returns (size, session, ...) is read-only
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires',
+                 'priority', 'sourceScheme', 'sourcePort')
+
+def export_cookies(driver):
+    """All cookies of a browser, including HttpOnly ones and those of other domains (e.g. the login host)"""
+    return driver.execute_cdp_cmd("Network.getAllCookies", {}).get('cookies', [])
+
+def import_cookies(driver, cookies):
+    """Load exported cookies into another browser so it shares the signed-in session"""
+    params = []
+    for cookie in cookies:
+        param = {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+        if cookie.get('session') or param.get('expires', -1) <= 0:
+            param.pop('expires', None)  # Session cookie
+        params.append(param)
+    if params:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+
+def cookie_header(cookies, url):
+    """Cookie header value with the cookies that apply to url's host, None if there are none"""
+    host = urlparse(url).hostname or ''
+    pairs = []
+    for cookie in cookies:
+        domain = cookie.get('domain', '').lstrip('.')
+        if domain and (host == domain or host.endswith('.' + domain)):
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+    return '; '.join(pairs) or None
+
+def save_cookies(cookies, filename):
+    """Write cookies to a file only the current user can read"""
+    temp_file = filename + '.tmp'
+    fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(cookies, f)
+    os.replace(temp_file, filename)
+
+def load_cookies(filename):
+    """Cookies saved by save_cookies, or None if there are none"""
+    try:
+        with open(filename, 'r') as f:
+            cookies = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Warning: Could not read saved session {filename}: {e}")
+        return None
+    return cookies or None
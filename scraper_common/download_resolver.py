@@ -0,0 +1,101 @@
+import json
+import time
+from urllib.parse import urldefrag
+from scraper_common.browser_session import export_cookies, cookie_header
+
+CAPTURE_TIMEOUT = 30  # Seconds to wait for the download request after clicking
+
+def enable_network_capture(chrome_options):
+    """Turn on Chrome's performance log so network and download events can be read back"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+def read_network_events(driver):
+    """Return (and clear) the CDP events buffered in the performance log"""
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+
+    events = []
+    for entry in entries:
+        try:
+            events.append(json.loads(entry['message'])['message'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return events
+
+def find_download(events):
+    """(url, suggested_filename) of a file download among CDP events, (None, None) if there is none"""
+    for event in events:
+        method = event.get('method')
+        params = event.get('params', {})
+
+        if method in ('Page.downloadWillBegin', 'Browser.downloadWillBegin'):
+            return params.get('url'), params.get('suggestedFilename')
+
+        if method == 'Network.responseReceived':
+            response = params.get('response', {})
+            headers = {key.lower(): value for key, value in response.get('headers', {}).items()}
+            if 'attachment' in headers.get('content-disposition', '').lower():
+                return response.get('url'), None
+    return None, None
+
+def find_download_url(events):
+    """Find the URL of a file download among CDP events"""
+    return find_download(events)[0]
+
+def anchor_href(driver, element):
+    """The href of an anchor that points somewhere other than the current page"""
+    try:
+        href = element.get_attribute('href')
+    except Exception:
+        return None
+
+    if not href or not href.startswith(('http://', 'https://')):
+        return None
+    if urldefrag(href)[0] == urldefrag(driver.current_url)[0]:
+        return None
+    return href
+
+def resolve_download_url(driver, button, after_click=None, timeout=CAPTURE_TIMEOUT):
+    """Click a download button with browser downloads denied and capture the final file URL
+
+    Falls back to the anchor's href when no download request shows up.
+    Returns None if the URL could not be resolved; the caller should then
+    re-enable downloads and let the browser fetch the file.
+    """
+    href = anchor_href(driver, button)
+
+    # Drop old events and stop Chrome from fetching the file itself
+    read_network_events(driver)
+    driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "deny"})
+
+    driver.execute_script("arguments[0].click();", button)
+    if after_click:
+        after_click()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        url = find_download_url(read_network_events(driver))
+        if url:
+            return url
+        time.sleep(0.5)
+
+    return href
+
+def browser_session_headers(driver, url):
+    """Headers (cookies, user agent, referer) that let an HTTP client act as the browser session"""
+    try:
+        cookies = export_cookies(driver)
+    except Exception:
+        cookies = driver.get_cookies()
+
+    headers = {
+        'User-Agent': driver.execute_script("return navigator.userAgent;"),
+        'Referer': driver.current_url
+    }
+    cookies = cookie_header(cookies, url)
+    if cookies:
+        headers['Cookie'] = cookies
+    return headers
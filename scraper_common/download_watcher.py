@@ -0,0 +1,233 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# Temporary files browsers and our HTTP downloader write while a download is running
+TEMP_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+# inotify constants from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOSE_WRITE = 0x00000008
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyBackend:
+    """Directory change notifications through Linux inotify (via ctypes, no extra packages)"""
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # File growth (IN_MODIFY) is left out on purpose: it fires on every write
+        mask = IN_CREATE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_CLOSE_WRITE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        """Block until something changes in the directory or timeout passes; returns changed names"""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+
+        names = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class KqueueBackend:
+    """Directory change notifications through kqueue (macOS / BSD)"""
+    def __init__(self, directory):
+        self.dir_fd = os.open(directory, os.O_RDONLY)
+        self.kq = select.kqueue()
+        self.event = select.kevent(
+            self.dir_fd,
+            filter=select.KQ_FILTER_VNODE,
+            flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+            fflags=select.KQ_NOTE_WRITE | select.KQ_NOTE_RENAME | select.KQ_NOTE_DELETE
+        )
+
+    def wait(self, timeout):
+        events = self.kq.control([self.event], 1, max(timeout, 0))
+        return [''] if events else []
+
+    def close(self):
+        self.kq.close()
+        os.close(self.dir_fd)
+
+class PollingBackend:
+    """Last resort: wake up at a short fixed interval and rescan"""
+    def __init__(self, directory, interval=0.5):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(max(0, min(timeout, self.interval)))
+        return []
+
+    def close(self):
+        pass
+
+def open_backend(directory):
+    """Pick the best change notification mechanism available on this system"""
+    candidates = []
+    if sys.platform.startswith('linux'):
+        candidates.append(InotifyBackend)
+    if hasattr(select, 'kqueue'):
+        candidates.append(KqueueBackend)
+
+    for backend in candidates:
+        try:
+            return backend(directory)
+        except (OSError, AttributeError):
+            continue
+    return PollingBackend(directory)
+
+class DownloadWatcher:
+    """Wait for downloads in a directory to start and finish without fixed sleeps
+
+    Create the watcher before triggering the download so files that appear
+    afterwards are recognised as new.
+    """
+    def __init__(self, directory, temp_suffixes=TEMP_SUFFIXES):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.temp_suffixes = temp_suffixes
+        self.baseline = set(os.listdir(directory))
+        self.backend = open_backend(directory)
+        self.samples = {}  # name -> (time, size) of the previous measurement
+        self.rates = {}  # name -> bytes per second
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def list_files(self):
+        try:
+            return os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+    def temp_files(self):
+        """Files that are still being downloaded"""
+        return [name for name in self.list_files() if name.endswith(self.temp_suffixes)]
+
+    def new_files(self):
+        """Files that appeared since the watcher was created"""
+        return set(self.list_files()) - self.baseline
+
+    def started(self):
+        """Whether a download showed up since the watcher was created
+
+        Temporary files already there (a download left over by an earlier
+        run) don't count.
+        """
+        return bool(self.new_files())
+
+    def wait_for_start(self, timeout=30):
+        """Return True as soon as a download shows up in the directory"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.started():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.backend.wait(remaining)
+
+    def wait_for_completion(self, timeout=300, progress_callback=None, progress_interval=5):
+        """Return True once no temporary download files are left, False on timeout
+
+        progress_callback receives a list of (name, size_bytes, bytes_per_sec).
+        """
+        deadline = time.monotonic() + timeout
+        next_report = time.monotonic()
+
+        while True:
+            temp_files = self.temp_files()
+            self.update_rates(temp_files)
+
+            if not temp_files:
+                return True
+
+            now = time.monotonic()
+            if now >= deadline:
+                return False
+
+            if progress_callback and now >= next_report:
+                progress_callback(self.progress(temp_files))
+                next_report = now + progress_interval
+
+            # Wake up on the rename that finishes a download, or for the next progress report
+            self.backend.wait(min(deadline - now, progress_interval))
+
+    def update_rates(self, names):
+        """Measure how fast each temporary file is growing"""
+        now = time.monotonic()
+        for name in names:
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                continue
+
+            previous = self.samples.get(name)
+            if previous and now > previous[0]:
+                self.rates[name] = max(0, size - previous[1]) / (now - previous[0])
+            self.samples[name] = (now, size)
+
+        for name in list(self.samples):
+            if name not in names:
+                del self.samples[name]
+                self.rates.pop(name, None)
+
+    def progress(self, names=None):
+        """(name, size_bytes, bytes_per_sec) for every running download"""
+        names = self.temp_files() if names is None else names
+        result = []
+        for name in names:
+            sample = self.samples.get(name)
+            size = sample[1] if sample else 0
+            result.append((name, size, self.rates.get(name)))
+        return result
+
+    def close(self):
+        self.backend.close()
+
+def print_progress(progress):
+    """Default progress callback printing size and speed of each download"""
+    print(f"📥 Still downloading... {len(progress)} files remaining")
+    for name, size, rate in progress:
+        line = f"  - {name}: {size / (1024 * 1024):.1f} MB downloaded"
+        if rate is not None:
+            line += f" ({rate / (1024 * 1024):.1f} MB/s)"
+        print(line)
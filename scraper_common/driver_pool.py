@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from scraper_common.metrics import span, timed
+
+try:
+    import psutil  # Optional: gives the real memory usage of the whole browser process tree
+except ImportError:
+    psutil = None
+
+def default_chrome_options(download_directory=None):
+    """Default Chrome options with download preferences"""
+    chrome_options = Options()
+
+    prefs = {
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    if download_directory:
+        prefs["download.default_directory"] = download_directory
+    chrome_options.add_experimental_option("prefs", prefs)
+
+    # Disable notifications
+    chrome_options.add_argument("--disable-notifications")
+    return chrome_options
+
+def set_download_directory(driver, download_directory):
+    """Switch the download directory of a running browser via CDP"""
+    download_directory = os.path.abspath(download_directory)
+    os.makedirs(download_directory, exist_ok=True)
+    driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+        "behavior": "allow",
+        "downloadPath": download_directory
+    })
+
+def browser_memory_mb(driver):
+    """Memory used by the browser in MB (process tree RSS if psutil is available, JS heap otherwise)"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(driver.service.process.pid)
+            total = 0
+            for proc in [process] + process.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except Exception:
+            pass
+
+    try:
+        heap = driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : 0;")
+        return (heap or 0) / (1024 * 1024)
+    except Exception:
+        return 0
+
+class PooledDriver:
+    """Bookkeeping for a browser owned by the pool"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.jobs = 0
+        self.started_at = time.time()
+
+class DriverPool:
+    """Pool of pre-launched Chrome browsers that are reset and reused between jobs"""
+    def __init__(self, size=2, options_factory=default_chrome_options, max_jobs_per_driver=25,
+                 max_memory_mb=2048, on_launch=None):
+        self.size = max(1, size)
+        self.options_factory = options_factory
+        self.max_jobs_per_driver = max_jobs_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.on_launch = on_launch
+        self.idle = []
+        self.in_use = {}
+        self.launched = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def launch(self):
+        """Start a new browser"""
+        with span('driver_startup'):
+            driver = webdriver.Chrome(options=self.options_factory(None))
+        if self.on_launch:
+            self.on_launch(driver)
+        return PooledDriver(driver)
+
+    def warm(self, count=None):
+        """Pre-launch browsers in parallel so the first jobs don't pay Chrome's cold start"""
+        with self.condition:
+            count = min(count or self.size, self.size - self.launched)
+            self.launched += max(0, count)
+
+        if count <= 0:
+            return
+
+        print(f"🔥 Pre-launching {count} browsers...")
+        threads = [threading.Thread(target=self._warm_one, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _warm_one(self):
+        try:
+            entry = self.launch()
+        except Exception as e:
+            print(f"❌ Error launching browser: {e}")
+            with self.condition:
+                self.launched -= 1
+                self.condition.notify()
+            return
+
+        with self.condition:
+            self.idle.append(entry)
+            self.condition.notify()
+
+    @timed('driver_acquire')
+    def acquire(self, download_directory=None, timeout=None):
+        """Hand out a clean browser, downloading into download_directory"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            entry = None
+            with self.condition:
+                while not self.idle and self.launched >= self.size:
+                    if self.closed:
+                        raise RuntimeError("Driver pool is closed")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No browser available in the pool")
+                    self.condition.wait(timeout=remaining)
+
+                if self.closed:
+                    raise RuntimeError("Driver pool is closed")
+
+                if self.idle:
+                    entry = self.idle.pop()
+                else:
+                    self.launched += 1
+
+            if entry is None:
+                try:
+                    entry = self.launch()
+                except Exception:
+                    with self.condition:
+                        self.launched -= 1
+                        self.condition.notify()
+                    raise
+
+            try:
+                self.reset(entry.driver, download_directory)
+            except Exception as e:
+                # The browser died while idle - replace it
+                print(f"⚠️ Discarding broken browser: {e}")
+                self._discard(entry)
+                continue
+
+            with self.condition:
+                self.in_use[id(entry.driver)] = entry
+            return entry.driver
+
+    def reset(self, driver, download_directory=None):
+        """Close extra tabs, blank the page and point downloads at the new directory"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+
+        if download_directory:
+            set_download_directory(driver, download_directory)
+
+    def release(self, driver, healthy=True):
+        """Return a browser to the pool, recycling it when it is worn out"""
+        with self.condition:
+            entry = self.in_use.pop(id(driver), None)
+
+        if entry is None:
+            # Not one of ours
+            driver.quit()
+            return
+
+        entry.jobs += 1
+        recycle = not healthy or self.closed or entry.jobs >= self.max_jobs_per_driver
+        if not recycle and self.max_memory_mb:
+            memory = browser_memory_mb(driver)
+            if memory > self.max_memory_mb:
+                print(f"♻️ Recycling browser using {memory:.0f} MB")
+                recycle = True
+
+        if recycle:
+            self._discard(entry)
+            return
+
+        with self.condition:
+            self.idle.append(entry)
+            self.condition.notify()
+
+    def _discard(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        with self.condition:
+            self.launched -= 1
+            self.condition.notify()
+
+    @contextmanager
+    def lease(self, download_directory=None):
+        """Context manager around acquire/release"""
+        driver = self.acquire(download_directory)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(driver, healthy=healthy)
+
+    def close(self):
+        """Quit all idle browsers; browsers still in use are quit when released"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+
+        for entry in idle:
+            self._discard(entry)
@@ -0,0 +1,455 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+import urllib3
+from urllib3.exceptions import HTTPError
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB writes
+PART_SUFFIX = '.part'
+SEGMENTS_SUFFIX = '.segments'  # Sidecar file with the progress of each byte range
+MIN_SEGMENT_SIZE = 16 * 1024 * 1024  # Smaller files are not worth splitting
+
+_pool_manager = None
+_pool_manager_lock = threading.Lock()
+
+def get_pool_manager():
+    """Shared pooled HTTP client so connections are reused across downloads"""
+    global _pool_manager
+    with _pool_manager_lock:
+        if _pool_manager is None:
+            _pool_manager = urllib3.PoolManager(
+                num_pools=32,
+                maxsize=16,
+                block=False,
+                retries=urllib3.Retry(total=3, connect=3, read=0, redirect=10, backoff_factor=1,
+                                      status_forcelist=(429, 500, 502, 503, 504)),
+                timeout=urllib3.Timeout(connect=15, read=120)
+            )
+        return _pool_manager
+
+class DownloadError(Exception):
+    """Raised when a file could not be downloaded"""
+
+class RangeNotSupported(DownloadError):
+    """The server ignored a Range request"""
+
+class HttpStatusError(DownloadError):
+    """The server answered with an error status; retrying the same URL won't help"""
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+
+def discard_response(response):
+    """Give the connection back without reading the rest of a (possibly huge) body"""
+    try:
+        response.close()
+    finally:
+        response.release_conn()
+
+def filename_from_response(response, url):
+    """Pick a file name from Content-Disposition, falling back to the URL path"""
+    disposition = response.headers.get('Content-Disposition', '')
+
+    match = re.search(r"filename\*\s*=\s*[^']*'[^']*'([^;]+)", disposition, re.IGNORECASE)
+    if match:
+        name = unquote(match.group(1).strip().strip('"'))
+    else:
+        match = re.search(r'filename\s*=\s*"?([^";]+)"?', disposition, re.IGNORECASE)
+        name = match.group(1).strip() if match else unquote(os.path.basename(urlparse(url).path))
+
+    # Never let the server pick a path outside the download directory
+    name = os.path.basename(name.replace('\\', '/')).strip()
+    return name or 'download'
+
+def parse_content_range(value):
+    """Parse 'bytes start-end/total' into (start, end, total); unknown parts are None"""
+    match = re.match(r'bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)', value or '')
+    if not match:
+        return None
+    start, end, total = match.groups()
+    return (None if start is None else int(start),
+            None if end is None else int(end),
+            None if total == '*' else int(total))
+
+class ProgressReporter:
+    """Throttled progress callback with a bytes/sec estimate"""
+    def __init__(self, callback, total, start_bytes=0, interval=1.0):
+        self.callback = callback
+        self.total = total
+        self.downloaded = start_bytes
+        self.interval = interval
+        self.started_at = time.monotonic()
+        self.start_bytes = start_bytes
+        self.last_report = 0
+        self.lock = threading.Lock()
+
+    def update(self, num_bytes, force=False):
+        with self.lock:
+            self.downloaded += num_bytes
+            now = time.monotonic()
+            if not self.callback or (not force and now - self.last_report < self.interval):
+                return
+            self.last_report = now
+            elapsed = max(now - self.started_at, 1e-6)
+            rate = (self.downloaded - self.start_bytes) / elapsed
+            downloaded = self.downloaded
+        self.callback(downloaded, self.total, rate)
+
+class HttpDownloader:
+    """Stream files straight to disk with chunked writes and Range based resume"""
+    sequential_writes = True  # The .part file grows front to back, so it can be read while downloading
+
+    def __init__(self, pool_manager=None, chunk_size=CHUNK_SIZE, max_retries=5, progress_interval=1.0):
+        self.pool_manager = pool_manager or get_pool_manager()
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+
+    def request(self, url, headers, start=0, end=None):
+        """Open a streaming GET, asking for the bytes from start (to end, inclusive)"""
+        headers = dict(headers or {})
+        if end is not None:
+            headers['Range'] = f'bytes={start}-{end}'
+        elif start:
+            headers['Range'] = f'bytes={start}-'
+        return self.pool_manager.request('GET', url, headers=headers, preload_content=False, redirect=True)
+
+    def download(self, url, download_directory=None, dest_path=None, headers=None, progress_callback=None):
+        """Download url and return the final file path
+
+        Bytes go to '<file>.part' first; an existing .part file is resumed with a
+        Range request and renamed once the full size has arrived.
+        """
+        response = self.request(url, headers)
+        try:
+            if response.status >= 400:
+                raise HttpStatusError(response.status, url)
+
+            if dest_path is None:
+                dest_path = os.path.join(download_directory, filename_from_response(response, url))
+            part_path = dest_path + PART_SUFFIX
+            os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+            accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+            if existing and accepts_ranges:
+                # Drop this stream and ask for the missing bytes only
+                discard_response(response)
+                response = None
+                print(f"⏯️ Resuming {os.path.basename(dest_path)} from {existing / (1024 * 1024):.1f} MB")
+                return self._download_from(url, headers, dest_path, part_path, existing, progress_callback)
+
+            return self._download_from(url, headers, dest_path, part_path, 0, progress_callback, response=response)
+        except Exception:
+            if response is not None:
+                discard_response(response)
+            raise
+
+    def _download_from(self, url, headers, dest_path, part_path, offset, progress_callback, response=None):
+        """Write the body to part_path from offset on, retrying with resume on connection errors"""
+        total = None
+        progress = None
+        attempt = 0
+
+        while True:
+            try:
+                if response is None:
+                    response = self.request(url, headers, start=offset)
+
+                if response.status == 416 and offset:
+                    # Requested range starts at the end: the .part file is already complete
+                    content_range = parse_content_range(response.headers.get('Content-Range'))
+                    if content_range is None or content_range[2] in (None, offset):
+                        total = offset
+                        break
+                    offset = 0
+                    continue
+                if response.status >= 400:
+                    raise HttpStatusError(response.status, url)
+
+                if response.status == 206:
+                    content_range = parse_content_range(response.headers.get('Content-Range'))
+                    if not content_range or content_range[0] != offset:
+                        raise DownloadError("Server returned an unexpected byte range")
+                    total = content_range[2]
+                    mode = 'ab'
+                else:
+                    # Full body: start over even if a partial file exists
+                    offset = 0
+                    length = response.headers.get('Content-Length')
+                    total = int(length) if length and length.isdigit() else None
+                    mode = 'wb'
+
+                if progress is None:
+                    progress = ProgressReporter(progress_callback, total, offset, self.progress_interval)
+                else:
+                    progress.total = total
+                    progress.downloaded = offset
+
+                with open(part_path, mode) as f:
+                    for chunk in response.stream(self.chunk_size, decode_content=False):
+                        f.write(chunk)
+                        offset += len(chunk)
+                        progress.update(len(chunk))
+
+                response.release_conn()
+                response = None
+
+                if total is not None and offset < total:
+                    raise DownloadError(f"Connection closed at {offset} of {total} bytes")
+                break
+
+            except HttpStatusError:
+                raise
+            except (HTTPError, OSError, DownloadError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise DownloadError(f"Giving up on {url} after {attempt} attempts: {e}")
+                wait_time = min(2 ** attempt, 30)
+                print(f"⚠️ Download interrupted ({e}), resuming in {wait_time}s...")
+                time.sleep(wait_time)
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            finally:
+                if response is not None:
+                    discard_response(response)
+                    response = None
+
+        if progress:
+            progress.update(0, force=True)
+
+        final_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if total is not None and final_size != total:
+            raise DownloadError(f"Size mismatch for {dest_path}: expected {total} bytes, got {final_size}")
+
+        os.replace(part_path, dest_path)
+        return dest_path
+
+def write_at(fd, data, offset, lock=None):
+    """Write data at offset without moving a shared file position (pwrite where available)"""
+    if hasattr(os, 'pwrite'):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+        return
+
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+def preallocate(fd, size):
+    """Reserve the full file size up front, cutting off whatever a larger leftover file had beyond it"""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass  # e.g. not supported by the filesystem
+    # fallocate only ever grows a file
+    os.ftruncate(fd, size)
+
+class Segment:
+    """A byte range [start, end] of the file and how much of it has been written"""
+    def __init__(self, start, end, done=0):
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def length(self):
+        return self.end - self.start + 1
+
+    @property
+    def complete(self):
+        return self.done >= self.length
+
+class SegmentedDownloader(HttpDownloader):
+    """Download large files over several connections, one byte range per request
+
+    The file is preallocated as '<file>.part' and every segment is written at
+    its own offset. Progress is kept in a '.segments' sidecar so an interrupted
+    download resumes only the missing ranges. Servers that don't honour Range
+    requests are downloaded with a single stream instead.
+    """
+    def __init__(self, connections=4, min_segment_size=MIN_SEGMENT_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.connections = max(1, connections)
+        self.min_segment_size = min_segment_size
+
+    @property
+    def sequential_writes(self):
+        return self.connections == 1
+
+    def download(self, url, download_directory=None, dest_path=None, headers=None, progress_callback=None):
+        """Download url and return the final file path"""
+        if self.connections == 1:
+            return super().download(url, download_directory, dest_path, headers, progress_callback)
+
+        # Ask for a single byte to learn the size and whether ranges work
+        probe = self.request(url, headers, start=0, end=0)
+        try:
+            if probe.status >= 400:
+                raise HttpStatusError(probe.status, url)
+            content_range = parse_content_range(probe.headers.get('Content-Range'))
+            total = content_range[2] if probe.status == 206 and content_range else None
+            if dest_path is None:
+                dest_path = os.path.join(download_directory, filename_from_response(probe, url))
+        finally:
+            discard_response(probe)
+
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        part_path = dest_path + PART_SUFFIX
+        state_path = part_path + SEGMENTS_SUFFIX
+        single_stream_partial = os.path.exists(part_path) and not os.path.exists(state_path)
+
+        if total is None or total < 2 * self.min_segment_size or single_stream_partial:
+            if total is None:
+                print("ℹ️ Server does not support range requests, using a single stream")
+            return super().download(url, dest_path=dest_path, headers=headers, progress_callback=progress_callback)
+
+        try:
+            return self._download_segments(url, headers, dest_path, part_path, state_path, total, progress_callback)
+        except RangeNotSupported:
+            print("⚠️ Server stopped honouring range requests, falling back to a single stream")
+            for path in (part_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return super().download(url, dest_path=dest_path, headers=headers, progress_callback=progress_callback)
+
+    def plan_segments(self, total):
+        """Split the file into ranges; more ranges than connections so fast connections pick up more work"""
+        segment_size = max(self.min_segment_size, -(-total // (self.connections * 4)))
+        return [Segment(start, min(start + segment_size, total) - 1) for start in range(0, total, segment_size)]
+
+    def load_state(self, state_path, total):
+        """Segments from an earlier run of the same file, or None"""
+        try:
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+            if state.get('total') != total:
+                return None
+            return [Segment(*values) for values in state['segments']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_state(self, state_path, total, segments):
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'total': total, 'segments': [[seg.start, seg.end, seg.done] for seg in segments]}, f)
+        os.replace(tmp_path, state_path)
+
+    def _download_segments(self, url, headers, dest_path, part_path, state_path, total, progress_callback):
+        segments = None
+        if os.path.exists(part_path) and os.path.getsize(part_path) == total:
+            segments = self.load_state(state_path, total)
+
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            if segments is None:
+                segments = self.plan_segments(total)
+                preallocate(fd, total)
+            else:
+                done = sum(seg.done for seg in segments)
+                print(f"⏯️ Resuming {os.path.basename(dest_path)} from {done / (1024 * 1024):.1f} MB")
+
+            pending = [seg for seg in segments if not seg.complete]
+            print(f"🧩 Downloading {os.path.basename(dest_path)} ({total / (1024 * 1024):.1f} MB) "
+                  f"in {len(pending)} segments over {min(self.connections, len(pending) or 1)} connections")
+
+            progress = ProgressReporter(progress_callback, total, sum(seg.done for seg in segments), self.progress_interval)
+            state_lock = threading.Lock()
+            write_lock = threading.Lock()
+            abort = threading.Event()
+            last_save = [time.monotonic()]
+
+            def checkpoint(force=False):
+                with state_lock:
+                    if force or time.monotonic() - last_save[0] >= 2:
+                        self.save_state(state_path, total, segments)
+                        last_save[0] = time.monotonic()
+
+            def fetch(segment):
+                self._fetch_segment(url, headers, fd, segment, progress, write_lock, abort, checkpoint)
+
+            self.save_state(state_path, total, segments)
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                futures = [executor.submit(fetch, seg) for seg in pending]
+                errors = []
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        abort.set()
+                        errors.append(e)
+
+            checkpoint(force=True)
+            if errors:
+                # A rejected range wins so the caller can fall back to a single stream
+                for error in errors:
+                    if isinstance(error, RangeNotSupported):
+                        raise error
+                raise errors[0]
+
+            progress.update(0, force=True)
+
+            incomplete = [seg for seg in segments if not seg.complete]
+            if incomplete or os.fstat(fd).st_size != total:
+                raise DownloadError(f"Size mismatch for {dest_path}: {len(incomplete)} segments incomplete")
+        finally:
+            os.close(fd)
+
+        os.replace(part_path, dest_path)
+        os.remove(state_path)
+        return dest_path
+
+    def _fetch_segment(self, url, headers, fd, segment, progress, write_lock, abort, checkpoint):
+        """Download one byte range, retrying from where it stopped"""
+        attempt = 0
+        while not segment.complete:
+            if abort.is_set():
+                return
+
+            response = None
+            try:
+                offset = segment.start + segment.done
+                response = self.request(url, headers, start=offset, end=segment.end)
+                if response.status == 200:
+                    raise RangeNotSupported("Server ignored the Range header")
+                if response.status >= 400:
+                    raise HttpStatusError(response.status, url)
+
+                content_range = parse_content_range(response.headers.get('Content-Range'))
+                if not content_range or content_range[0] != offset:
+                    raise RangeNotSupported("Server returned an unexpected byte range")
+
+                for chunk in response.stream(self.chunk_size, decode_content=False):
+                    if abort.is_set():
+                        return
+                    # Never write past the end of this segment
+                    chunk = chunk[:segment.length - segment.done]
+                    write_at(fd, chunk, segment.start + segment.done, write_lock)
+                    segment.done += len(chunk)
+                    progress.update(len(chunk))
+                    checkpoint()
+                    if segment.complete:
+                        break
+
+                if not segment.complete:
+                    raise DownloadError(f"Connection closed {segment.length - segment.done} bytes early")
+
+            except (RangeNotSupported, HttpStatusError):
+                raise
+            except (HTTPError, OSError, DownloadError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise DownloadError(f"Segment {segment.start}-{segment.end} failed after {attempt} attempts: {e}")
+                time.sleep(min(2 ** attempt, 30))
+            finally:
+                if response is not None:
+                    discard_response(response)
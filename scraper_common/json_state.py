@@ -0,0 +1,23 @@
+import os
+import json
+import tempfile
+
+def save_json(path, data):
+    """Write data to path as JSON, atomically
+
+    The temp file is this process's own (mkstemp, next to path), so
+    processes saving the same file never write into each other's temp file;
+    the last rename wins.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
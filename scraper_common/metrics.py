@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import time
+import atexit
+import functools
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the span duration histogram buckets
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800, 3600)
+PROMETHEUS_WRITE_INTERVAL = 5  # Seconds between rewrites of the Prometheus textfile
+
+def metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+def label_key(labels):
+    """Hashable, sortable form of a label dict"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = (
+        '{}="{}"'.format(metric_name(key), str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(pairs) + '}'
+
+class Span:
+    """A timed phase; fields set on it go to the JSON Lines record only"""
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.fields = {}
+        self.ok = True
+        self.started = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def fail(self, error=None):
+        self.ok = False
+        if error is not None:
+            self.fields['error'] = str(error)
+
+class Metrics:
+    """Timing spans and counters, written as JSON Lines and in Prometheus text format
+
+    Labels are meant for low-cardinality values (phase, site, format) since
+    they become Prometheus series; per-link details belong in span fields.
+    Every record is one JSON line in jsonl_path. The aggregates are written to
+    prometheus_path (for node_exporter's textfile collector) and/or served on
+    http://<host>:<port>/metrics.
+    """
+    def __init__(self, jsonl_path=None, prometheus_path=None, port=None, host='127.0.0.1'):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.lock = threading.Lock()
+        self.jsonl = open(jsonl_path, 'a', encoding='utf-8') if jsonl_path else None
+        self.histograms = {}  # (span, labels) -> [bucket counts..., count, sum]
+        self.counters = {}  # (name, labels) -> value
+        self.summaries = {}  # (name, labels) -> [count, sum, last]
+        self.last_write = 0
+        self.server = None
+        if port is not None:
+            self.serve(port, host)
+
+    def emit(self, record):
+        if self.jsonl is None:
+            return
+        line = json.dumps(record, default=str) + '\n'
+        with self.lock:
+            self.jsonl.write(line)
+            self.jsonl.flush()
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block as one phase; exceptions mark it failed and propagate"""
+        span = Span(name, labels)
+        started_at = time.time()
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            self.record_span(span, started_at, span.elapsed())
+
+    def record_span(self, span, started_at, duration):
+        key = (span.name, label_key(span.labels) + (('ok', str(span.ok).lower()),))
+        with self.lock:
+            histogram = self.histograms.setdefault(key, [0] * len(DURATION_BUCKETS) + [0, 0.0])
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += duration
+        self.emit({
+            'type': 'span',
+            'name': span.name,
+            'start': started_at,
+            'duration': round(duration, 4),
+            'ok': span.ok,
+            **span.labels,
+            **span.fields
+        })
+        self.maybe_write_prometheus()
+
+    def count(self, name, value=1, **labels):
+        """Add to a counter"""
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.emit({'type': 'count', 'name': name, 'value': value, 'time': time.time(), **labels})
+        self.maybe_write_prometheus()
+
+    def observe(self, name, value, **labels):
+        """Record a measurement (e.g. a download rate); exported as count, sum and last value"""
+        key = (name, label_key(labels))
+        with self.lock:
+            summary = self.summaries.setdefault(key, [0, 0.0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = value
+        self.emit({'type': 'observation', 'name': name, 'value': value, 'time': time.time(), **labels})
+        self.maybe_write_prometheus()
+
+    def prometheus_text(self):
+        """All aggregates in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            histograms = {key: list(value) for key, value in self.histograms.items()}
+            counters = dict(self.counters)
+            summaries = {key: list(value) for key, value in self.summaries.items()}
+
+        if histograms:
+            lines.append('# HELP scraper_span_duration_seconds Time spent per scraper phase')
+            lines.append('# TYPE scraper_span_duration_seconds histogram')
+            for (span, labels), histogram in sorted(histograms.items()):
+                labels = (('span', span),) + labels
+                for index, bound in enumerate(DURATION_BUCKETS):
+                    bucket_labels = format_labels(labels + (('le', bound),))
+                    lines.append(f'scraper_span_duration_seconds_bucket{bucket_labels} {histogram[index]}')
+                lines.append(f'scraper_span_duration_seconds_bucket{format_labels(labels + (("le", "+Inf"),))} {histogram[-2]}')
+                lines.append(f'scraper_span_duration_seconds_count{format_labels(labels)} {histogram[-2]}')
+                lines.append(f'scraper_span_duration_seconds_sum{format_labels(labels)} {histogram[-1]:.6f}')
+
+        for name in sorted({name for name, _ in counters}):
+            full_name = f'scraper_{metric_name(name)}_total'
+            lines.append(f'# TYPE {full_name} counter')
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'{full_name}{format_labels(labels)} {value}')
+
+        for name in sorted({name for name, _ in summaries}):
+            full_name = f'scraper_{metric_name(name)}'
+            lines.append(f'# TYPE {full_name} summary')
+            for (summary, labels), (count, total, last) in sorted(summaries.items()):
+                if summary == name:
+                    lines.append(f'{full_name}_count{format_labels(labels)} {count}')
+                    lines.append(f'{full_name}_sum{format_labels(labels)} {total:.6f}')
+            lines.append(f'# TYPE {full_name}_last gauge')
+            for (summary, labels), (count, total, last) in sorted(summaries.items()):
+                if summary == name:
+                    lines.append(f'{full_name}_last{format_labels(labels)} {last:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+    def maybe_write_prometheus(self):
+        if not self.prometheus_path:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_write < PROMETHEUS_WRITE_INTERVAL:
+                return
+            self.last_write = now
+        self.write_prometheus()
+
+    def write_prometheus(self):
+        if not self.prometheus_path:
+            return
+        tmp_path = self.prometheus_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.prometheus_path)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not write metrics: {e}")
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve the Prometheus text on http://host:port/metrics from a background thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{self.server.server_port}/metrics")
+
+    def close(self):
+        self.write_prometheus()
+        if self.server:
+            self.server.shutdown()
+            self.server = None
+        with self.lock:
+            if self.jsonl:
+                self.jsonl.close()
+                self.jsonl = None
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Metrics shared by everything in this process
+
+    Every export is opt-in: SCRAPER_METRICS_FILE sets a JSON Lines file,
+    SCRAPER_PROMETHEUS_FILE a Prometheus textfile and SCRAPER_METRICS_PORT a
+    port to serve /metrics on.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            port = os.getenv("SCRAPER_METRICS_PORT")
+            _metrics = Metrics(
+                jsonl_path=os.getenv("SCRAPER_METRICS_FILE") or None,
+                prometheus_path=os.getenv("SCRAPER_PROMETHEUS_FILE") or None,
+                port=int(port) if port else None
+            )
+            atexit.register(_metrics.close)
+        return _metrics
+
+def span(name, **labels):
+    """Shortcut for get_metrics().span(...)"""
+    return get_metrics().span(name, **labels)
+
+def timed(name, **labels):
+    """Decorator running the function inside a span; a False result marks the span failed"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels) as current:
+                result = function(*args, **kwargs)
+                if result is False:
+                    current.fail()
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,22 @@
+import time
+import threading
+
+class RateLimiter:
+    """Spaces out work shared by several threads: one start at most every interval seconds
+
+    Replaces fixed sleeps between jobs: with several workers the waits
+    overlap with the other workers' downloads instead of adding up.
+    """
+    def __init__(self, interval):
+        self.interval = max(0.0, interval)
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until this thread may start its next job"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import atexit
+import threading
+from urllib.parse import urlparse
+from scraper_common.waits import site_key
+from scraper_common.json_state import save_json
+
+HALF_LIFE = 7 * 24 * 3600  # Seconds after which a hit or miss counts half
+MAX_AGE = 30 * 24 * 3600  # Entries not touched for this long are dropped
+MIN_HITS = 3  # Recent hits a selector needs before it is moved ahead of the declared order
+SAVE_INTERVAL = 30  # Seconds between writes of the cache file; close() writes the rest
+
+def page_variant(url):
+    """Rough page layout of a URL: the first path segment (e.g. 'dl' for transfernow.net/dl/...)"""
+    segments = [segment for segment in urlparse(url).path.split('/') if segment]
+    return segments[0] if segments else ''
+
+class SelectorCache:
+    """Remembers which selector matched on each site and tries the best ones first
+
+    Entries are keyed by host, page variant and lookup name (e.g.
+    'download_button'). Every lookup adds a hit for the selector that
+    matched and a miss for the ones tried before it. Both decay over time,
+    so a selector that stops working is overtaken by the new one. Selectors
+    are listed most specific first, so one only moves ahead of that order
+    once it has min_hits recent hits; a generic fallback that matched once
+    stays where it was declared. The file is written at most every
+    save_interval seconds and on close().
+    """
+    def __init__(self, path='selector_cache.json', half_life=HALF_LIFE, max_age=MAX_AGE, min_hits=MIN_HITS,
+                 save_interval=SAVE_INTERVAL):
+        self.path = path
+        self.half_life = half_life
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.entries = self.load()
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # Drop stale entries
+        cutoff = time.time() - self.max_age
+        for key in list(entries):
+            selectors = {
+                selector: stats for selector, stats in entries[key].items()
+                if stats.get('updated', 0) >= cutoff
+            }
+            if selectors:
+                entries[key] = selectors
+            else:
+                del entries[key]
+        return entries
+
+    def save(self):
+        """Write the cache file; called with the lock held"""
+        try:
+            save_json(self.path, self.entries)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not save selector cache: {e}")
+            return
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def close(self):
+        """Write changes that haven't been saved yet"""
+        with self.lock:
+            if self.dirty:
+                self.save()
+
+    def key(self, url, name):
+        return f"{site_key(url)}|{page_variant(url)}|{name}"
+
+    def decayed(self, stats, now):
+        """(hits, misses) weighted by how recent they are"""
+        weight = 0.5 ** (max(0, now - stats.get('updated', now)) / self.half_life)
+        return stats.get('hits', 0) * weight, stats.get('misses', 0) * weight
+
+    def score(self, stats, now):
+        """Recent hit rate, 0 (no preference) below min_hits recent hits"""
+        hits, misses = self.decayed(stats, now)
+        if round(hits, 3) < self.min_hits:
+            return 0
+        return hits / (hits + misses + 1)
+
+    def order(self, url, name, selectors):
+        """Selectors sorted by recent hit rate; ties, and selectors without enough hits, keep the declared order"""
+        now = time.time()
+        with self.lock:
+            known = self.entries.get(self.key(url, name), {})
+            scores = {selector: self.score(known[selector], now) for selector in selectors if selector in known}
+        return sorted(selectors, key=lambda selector: -scores.get(selector, 0))
+
+    def record(self, url, name, tried, winner, seconds):
+        """Count a hit for winner and a miss for every selector tried before it"""
+        now = time.time()
+        with self.lock:
+            known = self.entries.setdefault(self.key(url, name), {})
+            for selector in tried:
+                stats = known.get(selector, {})
+                hits, misses = self.decayed(stats, now)
+                if selector == winner:
+                    hits += 1
+                    stats['seconds'] = round(seconds, 3)
+                else:
+                    misses += 1
+                stats.update(hits=round(hits, 4), misses=round(misses, 4), updated=now)
+                known[selector] = stats
+                if selector == winner:
+                    break
+            self.dirty = True
+            if time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+
+_selector_cache = None
+_selector_cache_lock = threading.Lock()
+
+def get_selector_cache():
+    """Process-wide SelectorCache (SCRAPER_SELECTOR_CACHE sets the file path)"""
+    global _selector_cache
+    with _selector_cache_lock:
+        if _selector_cache is None:
+            _selector_cache = SelectorCache(os.getenv("SCRAPER_SELECTOR_CACHE", "selector_cache.json"))
+            atexit.register(_selector_cache.close)
+        return _selector_cache
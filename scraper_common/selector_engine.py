@@ -0,0 +1,111 @@
+import time
+from selenium.common.exceptions import WebDriverException
+from scraper_common.selector_cache import get_selector_cache
+from scraper_common.waits import site_key
+from scraper_common.metrics import span
+
+POLL_INTERVAL = 0.2  # Seconds between probes
+
+# Checks every candidate in page order of priority and returns [index, element]
+# for the first match. XPath candidates start with '/' or '(', anything else is CSS.
+_PROBE_SCRIPT = """
+var selectors = arguments[0], clickable = arguments[1], excludeText = arguments[2];
+
+function usable(el) {
+    if (clickable) {
+        var rect = el.getBoundingClientRect();
+        var style = window.getComputedStyle(el);
+        if (rect.width === 0 || rect.height === 0) return false;
+        if (style.visibility === 'hidden' || style.display === 'none') return false;
+        if (el.disabled) return false;
+    }
+    if (excludeText.length) {
+        var text = (el.innerText || el.textContent || '').toLowerCase();
+        for (var t = 0; t < excludeText.length; t++) {
+            if (text.indexOf(excludeText[t]) !== -1) return false;
+        }
+    }
+    return true;
+}
+
+for (var i = 0; i < selectors.length; i++) {
+    var selector = selectors[i], nodes = [];
+    try {
+        if (selector.charAt(0) === '/' || selector.charAt(0) === '(') {
+            var result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < result.snapshotLength; j++) nodes.push(result.snapshotItem(j));
+        } else {
+            nodes = document.querySelectorAll(selector);
+        }
+    } catch (e) {
+        continue;  // Invalid selector for this page, try the next one
+    }
+    for (var k = 0; k < nodes.length; k++) {
+        if (usable(nodes[k])) return [i, nodes[k]];
+    }
+}
+return null;
+"""
+
+def is_xpath(selector):
+    return selector.startswith(('/', '('))
+
+def probe(driver, selectors, clickable=False, exclude_text=()):
+    """Check all selectors in a single round trip
+
+    Returns (element, selector) for the first selector (in list order) that
+    matches, or (None, None).
+    """
+    try:
+        result = driver.execute_script(
+            _PROBE_SCRIPT,
+            list(selectors),
+            clickable,
+            [text.lower() for text in exclude_text]
+        )
+    except WebDriverException:
+        return None, None
+
+    if not result:
+        return None, None
+    index, element = result
+    return element, selectors[index]
+
+def find_first(driver, selectors, timeout=10, clickable=False, exclude_text=(), stop=None, interval=POLL_INTERVAL):
+    """Wait up to timeout seconds (in total, not per selector) for any of the selectors to match
+
+    clickable only accepts visible, enabled elements; exclude_text skips
+    elements whose text contains any of the given strings. stop is an
+    optional callable; the wait ends early once it returns True.
+    Returns (element, selector) or (None, None).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        element, selector = probe(driver, selectors, clickable, exclude_text)
+        if element is not None:
+            return element, selector
+        if stop and stop():
+            return None, None
+        if time.monotonic() >= deadline:
+            return None, None
+        time.sleep(interval)
+
+def find_cached(driver, name, selectors, timeout=10, cache=None, **kwargs):
+    """find_first() with the selectors ordered by what worked on this site before
+
+    name identifies the lookup (e.g. 'download_button'); the winning
+    selector and the time it took are recorded in the selector cache.
+    """
+    cache = cache or get_selector_cache()
+    url = driver.current_url
+    ordered = cache.order(url, name, selectors)
+
+    with span('selector', lookup=name, site=site_key(url)) as current:
+        started = time.monotonic()
+        element, selector = find_first(driver, ordered, timeout, **kwargs)
+        if element is not None:
+            cache.record(url, name, ordered, selector, time.monotonic() - started)
+            current.set(selector=selector, rank=ordered.index(selector))
+        else:
+            current.fail('not found')
+    return element, selector
@@ -0,0 +1,155 @@
+import io
+import re
+import csv
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, parse_qs, quote
+from scraper_common.http_download import get_pool_manager, discard_response, HttpStatusError
+
+SHEETS_BASE = "https://docs.google.com/spreadsheets/d/"
+EXPORT_FORMATS = ('csv', 'html')
+CHUNK_SIZE = 64 * 1024
+
+def spreadsheet_id_from_url(sheet_url):
+    """The spreadsheet id in a Google Sheets URL, or None"""
+    match = re.search(r'/spreadsheets/d/([\w-]+)', sheet_url)
+    return match.group(1) if match else None
+
+def gid_from_url(sheet_url):
+    """The sheet (tab) id in a Google Sheets URL's query or fragment, or None"""
+    match = re.search(r'[#?&]gid=(\d+)', sheet_url)
+    return match.group(1) if match else None
+
+def export_url(spreadsheet_id, export_format='csv', sheet_name=None, gid=None):
+    """URL of one sheet's export
+
+    CSV uses the plain export when the gid is known and otherwise picks the
+    sheet by name through the visualization endpoint. HTML is the sheet's
+    published view, which keeps the cells' hyperlinks; it can only pick the
+    sheet by gid, so ValueError is raised without one.
+    """
+    if export_format == 'csv':
+        if sheet_name and gid is None:
+            return f"{SHEETS_BASE}{spreadsheet_id}/gviz/tq?tqx=out:csv&sheet={quote(sheet_name)}"
+        return f"{SHEETS_BASE}{spreadsheet_id}/export?format=csv&gid={gid or 0}"
+    if export_format == 'html':
+        if gid is None:
+            raise ValueError("The HTML export needs the sheet's gid (#gid=... in the URL); it can't select a sheet by name")
+        return f"{SHEETS_BASE}{spreadsheet_id}/htmlview/sheet?headers=false&gid={gid}"
+    raise ValueError(f"Unknown export format: {export_format}")
+
+def unwrap_redirect(href):
+    """The target of a Google redirect link (https://www.google.com/url?q=...), other links as they are"""
+    parts = urlsplit(href)
+    if parts.hostname in ('www.google.com', 'google.com') and parts.path == '/url':
+        target = parse_qs(parts.query).get('q')
+        if target:
+            return target[0]
+    return href
+
+class SheetTableParser(HTMLParser):
+    """Collects the rows of the published sheet's table as they stream in
+
+    Each finished row goes to on_row(row_number, cells, links), where cells
+    are the cell texts by column and links maps a column to the hrefs in it.
+    The row number comes from the row header when there is one.
+    """
+    def __init__(self, on_row):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self.rows_seen = 0
+        self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'tr':
+            self.row = {'header': None, 'cells': [], 'links': {}, 'cell': None}
+        elif self.row is None:
+            return
+        elif tag == 'th':
+            self.row['cell'] = 'header'
+            self.row['header'] = ''
+        elif tag == 'td':
+            # Merged cells take up as many columns as they span
+            for _ in range(max(1, int(attrs.get('colspan') or 1)) - 1):
+                self.row['cells'].append('')
+            self.row['cells'].append('')
+            self.row['cell'] = len(self.row['cells']) - 1
+        elif tag == 'a' and isinstance(self.row['cell'], int) and attrs.get('href'):
+            self.row['links'].setdefault(self.row['cell'], []).append(unwrap_redirect(attrs['href']))
+        elif tag == 'br' and isinstance(self.row['cell'], int):
+            self.row['cells'][self.row['cell']] += '\n'
+
+    def handle_endtag(self, tag):
+        if self.row is None:
+            return
+        if tag in ('td', 'th'):
+            self.row['cell'] = None
+        elif tag == 'tr':
+            row, self.row = self.row, None
+            if not row['cells']:
+                return  # Column header row
+            self.rows_seen += 1
+            header = (row['header'] or '').strip()
+            self.on_row(int(header) if header.isdigit() else self.rows_seen, row['cells'], row['links'])
+
+    def handle_data(self, data):
+        if self.row is None or self.row['cell'] is None:
+            return
+        if self.row['cell'] == 'header':
+            self.row['header'] += data
+        else:
+            self.row['cells'][self.row['cell']] += data
+
+def open_export(url, pool_manager=None):
+    """Streaming GET of an export; raises HttpStatusError when it isn't available"""
+    response = (pool_manager or get_pool_manager()).request('GET', url, preload_content=False, redirect=True)
+    final_url = response.geturl() or url
+    if response.status >= 400 or 'accounts.google.com' in final_url:
+        discard_response(response)
+        # A sign-in page means the sheet isn't shared with "anyone with the link"
+        raise HttpStatusError(response.status if response.status >= 400 else 401, url)
+    return response
+
+def iter_csv_rows(response):
+    """Yield (row_number, cells, {}) from a CSV export, decoding it as it arrives"""
+    response.auto_close = False  # TextIOWrapper reads until EOF itself
+    text = io.TextIOWrapper(response, encoding='utf-8', newline='')
+    try:
+        for row_number, cells in enumerate(csv.reader(text), 1):
+            yield row_number, cells, {}
+    finally:
+        discard_response(response)
+
+def iter_html_rows(response):
+    """Yield (row_number, cells, links) from the HTML export, parsing it in chunks"""
+    rows = []
+    parser = SheetTableParser(lambda *row: rows.append(row))
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')  # Characters can straddle chunks
+    try:
+        for chunk in response.stream(CHUNK_SIZE):
+            parser.feed(decoder.decode(chunk))
+            yield from rows
+            rows.clear()
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        yield from rows
+    finally:
+        discard_response(response)
+
+def iter_export_rows(sheet_url, export_format='csv', sheet_name=None, pool_manager=None):
+    """Yield (row_number, cells, links) for a sheet read from its export in one request
+
+    links maps a column index to the hyperlinks in that cell (HTML export
+    only; CSV carries the cell text). Row numbers are the sheet's, starting
+    at 1 with the header row.
+    """
+    spreadsheet_id = spreadsheet_id_from_url(sheet_url)
+    if not spreadsheet_id:
+        raise ValueError(f"Not a Google Sheets URL: {sheet_url}")
+
+    url = export_url(spreadsheet_id, export_format, sheet_name, gid_from_url(sheet_url))
+    response = open_export(url, pool_manager)
+    if export_format == 'csv':
+        return iter_csv_rows(response)
+    return iter_html_rows(response)
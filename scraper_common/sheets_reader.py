@@ -0,0 +1,86 @@
+from scraper_common.metrics import span
+
+ROW_WINDOW = 2000  # Rows per requested range
+WINDOWS_PER_REQUEST = 5  # Ranges fetched together in one batchGet call
+
+def column_letter(index):
+    """Spreadsheet column letter for a 0-based column index (0 -> A, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+def read_header_row(service, spreadsheet_id, sheet_name):
+    """The first row of a sheet as a list of strings"""
+    with span('sheets_read', request='header'):
+        result = service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f'{sheet_name}!1:1'
+        ).execute()
+    values = result.get('values', [])
+    return values[0] if values else []
+
+def sheet_row_count(service, spreadsheet_id, sheet_name):
+    """Number of rows in a sheet's grid, None if it can't be read"""
+    try:
+        with span('sheets_read', request='properties'):
+            result = service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets.properties(title,gridProperties.rowCount)'
+            ).execute()
+    except Exception as e:
+        print(f"⚠️ Warning: Could not read the size of sheet {sheet_name}: {e}")
+        return None
+
+    for sheet in result.get('sheets', []):
+        properties = sheet.get('properties', {})
+        if properties.get('title') == sheet_name:
+            return properties.get('gridProperties', {}).get('rowCount')
+    return None
+
+def iter_column(service, spreadsheet_id, sheet_name, column_index, start_row=2,
+                window_rows=ROW_WINDOW, windows_per_request=WINDOWS_PER_REQUEST):
+    """Yield (row_number, cell_value) for one column, reading it in row windows
+
+    Each batchGet call fetches windows_per_request consecutive windows of
+    window_rows rows, so only one batch is held in memory at a time. Reading
+    goes on to the sheet's last row (gridProperties.rowCount), so long runs
+    of blank rows don't end it early; if the size can't be read, the rest of
+    the column is fetched as one open-ended range. Empty cells inside the
+    data are yielded as ''.
+    """
+    letter = column_letter(column_index)
+    values_api = service.spreadsheets().values()
+    row_count = sheet_row_count(service, spreadsheet_id, sheet_name)
+    row = start_row
+
+    while row_count is None or row <= row_count:
+        if row_count is None:
+            ranges = [f'{sheet_name}!{letter}{row}:{letter}']
+        else:
+            # Ranges starting past the grid are rejected by the API
+            ranges = []
+            for window in range(windows_per_request):
+                first = row + window * window_rows
+                if first > row_count:
+                    break
+                ranges.append(f'{sheet_name}!{letter}{first}:{letter}{min(first + window_rows - 1, row_count)}')
+
+        with span('sheets_read', request='batchGet') as current:
+            current.set(first_row=row, rows=windows_per_request * window_rows)
+            result = values_api.batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=ranges,
+                majorDimension='ROWS'
+            ).execute()
+
+        for window, value_range in enumerate(result.get('valueRanges', [])):
+            first = row + window * window_rows
+            for offset, cells in enumerate(value_range.get('values', [])):
+                yield first + offset, cells[0] if cells else ''
+
+        if row_count is None:
+            return
+        row += windows_per_request * window_rows
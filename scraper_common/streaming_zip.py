@@ -0,0 +1,315 @@
+import os
+import time
+import zlib
+import struct
+import zipfile
+import threading
+from scraper_common.archive_backends import CHUNK_SIZE, member_path, write_member
+from scraper_common.archive_extract import record_extraction
+from scraper_common.download_watcher import TEMP_SUFFIXES
+
+# Zip record signatures
+LOCAL_HEADER_SIG = b'PK\x03\x04'
+CENTRAL_HEADER_SIG = b'PK\x01\x02'
+END_OF_CENTRAL_DIR_SIG = b'PK\x05\x06'
+ZIP64_END_SIG = b'PK\x06\x06'
+DATA_DESCRIPTOR_SIG = b'PK\x07\x08'
+
+LOCAL_HEADER = struct.Struct('<HHHHHIIIHH')  # After the signature
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+
+FLAG_ENCRYPTED = 0x0001
+FLAG_DATA_DESCRIPTOR = 0x0008  # Sizes and CRC follow the data instead of preceding it
+FLAG_UTF8 = 0x0800
+
+STORED = 0
+DEFLATED = 8
+
+class StreamingUnsupported(Exception):
+    """The archive can't be read front to back; extract it once the download is done"""
+
+class StreamingAborted(Exception):
+    pass
+
+class GrowingFile:
+    """Reads a file that is still being written, waiting for bytes that haven't arrived yet
+
+    finished() tells when the writer is done (the temp file was renamed or
+    removed); from then on reaching the end of the data means the end of
+    the file. The open descriptor keeps working across the rename.
+    """
+    def __init__(self, path, finished, stop=None, poll_interval=0.1):
+        self.file = open(path, 'rb', buffering=0)
+        self.finished = finished
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.pushback = b''
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+    def read(self, size):
+        """Up to size bytes; b'' only once the file is complete"""
+        if self.pushback:
+            data, self.pushback = self.pushback[:size], self.pushback[size:]
+            return data
+        while True:
+            data = self.file.read(size)
+            if data:
+                return data
+            if self.finished():
+                # Whatever was written just before the writer finished
+                return self.file.read(size)
+            if self.stop is not None and self.stop.is_set():
+                raise StreamingAborted()
+            time.sleep(self.poll_interval)
+
+    def read_exact(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.read(size - len(data))
+            if not chunk:
+                raise EOFError("Zip file ended early")
+            data += chunk
+        return data
+
+    def unread(self, data):
+        """Put back bytes read past the end of a member"""
+        self.pushback = data + self.pushback
+
+class MemberReader:
+    """File-like view of one member's data, decompressed as it is read
+
+    The CRC and size of what was read are tracked so they can be checked
+    against the zip's own records afterwards.
+    """
+    def __init__(self, source, method, compressed_size=None, chunk_size=CHUNK_SIZE):
+        self.source = source
+        self.method = method
+        self.remaining = compressed_size  # None when the size only follows the data
+        self.chunk_size = chunk_size
+        self.decompressor = zlib.decompressobj(-15) if method == DEFLATED else None
+        self.crc = 0
+        self.size = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.chunk_size
+        while True:
+            data = self._read_raw(size)
+            if data is None:
+                continue
+            self.crc = zlib.crc32(data, self.crc)
+            self.size += len(data)
+            return data
+
+    def _read_raw(self, size):
+        """Next piece of uncompressed data, b'' at the end, None if more input is needed first"""
+        if self.method == STORED:
+            if not self.remaining:
+                return b''
+            data = self.source.read(min(size, self.remaining))
+            if not data:
+                raise EOFError("Zip file ended inside a member")
+            self.remaining -= len(data)
+            return data
+
+        if self.decompressor.eof:
+            return b''
+        compressed = self.decompressor.unconsumed_tail
+        if not compressed:
+            want = self.chunk_size if self.remaining is None else min(self.chunk_size, self.remaining)
+            if want <= 0:
+                raise zipfile.BadZipFile("Deflate stream longer than the member")
+            compressed = self.source.read(want)
+            if not compressed:
+                raise EOFError("Zip file ended inside a member")
+            if self.remaining is not None:
+                self.remaining -= len(compressed)
+
+        data = self.decompressor.decompress(compressed, size)
+        if self.decompressor.eof and self.decompressor.unused_data:
+            # Read past the member into whatever follows it
+            self.source.unread(self.decompressor.unused_data)
+            if self.remaining is not None:
+                self.remaining += len(self.decompressor.unused_data)
+        return data if data or self.decompressor.eof else None
+
+def zip64_sizes(extra, compressed_size, file_size):
+    """Real sizes from the zip64 extra field, where the header holds 0xFFFFFFFF"""
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, length = struct.unpack_from('<HH', extra, offset)
+        if header_id == ZIP64_EXTRA_ID:
+            values = extra[offset + 4:offset + 4 + length]
+            position = 0
+            if file_size == ZIP64_LIMIT and position + 8 <= len(values):
+                file_size = struct.unpack_from('<Q', values, position)[0]
+                position += 8
+            if compressed_size == ZIP64_LIMIT and position + 8 <= len(values):
+                compressed_size = struct.unpack_from('<Q', values, position)[0]
+            return compressed_size, file_size, True
+        offset += 4 + length
+    return compressed_size, file_size, False
+
+def stream_extract(source, extract_folder, chunk_size=CHUNK_SIZE):
+    """Extract members from their local headers as the bytes come in
+
+    Returns {name: (crc, size)} of the extracted files. Raises
+    StreamingUnsupported for archives whose members can't be delimited
+    without the central directory (encrypted, unusual compression, stored
+    data with trailing sizes).
+    """
+    extracted = {}
+    while True:
+        signature = source.read_exact(4)
+        if signature in (CENTRAL_HEADER_SIG, END_OF_CENTRAL_DIR_SIG, ZIP64_END_SIG):
+            return extracted
+        if signature != LOCAL_HEADER_SIG:
+            raise zipfile.BadZipFile(f"Unexpected record {signature!r} in zip stream")
+
+        (_, flags, method, _, _, crc, compressed_size, file_size,
+         name_length, extra_length) = LOCAL_HEADER.unpack(source.read_exact(LOCAL_HEADER.size))
+        raw_name = source.read_exact(name_length)
+        extra = source.read_exact(extra_length)
+        name = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+        compressed_size, file_size, zip64 = zip64_sizes(extra, compressed_size, file_size)
+
+        if flags & FLAG_ENCRYPTED:
+            raise StreamingUnsupported(f"{name} is encrypted")
+        if method not in (STORED, DEFLATED):
+            raise StreamingUnsupported(f"{name} uses compression method {method}")
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if has_descriptor and method == STORED:
+            raise StreamingUnsupported(f"{name} is stored without a size")
+
+        reader = MemberReader(source, method, None if has_descriptor else compressed_size, chunk_size)
+        if name.endswith('/'):
+            # Directories have no data, but drain it anyway in case they do
+            while reader.read(chunk_size):
+                pass
+            os.makedirs(member_path(extract_folder, name), exist_ok=True)
+        else:
+            write_member(reader, extract_folder, name, chunk_size)
+
+        if has_descriptor:
+            value = source.read_exact(4)
+            if value == DATA_DESCRIPTOR_SIG:
+                value = source.read_exact(4)
+            crc = struct.unpack('<I', value)[0]
+            source.read_exact(16 if zip64 else 8)  # Sizes, already known from the data itself
+
+        if reader.crc != crc:
+            raise zipfile.BadZipFile(f"Bad CRC for {name}")
+        if not name.endswith('/'):
+            extracted[name] = (reader.crc, reader.size)
+
+def verify_extraction(archive_path, extracted):
+    """True if every file in the central directory was extracted with the same CRC and size"""
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            if extracted.get(info.filename) != (info.CRC, info.file_size):
+                return False
+    return True
+
+class OverlappedExtraction:
+    """Extract a zip on a background thread while it is still downloading
+
+    The thread waits for the download's temp file (found by find_partial),
+    extracts members as their bytes arrive and stops at the central
+    directory. finish() then checks the result against the central
+    directory of the completed file and records it in the extraction
+    manifest, so the regular extraction step skips it. Anything that can't
+    be streamed or verified is left for the regular extraction step.
+    """
+    def __init__(self, download_directory, find_partial, extract_folder=None, poll_interval=0.1):
+        self.download_directory = download_directory
+        self.find_partial = find_partial
+        self.extract_folder = extract_folder or os.path.join(download_directory, "extracted")
+        self.poll_interval = poll_interval
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.inode = None
+        self.extracted = None
+        self.error = None
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        partial = None
+        while partial is None:
+            if self.stop.is_set():
+                return
+            partial = self.find_partial()
+            if partial is None:
+                time.sleep(self.poll_interval)
+
+        try:
+            source = GrowingFile(partial, self.download_finished, self.stop, self.poll_interval)
+        except FileNotFoundError:
+            return
+        try:
+            self.inode = os.fstat(source.fileno()).st_ino
+            if source.read_exact(4) != LOCAL_HEADER_SIG:
+                return  # Not a zip
+            source.unread(LOCAL_HEADER_SIG)
+            os.makedirs(self.extract_folder, exist_ok=True)
+            print(f"📦 Extracting {os.path.basename(partial)} while it downloads...")
+            self.extracted = stream_extract(source, self.extract_folder)
+        except StreamingAborted:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            source.close()
+
+    def current_name(self):
+        """Where the file being extracted is now (browsers rename it while downloading), or None"""
+        for entry in os.scandir(self.download_directory):
+            if entry.is_file() and entry.inode() == self.inode:
+                return entry.path
+        return None
+
+    def download_finished(self):
+        """True once the temp file was renamed to its final name, or removed"""
+        path = self.current_name()
+        return path is None or not path.endswith(TEMP_SUFFIXES)
+
+    def finish(self, timeout=None):
+        """Wait for the extraction to catch up with the finished download; True if it covered the archive"""
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            self.cancel()
+            return False
+        if self.error is not None:
+            print(f"⚠️ Extraction during download stopped ({self.error}), extracting afterwards instead")
+            return False
+        if self.extracted is None or self.inode is None:
+            return False
+
+        archive_path = self.current_name()
+        try:
+            if archive_path is None or archive_path.endswith(TEMP_SUFFIXES) \
+                    or not verify_extraction(archive_path, self.extracted):
+                print("⚠️ Files extracted during download don't match the zip's directory, extracting again")
+                return False
+        except zipfile.BadZipFile as e:
+            print(f"⚠️ Could not verify files extracted during download: {e}")
+            return False
+
+        files = sorted(self.extracted)
+        record_extraction(archive_path, self.extract_folder, files)
+        print(f"✅ Extracted {len(files)} files to {self.extract_folder} during download")
+        return True
+
+    def cancel(self):
+        self.stop.set()
+        self.thread.join(5)
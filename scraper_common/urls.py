@@ -0,0 +1,123 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote, quote
+
+SHARING_LINK_PATH = re.compile(r'^/:[a-z]:/', re.IGNORECASE)  # /:v:/s/team/<token> style sharing links
+SITE_ROOTS = ('sites', 'teams', 'personal')
+SHAREPOINT_HOSTS = ('.sharepoint.com',)  # Host suffixes of SharePoint Online and OneDrive for Business
+
+# A URL runs to whitespace or a delimiter people put between links in a cell
+URL_PATTERN = re.compile(r'https?://[^\s|;,<>"\'`]+', re.IGNORECASE)
+EMBEDDED_URL = re.compile(r'(?=https?://)', re.IGNORECASE)  # Where a second URL is glued onto the first
+TRAILING_PUNCTUATION = '.,:;!?\'")]}>'
+
+TRACKING_PARAMS = ('fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+                   '_hsenc', '_hsmi', 'trk')
+# Matches one analytics parameter (utm_* or a click id) with its leading '&'
+TRACKING_PARAM = re.compile(r'&(?:utm_[^=&]*|' + '|'.join(TRACKING_PARAMS) + r')(?:=[^&]*)?(?=&|$)', re.IGNORECASE)
+HOST_ALIASES = {'we.tl': 'wetransfer.com'}  # WeTransfer's short links
+
+def canonical_host(host):
+    """Lowercased host without 'www.', with short-link domains mapped to their site"""
+    host = (host or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return HOST_ALIASES.get(host, host)
+
+def strip_tracking_query(query):
+    """A query string without analytics parameters; the others are kept byte for byte"""
+    if not query:
+        return query
+    return TRACKING_PARAM.sub('', '&' + query)[1:]
+
+def strip_tracking(url):
+    """url without utm_* and click-id parameters"""
+    if '?' not in url:
+        return url
+    base, _, rest = url.partition('?')
+    query, hash_mark, fragment = rest.partition('#')
+    query = strip_tracking_query(query)
+    return base + ('?' + query if query else '') + hash_mark + fragment
+
+def trim_url(url):
+    """Drop punctuation that ends the sentence around a URL, keeping a ')' the URL opened itself"""
+    while url and url[-1] in TRAILING_PUNCTUATION:
+        if url[-1] == ')' and url.count('(') >= url.count(')'):
+            break
+        url = url[:-1]
+    return url
+
+def extract_urls(text):
+    """Every http(s) URL in free text, trimmed and without tracking parameters
+
+    One pass of a precompiled pattern: URLs end at whitespace and at the
+    delimiters used between links (newline, |, ; and ,). Surrounding text
+    and punctuation are left out, and two URLs written without a gap are
+    split apart.
+    """
+    urls = []
+    for match in URL_PATTERN.findall(text):
+        # Cheap checks first: most matches need no trimming, splitting or query cleanup
+        pieces = EMBEDDED_URL.split(match) if match.find('://', 8) != -1 else (match,)
+        for url in pieces:
+            if url and url[-1] in TRAILING_PUNCTUATION:
+                url = trim_url(url)
+            if len(url) <= url.find('://') + 3:
+                continue  # Nothing after the scheme
+            if '?' in url:
+                url = strip_tracking(url)
+            urls.append(url)
+    return urls
+
+def normalize_url(url):
+    """Canonical form of a link so the same transfer written differently compares equal
+
+    The scheme becomes https, the host is lowercased without 'www.' (short
+    link domains become their site's), the fragment, tracking parameters and
+    a trailing slash are dropped. Path and the remaining query are kept as
+    they are, since transfer ids and security hashes are case sensitive.
+    """
+    parts = urlsplit(url.strip())
+    host = canonical_host(parts.hostname)
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, strip_tracking_query(parts.query), ''))
+
+def sharepoint_site(server_relative_path):
+    """Site part of a server-relative path: '/sites/team' of '/sites/team/Shared Documents/clip.mp4'"""
+    segments = server_relative_path.split('/')
+    if len(segments) > 3 and segments[1].lower() in SITE_ROOTS:
+        return '/'.join(segments[:3])
+    return ''
+
+def sharepoint_download_url(url, hosts=SHAREPOINT_HOSTS):
+    """Direct download URL of a SharePoint / OneDrive for Business file link, None for other links
+
+    Sharing links (/:v:/s/team/<token>) download with download=1, which
+    redirects to the file's download.aspx. Player and library links
+    (stream.aspx?id=..., AllItems.aspx?id=...) and plain file paths go to the
+    site's _layouts/15/download.aspx?SourceUrl=<file path>. Links count as
+    SharePoint when their host ends with one of hosts.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if not host.endswith(tuple(hosts)):
+        return None
+
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if SHARING_LINK_PATH.match(parts.path):
+        params = [(key, value) for key, value in params if key.lower() != 'download'] + [('download', '1')]
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(params), ''))
+
+    if '/_layouts/' in parts.path.lower() or parts.path.lower().endswith('.aspx'):
+        source = next((value for key, value in params if key.lower() == 'id'), None)
+        if not source:
+            return None
+        if parts.path.lower().endswith('/download.aspx'):
+            return url
+    else:
+        source = unquote(parts.path)
+        if '.' not in source.rsplit('/', 1)[-1]:
+            return None  # A folder or site page, not a file
+
+    return f"{parts.scheme}://{parts.netloc}{sharepoint_site(source)}/_layouts/15/download.aspx?SourceUrl={quote(source)}"
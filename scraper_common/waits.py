@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from scraper_common.metrics import span
+from scraper_common.json_state import save_json
+
+POLL_INTERVAL = 0.1  # Seconds between condition checks
+SAVE_INTERVAL = 30  # Seconds between writes of the timeouts file; close() writes the rest
+
+def wait_until(condition, timeout, interval=POLL_INTERVAL):
+    """Poll condition() until it returns something truthy; returns that value, or None on timeout"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            result = condition()
+        except WebDriverException:
+            result = None
+        if result:
+            return result
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(interval)
+
+def wait_for_document_ready(driver, timeout=30):
+    """Wait until the page has finished loading (document.readyState == 'complete')"""
+    return bool(wait_until(
+        lambda: driver.execute_script("return document.readyState;") == "complete",
+        timeout
+    ))
+
+def wait_for_network_idle(driver, idle_time=0.5, timeout=10):
+    """Wait until the page is loaded and no new resources were fetched for idle_time seconds"""
+    deadline = time.monotonic() + timeout
+    last_count = None
+    last_change = time.monotonic()
+
+    while time.monotonic() < deadline:
+        try:
+            state, count = driver.execute_script(
+                "return [document.readyState, performance.getEntriesByType('resource').length];"
+            )
+        except WebDriverException:
+            state, count = None, None
+
+        now = time.monotonic()
+        if count != last_count:
+            last_count = count
+            last_change = now
+        elif state == "complete" and now - last_change >= idle_time:
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
+
+def wait_for_element(driver, locator, timeout=10, clickable=False):
+    """Return the element once it is present (or clickable), None on timeout"""
+    condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(condition)
+    except TimeoutException:
+        return None
+
+def wait_for_any_element(driver, locators, timeout=10):
+    """Return the first element matching any of the locators, None on timeout"""
+    conditions = [EC.presence_of_element_located(locator) for locator in locators]
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(EC.any_of(*conditions))
+    except TimeoutException:
+        return None
+
+def wait_for_staleness(driver, element, timeout=5):
+    """Wait for an element to be removed or hidden, e.g. a dialog after clicking its button"""
+    def gone():
+        try:
+            return not element.is_displayed()
+        except WebDriverException:
+            # Stale or removed from the DOM
+            return True
+    return bool(wait_until(gone, timeout))
+
+def wait_for_url_change(driver, url, timeout=10):
+    """Wait for a redirect away from url"""
+    return bool(wait_until(lambda: driver.current_url != url, timeout))
+
+def site_key(url):
+    """Host name used to group timeouts"""
+    host = urlparse(url).hostname or url
+    return host[4:] if host.startswith('www.') else host
+
+class SiteTimeouts:
+    """Per-site timeouts learned from how long the same step took on recent runs
+
+    The timeout for a step is a multiple of the slowest recent duration
+    (95th percentile), clamped to [minimum, maximum]. Sites without history
+    get the default. The file is written at most every save_interval seconds
+    and on close().
+    """
+    def __init__(self, path='site_timeouts.json', default=20, minimum=3, maximum=60, history=20, factor=2.0,
+                 save_interval=SAVE_INTERVAL):
+        self.path = path
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.history = history
+        self.factor = factor
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.samples = self.load()
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the timeouts file; called with the lock held"""
+        try:
+            save_json(self.path, self.samples)
+        except OSError as e:
+            print(f"⚠️ Warning: Could not save site timeouts: {e}")
+            return
+        self.dirty = False
+        self.last_save = time.monotonic()
+
+    def close(self):
+        """Write samples that haven't been saved yet"""
+        with self.lock:
+            if self.dirty:
+                self.save()
+
+    def timeout(self, url, step):
+        """Timeout in seconds for a step (e.g. 'page_load') on the site of url"""
+        with self.lock:
+            durations = sorted(self.samples.get(site_key(url), {}).get(step, []))
+        if not durations:
+            return self.default
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        return max(self.minimum, min(self.maximum, p95 * self.factor))
+
+    def record(self, url, step, seconds):
+        """Remember how long a step took"""
+        with self.lock:
+            steps = self.samples.setdefault(site_key(url), {})
+            durations = steps.setdefault(step, [])
+            durations.append(round(seconds, 3))
+            del durations[:-self.history]
+            self.dirty = True
+            if time.monotonic() - self.last_save >= self.save_interval:
+                self.save()
+
+    @contextmanager
+    def measure(self, url, step):
+        """Record the duration of the block; yields the timeout to use for it"""
+        started = time.monotonic()
+        yield self.timeout(url, step)
+        self.record(url, step, time.monotonic() - started)
+
+_site_timeouts = None
+_site_timeouts_lock = threading.Lock()
+
+def get_site_timeouts():
+    """Process-wide SiteTimeouts stored next to the working directory (SCRAPER_TIMEOUTS_FILE overrides)"""
+    global _site_timeouts
+    with _site_timeouts_lock:
+        if _site_timeouts is None:
+            _site_timeouts = SiteTimeouts(os.getenv("SCRAPER_TIMEOUTS_FILE", "site_timeouts.json"))
+            atexit.register(_site_timeouts.close)
+        return _site_timeouts
+
+def load_page(driver, url, step='page_load'):
+    """Navigate to url and wait for the load using the site's learned timeout"""
+    with span(step, site=site_key(url)) as current, get_site_timeouts().measure(url, step) as timeout:
+        driver.get(url)
+        ready = wait_for_document_ready(driver, timeout)
+        if not ready:
+            current.fail('timeout')
+        return ready
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The tests import scraper_common and benchmarks from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No metrics files from test runs, whatever the environment sets
+os.environ['SCRAPER_METRICS_FILE'] = ''
+os.environ.pop('SCRAPER_PROMETHEUS_FILE', None)
+os.environ.pop('SCRAPER_METRICS_PORT', None)
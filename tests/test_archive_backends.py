@@ -0,0 +1,81 @@
+import io
+import os
+import bz2
+import gzip
+import lzma
+import tarfile
+import zipfile
+from scraper_common.archive_backends import detect_format, is_tar_header, parse_7z_listing, TAR_BLOCK
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def tar_bytes():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+        data = b'hello\n'
+        info = tarfile.TarInfo('clip/readme.txt')
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_compressed_tars(tmp_path):
+    data = tar_bytes()
+    assert detect_format(write(tmp_path, 'a.tar', data)) == ('tar', None)
+    assert detect_format(write(tmp_path, 'a.tar.gz', gzip.compress(data))) == ('tar', 'gz')
+    assert detect_format(write(tmp_path, 'a.tar.bz2', bz2.compress(data))) == ('tar', 'bz2')
+    assert detect_format(write(tmp_path, 'a.tar.xz', lzma.compress(data))) == ('tar', 'xz')
+
+def test_compressed_file_that_is_not_a_tar(tmp_path):
+    csv = b'date,views\n' + b'2024-01-01,10\n' * 100
+    assert detect_format(write(tmp_path, 'report.csv.gz', gzip.compress(csv))) == (None, None)
+    assert detect_format(write(tmp_path, 'report.csv.xz', lzma.compress(csv))) == (None, None)
+    # Cut off inside the first block
+    assert detect_format(write(tmp_path, 'short.tar.gz', gzip.compress(tar_bytes())[:40])) == (None, None)
+
+def test_v7_tar_header_is_recognised_by_its_checksum():
+    header = bytearray(tar_bytes()[:TAR_BLOCK])
+    header[257:265] = bytes(8)  # No ustar magic
+    header[148:156] = b' ' * 8
+    header[148:156] = b'%06o\0 ' % sum(header)
+    assert is_tar_header(bytes(header))
+    header[0] ^= 1
+    assert not is_tar_header(bytes(header))
+
+def test_zip_and_zip_documents(tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('a.txt', 'a')
+    assert detect_format(write(tmp_path, 'files.zip', buffer.getvalue())) == ('zip', None)
+    assert detect_format(write(tmp_path, 'notes.docx', buffer.getvalue())) == (None, None)
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return f.read()
+
+def test_7z_listing_of_a_solid_archive():
+    solid, members = parse_7z_listing(read_fixture('7z_listing_solid.txt'))
+
+    assert solid
+    assert [(member.name, member.size, member.is_dir) for member in members] == [
+        ('footage', 0, True),
+        ('footage/match day 1.mp4', 734003200, False),
+        ('footage/notes.txt', 1312, False),
+    ]
+
+def test_7z_listing_of_a_zip():
+    solid, members = parse_7z_listing(read_fixture('7z_listing_zip.txt'))
+
+    assert not solid
+    assert [(member.name, member.size, member.is_dir) for member in members] == [
+        ('photos/a.jpg', 1024, False),
+        ('photos/b.jpg', 998, False),
+    ]
+
+def test_7z_listing_of_an_empty_archive():
+    output = read_fixture('7z_listing_solid.txt').partition('----------')[0]
+    assert parse_7z_listing(output) == (True, [])
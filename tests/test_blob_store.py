@@ -0,0 +1,70 @@
+import os
+import json
+import errno
+import pytest
+from scraper_common import blob_store
+from scraper_common.blob_store import BlobStore
+
+URL_A = 'https://wetransfer.com/downloads/aaaa/bbbb'
+URL_B = 'https://www.transfernow.net/dl/cccc'
+
+def make_folder(path, files):
+    for name, data in files.items():
+        target = path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+    return str(path)
+
+def test_identical_files_end_up_as_one_inode(tmp_path):
+    store = BlobStore(str(tmp_path / 'store'))
+    first = make_folder(tmp_path / 'Link_1', {'clip.mp4': b'video' * 1000, 'extracted/notes.txt': b'a'})
+    second = make_folder(tmp_path / 'Link_2', {'copy of clip.mp4': b'video' * 1000, 'clip.mp4.crdownload': b'vid'})
+
+    files_a, saved_a = store.ingest(URL_A, first)
+    files_b, saved_b = store.ingest(URL_B, second)
+
+    assert saved_a == 0 and saved_b == 5000
+    assert files_b == {'copy of clip.mp4': files_a['clip.mp4']}  # Unfinished files are left out
+    assert os.path.samefile(os.path.join(first, 'clip.mp4'), os.path.join(second, 'copy of clip.mp4'))
+    assert os.stat(os.path.join(first, 'clip.mp4')).st_nlink == 3  # Both folders and the blob
+
+def test_index_is_saved_on_close_and_reloaded(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    store = BlobStore(root, save_interval=3600)
+    folder = make_folder(tmp_path / 'Link_1', {'a/clip.mp4': b'video', 'b.txt': b'text'})
+    files, _ = store.ingest(URL_A + '?utm_source=mail', folder)
+    assert not os.path.exists(os.path.join(root, 'index.json'))  # Not due yet
+    store.close()
+
+    with open(os.path.join(root, 'index.json')) as f:
+        assert json.load(f) == {URL_A: files}
+
+    reloaded = BlobStore(root)
+    # Files that are links to a blob are known by their inode and not hashed again
+    monkeypatch.setattr(BlobStore, 'file_hash', staticmethod(lambda path: pytest.fail(f"hashed {path}")))
+    assert reloaded.add(os.path.join(folder, 'a', 'clip.mp4')) == (files['a/clip.mp4'], False)
+
+    target = str(tmp_path / 'Link_2')
+    assert reloaded.materialize(URL_A, target)
+    assert os.path.samefile(os.path.join(target, 'a', 'clip.mp4'), os.path.join(folder, 'a', 'clip.mp4'))
+    assert not reloaded.materialize(URL_B, target)
+
+def test_materialize_fails_when_a_blob_is_gone(tmp_path):
+    store = BlobStore(str(tmp_path / 'store'))
+    files, _ = store.ingest(URL_A, make_folder(tmp_path / 'Link_1', {'clip.mp4': b'video'}))
+    os.remove(store.blob_path(files['clip.mp4']))
+
+    assert not store.materialize(URL_A, str(tmp_path / 'Link_2'))
+
+@pytest.mark.parametrize('error', [errno.EXDEV, errno.EPERM])
+def test_files_stay_where_hardlinks_are_impossible(tmp_path, monkeypatch, error):
+    store = BlobStore(str(tmp_path / 'store'))
+    folder = make_folder(tmp_path / 'Link_1', {'clip.mp4': b'video'})
+
+    def no_links(source, dest):
+        raise OSError(error, os.strerror(error))
+    monkeypatch.setattr(blob_store.os, 'link', no_links)
+
+    assert store.add(os.path.join(folder, 'clip.mp4')) == (None, False)
+    assert store.ingest(URL_A, folder) == ({}, 0)
+    assert (tmp_path / 'Link_1' / 'clip.mp4').read_bytes() == b'video'
@@ -0,0 +1,14 @@
+from scraper_common.download_watcher import DownloadWatcher
+
+def test_leftover_partial_does_not_count_as_started(tmp_path):
+    (tmp_path / 'video.mp4.crdownload').write_bytes(b'stale')
+    with DownloadWatcher(str(tmp_path)) as watcher:
+        assert not watcher.started()
+        assert not watcher.wait_for_start(timeout=0.2)
+
+def test_new_download_counts_as_started(tmp_path):
+    (tmp_path / 'video.mp4.crdownload').write_bytes(b'stale')
+    with DownloadWatcher(str(tmp_path)) as watcher:
+        (tmp_path / 'Unconfirmed 123.crdownload').write_bytes(b'')
+        assert watcher.started()
+        assert watcher.wait_for_start(timeout=0.2)
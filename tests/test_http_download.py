@@ -0,0 +1,154 @@
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import urllib3
+
+from scraper_common.http_download import HttpDownloader, SegmentedDownloader, PART_SUFFIX, SEGMENTS_SUFFIX
+
+BODY = bytes(range(256)) * 1024  # 256 KB
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves BODY at any path, honouring Range headers unless the server has ranges turned off"""
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('Range'))
+        range_header = self.headers.get('Range')
+        if not self.server.ranges or not range_header:
+            self.send_body(200, BODY)
+            return
+
+        start, _, end = range_header[len('bytes='):].partition('-')
+        start = int(start)
+        end = min(int(end), len(BODY) - 1) if end else len(BODY) - 1
+        if start >= len(BODY):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(BODY)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_body(206, BODY[start:end + 1], f'bytes {start}-{end}/{len(BODY)}')
+
+    def send_body(self, status, body, content_range=None):
+        self.send_response(status)
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Disposition', 'attachment; filename="payload.bin"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    httpd.ranges = True
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/payload.bin'
+
+def pool():
+    return urllib3.PoolManager(retries=False)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_download_names_file_from_content_disposition(server, tmp_path):
+    path = HttpDownloader(pool_manager=pool()).download(url(server), str(tmp_path))
+    assert os.path.basename(path) == 'payload.bin'
+    assert read(path) == BODY
+    assert not os.path.exists(path + PART_SUFFIX)
+
+def test_resumes_partial_file_with_range_request(server, tmp_path):
+    dest = str(tmp_path / 'payload.bin')
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(BODY[:100000])
+
+    HttpDownloader(pool_manager=pool()).download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+    assert server.requests[-1] == 'bytes=100000-'
+
+def test_complete_partial_file_is_finished_on_416(server, tmp_path):
+    dest = str(tmp_path / 'payload.bin')
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(BODY)
+
+    HttpDownloader(pool_manager=pool()).download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+    assert server.requests[-1] == f'bytes={len(BODY)}-'
+
+def test_oversized_partial_file_restarts_on_416(server, tmp_path):
+    dest = str(tmp_path / 'payload.bin')
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(b'x' * (len(BODY) + 5000))
+
+    HttpDownloader(pool_manager=pool()).download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+
+def test_partial_file_is_replaced_when_server_has_no_ranges(server, tmp_path):
+    server.ranges = False
+    dest = str(tmp_path / 'payload.bin')
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(b'x' * 1000)
+
+    HttpDownloader(pool_manager=pool()).download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+
+def segmented(connections=4):
+    return SegmentedDownloader(connections=connections, min_segment_size=16 * 1024, pool_manager=pool())
+
+def test_segmented_download(server, tmp_path):
+    path = segmented().download(url(server), str(tmp_path))
+
+    assert read(path) == BODY
+    assert not os.path.exists(path + PART_SUFFIX + SEGMENTS_SUFFIX)
+    assert len([r for r in server.requests if r and r != 'bytes=0-0']) > 1
+
+def test_segmented_download_resumes_missing_ranges(server, tmp_path):
+    dest = str(tmp_path / 'payload.bin')
+    downloader = segmented()
+    segments = downloader.plan_segments(len(BODY))
+    segments[0].done = segments[0].length
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(BODY[:segments[0].length])
+        f.truncate(len(BODY))
+    downloader.save_state(dest + PART_SUFFIX + SEGMENTS_SUFFIX, len(BODY), segments)
+
+    downloader.download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+    assert f'bytes=0-{segments[0].end}' not in server.requests
+
+def test_segmented_download_shrinks_oversized_leftover(server, tmp_path):
+    dest = str(tmp_path / 'payload.bin')
+    with open(dest + PART_SUFFIX, 'wb') as f:
+        f.write(b'x' * (len(BODY) * 2))
+    with open(dest + PART_SUFFIX + SEGMENTS_SUFFIX, 'w') as f:
+        json.dump({'total': len(BODY) * 2, 'segments': [[0, len(BODY) * 2 - 1, 0]]}, f)
+
+    segmented().download(url(server), dest_path=dest)
+
+    assert read(dest) == BODY
+
+def test_segmented_download_falls_back_to_single_stream(server, tmp_path):
+    server.ranges = False
+
+    path = segmented().download(url(server), str(tmp_path))
+
+    assert read(path) == BODY
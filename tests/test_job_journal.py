@@ -0,0 +1,79 @@
+import os
+import json
+from benchmarks.run_benchmarks import load_module
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_module('transfer_job_journal', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'job_journal.py'))
+from transfer_job_journal import JobJournal, STARTED, RESOLVED, DOWNLOADING, DOWNLOADED, EXTRACTED, FAILED
+
+def write_events(path, events, tail=''):
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+        f.write(tail)
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    write_events(path, [
+        {'link_id': 'link_1', 'phase': STARTED},
+        {'link_id': 'link_1', 'phase': RESOLVED, 'url': 'https://example.com/a.zip', 'filename': 'a.zip'},
+    ], tail='{"link_id": "link_1", "phase": "downlo')
+
+    journal = JobJournal(path)
+    try:
+        assert journal.state('link_1')['phase'] == RESOLVED
+        assert journal.state('link_1')['url'] == 'https://example.com/a.zip'
+
+        # The next event starts on a line of its own
+        journal.append('link_1', DOWNLOADED, path='/tmp/a.zip')
+    finally:
+        journal.close()
+    assert JobJournal(path).state('link_1')['phase'] == DOWNLOADED
+
+def test_later_events_win_and_started_resets(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    write_events(path, [
+        {'link_id': 'link_1', 'phase': STARTED},
+        {'link_id': 'link_1', 'phase': RESOLVED, 'url': 'https://example.com/old.zip'},
+        {'link_id': 'link_1', 'phase': FAILED, 'error': 'timeout'},
+        {'link_id': 'link_1', 'phase': DOWNLOADED, 'path': '/tmp/old.zip'},
+        {'link_id': 'link_2', 'phase': STARTED},
+        {'link_id': 'link_2', 'phase': RESOLVED, 'url': 'https://example.com/b.zip'},
+        {'link_id': 'link_2', 'phase': DOWNLOADING, 'offset': 100},
+        {'link_id': 'link_2', 'phase': STARTED},
+        {'phase': RESOLVED, 'url': 'no link id'},
+    ])
+
+    states = JobJournal(path).replay()
+
+    # A DOWNLOADED recorded after FAILED is the state, the error stays merged in
+    assert states['link_1']['phase'] == DOWNLOADED
+    assert states['link_1']['url'] == 'https://example.com/old.zip'
+    assert states['link_1']['error'] == 'timeout'
+    # A new attempt forgets the earlier URL and offset
+    assert states['link_2'] == {'phase': STARTED}
+    assert set(states) == {'link_1', 'link_2'}
+
+def test_compact_keeps_one_line_per_unfinished_link(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = JobJournal(path, progress_interval=0)
+    for link_id in ('link_1', 'link_2', 'link_3'):
+        journal.append(link_id, STARTED)
+        journal.append(link_id, RESOLVED, url=f'https://example.com/{link_id}.zip')
+    journal.progress('link_1', 10, 100)
+    journal.progress('link_1', 50, 100)
+    journal.append('link_2', EXTRACTED)
+    journal.append('link_3', FAILED, error='gone')
+    before = journal.state('link_1')
+
+    journal.compact()
+    journal.append('link_1', DOWNLOADED, path='/tmp/link_1.zip')
+    journal.close()
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['link_id'] for line in lines] == ['link_1', 'link_1']
+    assert lines[0]['offset'] == 50 and lines[0] == {'link_id': 'link_1', **before}
+    state = JobJournal(path).state('link_1')
+    assert (state['phase'], state['offset'], state['url']) == (DOWNLOADED, 50, 'https://example.com/link_1.zip')
+    assert JobJournal(path).state('link_2') == {}
@@ -0,0 +1,96 @@
+import os
+import json
+import pytest
+from benchmarks.run_benchmarks import load_module
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+link_store = load_module('transfer_link_store', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'link_store.py'))
+
+def link(n, **fields):
+    return dict({'id': f'link_{n}', 'row': n + 1, 'url': f'https://we.tl/t-{n}', 'type': 'wetransfer',
+                 'original_cell': f'https://we.tl/t-{n}', 'status': 'pending', 'processed': 0}, **fields)
+
+def write_links(path, links, metadata=None):
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata or {}, 'links': links}, f)
+
+@pytest.fixture
+def store(tmp_path):
+    store = link_store.LinkStore(str(tmp_path / 'links.db'))
+    yield store
+    store.close()
+
+def test_claim_twice(store, tmp_path):
+    write_links(tmp_path / 'links.json', [link(1)])
+    store.import_json(str(tmp_path / 'links.json'))
+
+    assert store.claim('link_1')
+    assert not store.claim('link_1')
+    assert store.pending_links()[0]['status'] == 'processing'
+
+def test_claim_in_a_second_connection_sees_the_first(store, tmp_path):
+    write_links(tmp_path / 'links.json', [link(1)])
+    store.import_json(str(tmp_path / 'links.json'))
+    other = link_store.LinkStore(store.path)
+    try:
+        assert other.claim('link_1')
+        assert not store.claim('link_1')
+    finally:
+        other.close()
+
+def test_finished_link_cant_be_claimed(store, tmp_path):
+    write_links(tmp_path / 'links.json', [link(1)])
+    store.import_json(str(tmp_path / 'links.json'))
+    store.update_status('link_1', 'completed', processed=1)
+
+    assert not store.claim('link_1')
+    assert store.pending_links() == []
+
+def test_reimport_keeps_status_and_drops_vanished_pending_links(store, tmp_path):
+    path = str(tmp_path / 'links.json')
+    write_links(path, [link(1), link(2), link(3)])
+    store.import_json(path)
+    store.update_status('link_1', 'completed', processed=1)
+    store.claim('link_2')
+
+    # The sheet changed: link_1 moved, link_3 is gone, link_4 is new; the file still says 'pending' for link_1
+    write_links(path, [link(4), link(1, row=10, url='https://we.tl/t-1b')], metadata={'sync': {'last_row': 10}})
+    assert store.import_json(path) == 2
+
+    links = {item['id']: item for item in store.all_links()}
+    assert set(links) == {'link_1', 'link_2', 'link_4'}  # link_2 is being processed, so it stays
+    assert (links['link_1']['status'], links['link_1']['processed']) == ('completed', 1)
+    assert (links['link_1']['row'], links['link_1']['url']) == (10, 'https://we.tl/t-1b')
+    assert links['link_2']['status'] == 'processing'
+    assert [item['id'] for item in store.all_links()][:2] == ['link_4', 'link_1']
+    assert store.metadata() == {'sync': {'last_row': 10}}
+
+def test_requeue_stale(store, tmp_path):
+    write_links(tmp_path / 'links.json', [link(1), link(2), link(3)])
+    store.import_json(str(tmp_path / 'links.json'))
+    for link_id in ('link_1', 'link_2', 'link_3'):
+        store.claim(link_id)
+    store.update_status('link_3', 'completed', processed=1)
+
+    assert store.requeue_stale(['link_1']) == 1
+    assert {item['id']: item['status'] for item in store.pending_links()} == {'link_1': 'pending', 'link_2': 'processing'}
+    assert store.requeue_stale() == 1
+    assert store.requeue_stale() == 0
+    assert store.claim('link_2')
+
+def test_export_json_round_trip(store, tmp_path):
+    path = str(tmp_path / 'links.json')
+    write_links(path, [link(1), link(2)], metadata={'sync': {'last_row': 3}})
+    store.import_json(path)
+    store.update_status('link_2', 'failed', processed=1, error_message='Download failed')
+
+    exported = str(tmp_path / 'exported.json')
+    store.export_json(exported)
+
+    with open(exported) as f:
+        data = json.load(f)
+    assert [(item['id'], item['status'], item.get('error')) for item in data['links']] == [
+        ('link_1', 'pending', None), ('link_2', 'failed', 'Download failed')]
+    assert data['metadata']['sync'] == {'last_row': 3}
+    assert data['metadata']['total_links'] == 2
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path))
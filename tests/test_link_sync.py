@@ -0,0 +1,49 @@
+import os
+import json
+from benchmarks.run_benchmarks import load_module
+from benchmarks.fake_sheets import FakeSheetsService
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+extractor_module = load_module(
+    'transfer_sheets_extractor', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'google_sheets_extractor.py'))
+
+X = 'https://wetransfer.com/downloads/aaaa/bbbb'
+Y = 'https://www.transfernow.net/dl/cccc'
+
+def sync(rows, links_file, full_rescan=False):
+    extractor = extractor_module.GoogleSheetsExtractor('sheet-id', 'Sheet1', 'Link', service=FakeSheetsService(rows))
+    return extractor.sync_links_file(links_file, full_rescan)
+
+def test_duplicate_link_moves_to_the_row_still_listing_it(tmp_path):
+    links_file = str(tmp_path / 'links.json')
+    links, added = sync([['Name', 'Link'], ['a', X], ['b', X]], links_file)
+    assert [(link['url'], link['row']) for link in links] == [(X, 2)]
+
+    # Row 2 drops the link; row 3 is unchanged, so only row 2 is merged
+    links, added = sync([['Name', 'Link'], ['a', Y], ['b', X]], links_file, full_rescan=True)
+
+    assert sorted((link['url'], link['row']) for link in links) == [(X, 3), (Y, 2)]
+    assert [link['url'] for link in added] == [Y]
+    with open(links_file) as f:
+        assert {link['url']: link['row'] for link in json.load(f)['links']} == {X: 3, Y: 2}
+
+def test_link_no_row_lists_is_dropped(tmp_path):
+    links_file = str(tmp_path / 'links.json')
+    sync([['Name', 'Link'], ['a', X], ['b', Y]], links_file)
+
+    links, _ = sync([['Name', 'Link'], ['a', 'sent by mail'], ['b', Y]], links_file, full_rescan=True)
+
+    assert [link['url'] for link in links] == [Y]
+
+def test_processed_link_is_kept(tmp_path):
+    links_file = str(tmp_path / 'links.json')
+    sync([['Name', 'Link'], ['a', X]], links_file)
+    with open(links_file) as f:
+        data = json.load(f)
+    data['links'][0].update(status='completed', processed=1)
+    with open(links_file, 'w') as f:
+        json.dump(data, f)
+
+    links, _ = sync([['Name', 'Link'], ['a', 'done']], links_file, full_rescan=True)
+
+    assert [(link['url'], link['processed']) for link in links] == [(X, 1)]
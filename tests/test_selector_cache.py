@@ -0,0 +1,52 @@
+import os
+import json
+from scraper_common.selector_cache import SelectorCache
+
+URL = 'https://wetransfer.com/downloads/aaaa/bbbb'
+SPECIFIC = "//button[@data-testid='download-button']"
+CLASS = "//button[contains(@class, 'transfer__button')]"
+GENERIC = "//*[contains(text(),'Download')]"
+SELECTORS = [SPECIFIC, CLASS, GENERIC]
+
+def cache(tmp_path, **kwargs):
+    return SelectorCache(str(tmp_path / 'selector_cache.json'), **kwargs)
+
+def test_unknown_selectors_keep_the_declared_order(tmp_path):
+    assert cache(tmp_path).order(URL, 'download_button', SELECTORS) == SELECTORS
+
+def test_one_win_doesnt_promote_a_generic_fallback(tmp_path):
+    selector_cache = cache(tmp_path)
+    selector_cache.record(URL, 'download_button', SELECTORS, GENERIC, 0.5)
+
+    assert selector_cache.order(URL, 'download_button', SELECTORS) == SELECTORS
+
+def test_selector_with_enough_hits_moves_ahead(tmp_path):
+    selector_cache = cache(tmp_path, min_hits=3)
+    for _ in range(3):
+        selector_cache.record(URL, 'download_button', SELECTORS, CLASS, 0.5)
+
+    assert selector_cache.order(URL, 'download_button', SELECTORS) == [CLASS, SPECIFIC, GENERIC]
+    # Other pages of the site and other lookups are kept apart
+    assert selector_cache.order('https://wetransfer.com/other/page', 'download_button', SELECTORS) == SELECTORS
+    assert selector_cache.order(URL, 'confirm_button', SELECTORS) == SELECTORS
+
+def test_saves_are_spaced_out_and_close_writes_the_rest(tmp_path):
+    path = tmp_path / 'selector_cache.json'
+    selector_cache = cache(tmp_path, save_interval=3600)
+    selector_cache.record(URL, 'download_button', SELECTORS, SPECIFIC, 0.2)
+    assert not path.exists()
+
+    selector_cache.close()
+
+    with open(path) as f:
+        entries = json.load(f)
+    assert list(entries) == ['wetransfer.com|downloads|download_button']
+    assert os.listdir(tmp_path) == ['selector_cache.json']
+    reloaded = cache(tmp_path)
+    assert reloaded.entries == entries
+
+def test_every_record_is_saved_without_an_interval(tmp_path):
+    selector_cache = cache(tmp_path, save_interval=0)
+    selector_cache.record(URL, 'download_button', SELECTORS, SPECIFIC, 0.2)
+
+    assert cache(tmp_path).entries == selector_cache.entries
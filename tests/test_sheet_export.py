@@ -0,0 +1,22 @@
+import pytest
+from scraper_common.sheet_export import export_url, gid_from_url, iter_export_rows
+
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/sheet-id/edit?usp=sharing'
+
+def test_gid_from_fragment():
+    assert gid_from_url(SHEET_URL + '#gid=1234') == '1234'
+    assert gid_from_url(SHEET_URL) is None
+
+def test_csv_picks_the_sheet_by_name_without_a_gid():
+    assert export_url('sheet-id', 'csv', 'Links Tab').endswith('/gviz/tq?tqx=out:csv&sheet=Links%20Tab')
+    assert export_url('sheet-id', 'csv', 'Links Tab', '7').endswith('/export?format=csv&gid=7')
+
+def test_html_uses_the_gid():
+    assert export_url('sheet-id', 'html', gid='7').endswith('/htmlview/sheet?headers=false&gid=7')
+
+def test_html_without_a_gid_is_an_error():
+    # Reading gid 0 instead would silently return another sheet
+    with pytest.raises(ValueError):
+        export_url('sheet-id', 'html', 'Links Tab')
+    with pytest.raises(ValueError):
+        iter_export_rows(SHEET_URL, 'html', 'Links Tab')
@@ -0,0 +1,52 @@
+from benchmarks.fake_sheets import FakeSheetsService
+from scraper_common.sheets_reader import column_letter, iter_column
+
+def sheet(cells):
+    """A sheet with a header row and the given cells in column D"""
+    return [['Name', 'B', 'C', 'Link']] + [['x', '', '', cell] for cell in cells]
+
+def read(service, **kwargs):
+    return list(iter_column(service, 'sheet-id', 'Sheet1', 3, **kwargs))
+
+def test_column_letter():
+    assert [column_letter(index) for index in (0, 3, 25, 26, 701, 702)] == ['A', 'D', 'Z', 'AA', 'ZZ', 'AAA']
+
+def test_reads_every_row_across_batches():
+    cells = [f'link {n}' for n in range(95)]
+    service = FakeSheetsService(sheet(cells))
+
+    rows = read(service, window_rows=10, windows_per_request=3)
+
+    assert rows == [(n + 2, cell) for n, cell in enumerate(cells)]
+    assert service.calls['batchGet'] == 4
+
+def test_blank_rows_between_links_are_yielded_empty():
+    service = FakeSheetsService(sheet(['a', '', '', 'b']))
+
+    assert read(service) == [(2, 'a'), (3, ''), (4, ''), (5, 'b')]
+
+def test_long_gap_does_not_end_reading():
+    cells = ['first'] + [''] * 2500 + ['after the gap']
+    service = FakeSheetsService(sheet(cells))
+
+    rows = dict(read(service, window_rows=100, windows_per_request=5))
+
+    assert rows[2] == 'first'
+    assert rows[len(cells) + 1] == 'after the gap'
+
+def test_stops_at_the_end_of_the_grid():
+    service = FakeSheetsService(sheet(['a', 'b']), grid_rows=1000)
+
+    rows = read(service, window_rows=100, windows_per_request=3)
+
+    assert [row for row in rows if row[1]] == [(2, 'a'), (3, 'b')]
+    assert service.calls['batchGet'] == 4  # Rows 2-1000, never past the grid
+
+def test_reads_rest_of_column_at_once_without_row_count():
+    service = FakeSheetsService(sheet(['a'] + [''] * 50 + ['b']), sheet_name='Other')
+
+    rows = read(service, window_rows=20, windows_per_request=2)
+
+    assert rows[0] == (2, 'a')
+    assert rows[-1] == (53, 'b')
+    assert service.calls['batchGet'] == 1
@@ -0,0 +1,50 @@
+import os
+import json
+import threading
+from scraper_common.waits import SiteTimeouts
+
+URL = 'https://www.wetransfer.com/downloads/aaaa/bbbb'
+
+def timeouts(tmp_path, **kwargs):
+    return SiteTimeouts(str(tmp_path / 'site_timeouts.json'), **kwargs)
+
+def test_timeout_follows_recent_durations(tmp_path):
+    site_timeouts = timeouts(tmp_path, default=20, minimum=3, maximum=60, factor=2.0)
+    assert site_timeouts.timeout(URL, 'page_load') == 20
+
+    for seconds in (1.0, 4.0, 2.5):
+        site_timeouts.record(URL, 'page_load', seconds)
+    assert site_timeouts.timeout(URL, 'page_load') == 8.0
+    site_timeouts.record(URL, 'page_load', 0.1)
+    assert site_timeouts.timeout('https://transfernow.net/dl/x', 'page_load') == 20
+
+def test_saves_are_spaced_out_and_close_writes_the_rest(tmp_path):
+    site_timeouts = timeouts(tmp_path, save_interval=3600)
+    site_timeouts.record(URL, 'page_load', 1.5)
+    assert not (tmp_path / 'site_timeouts.json').exists()
+
+    site_timeouts.close()
+
+    with open(tmp_path / 'site_timeouts.json') as f:
+        assert json.load(f) == {'wetransfer.com': {'page_load': [1.5]}}
+    assert timeouts(tmp_path).samples == site_timeouts.samples
+
+def test_parallel_workers_saving_at_once(tmp_path):
+    # Two stores on one file, as in two processes, each written from several threads
+    stores = [timeouts(tmp_path, save_interval=0, history=1000) for _ in range(2)]
+
+    def work(store, worker):
+        for n in range(50):
+            store.record(f'https://site{worker}.example/page', 'page_load', n / 10)
+
+    threads = [threading.Thread(target=work, args=(store, worker))
+               for store in stores for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert os.listdir(tmp_path) == ['site_timeouts.json']
+    with open(tmp_path / 'site_timeouts.json') as f:
+        # The last complete save wins
+        assert json.load(f) in [store.samples for store in stores]
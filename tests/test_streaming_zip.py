@@ -0,0 +1,106 @@
+import io
+import os
+import time
+import random
+import zipfile
+import threading
+import pytest
+from scraper_common.streaming_zip import (GrowingFile, OverlappedExtraction, StreamingUnsupported,
+                                          stream_extract, verify_extraction)
+
+CONTENTS = {
+    'clip/video.mp4': random.Random(1).randbytes(300 * 1024),
+    'clip/notes.txt': b'take 3 is the one\n' * 5000,
+    'readme.txt': b'hello\n',
+}
+
+class Unseekable(io.RawIOBase):
+    """Write-only stream, which makes zipfile put sizes and CRCs in data descriptors"""
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+def zip_bytes(compression, descriptors=False):
+    target = Unseekable() if descriptors else io.BytesIO()
+    with zipfile.ZipFile(target, 'w', compression) as archive:
+        for name, data in CONTENTS.items():
+            archive.writestr(name, data)
+    return (target.buffer if descriptors else target).getvalue()
+
+def extract(data, tmp_path):
+    path = tmp_path / 'archive.zip'
+    path.write_bytes(data)
+    source = GrowingFile(str(path), finished=lambda: True)
+    try:
+        return str(path), stream_extract(source, str(tmp_path / 'extracted'))
+    finally:
+        source.close()
+
+def assert_extracted(tmp_path):
+    for name, data in CONTENTS.items():
+        assert (tmp_path / 'extracted' / name).read_bytes() == data
+
+def test_deflate_with_data_descriptors(tmp_path):
+    data = zip_bytes(zipfile.ZIP_DEFLATED, descriptors=True)
+    assert zipfile.ZipFile(io.BytesIO(data)).infolist()[-1].flag_bits & 0x08
+
+    path, extracted = extract(data, tmp_path)
+
+    assert sorted(extracted) == sorted(CONTENTS)
+    assert verify_extraction(path, extracted)
+    assert_extracted(tmp_path)
+
+def test_stored_members(tmp_path):
+    path, extracted = extract(zip_bytes(zipfile.ZIP_STORED), tmp_path)
+
+    assert verify_extraction(path, extracted)
+    assert_extracted(tmp_path)
+
+def test_stored_members_with_data_descriptors_are_left_for_later(tmp_path):
+    with pytest.raises(StreamingUnsupported):
+        extract(zip_bytes(zipfile.ZIP_STORED, descriptors=True), tmp_path)
+
+def test_truncated_archive(tmp_path):
+    data = zip_bytes(zipfile.ZIP_DEFLATED, descriptors=True)
+    with pytest.raises(EOFError):
+        extract(data[:len(data) // 2], tmp_path)
+    # Nothing half-written is left under the member's name
+    assert not (tmp_path / 'extracted' / 'clip' / 'notes.txt').exists()
+
+def write_slowly(directory, data, chunk_size=16 * 1024, pause=0.005):
+    """Write data like a browser download: to a .crdownload file, renamed once complete"""
+    partial = os.path.join(directory, 'archive.zip.crdownload')
+    with open(partial, 'wb') as f:
+        for offset in range(0, len(data), chunk_size):
+            f.write(data[offset:offset + chunk_size])
+            f.flush()
+            time.sleep(pause)
+    os.replace(partial, os.path.join(directory, 'archive.zip'))
+
+def find_partial(directory):
+    for name in os.listdir(directory):
+        if name.endswith('.crdownload'):
+            return os.path.join(directory, name)
+    return None
+
+def test_overlapped_extraction_of_a_growing_file(tmp_path):
+    data = zip_bytes(zipfile.ZIP_DEFLATED, descriptors=True)
+    extraction = OverlappedExtraction(str(tmp_path), lambda: find_partial(str(tmp_path)), poll_interval=0.01).start()
+    writer = threading.Thread(target=write_slowly, args=(str(tmp_path), data))
+    writer.start()
+    writer.join()
+
+    assert extraction.finish(timeout=30)
+    assert_extracted(tmp_path)
+
+def test_overlapped_extraction_of_a_download_cut_short(tmp_path):
+    data = zip_bytes(zipfile.ZIP_DEFLATED, descriptors=True)
+    extraction = OverlappedExtraction(str(tmp_path), lambda: find_partial(str(tmp_path)), poll_interval=0.01).start()
+    write_slowly(str(tmp_path), data[:len(data) // 2])
+
+    assert not extraction.finish(timeout=30)
@@ -0,0 +1,60 @@
+from scraper_common.urls import extract_urls, strip_tracking, normalize_url, sharepoint_download_url
+
+WT = 'https://wetransfer.com/downloads/4a1b2c3d/9e8f7a'
+TN = 'https://www.transfernow.net/dl/20240301abcd'
+
+def test_delimiters_between_links():
+    assert extract_urls(f'{WT}\n{TN}') == [WT, TN]
+    assert extract_urls(f'{WT}\r\n{TN}') == [WT, TN]
+    assert extract_urls(f'{WT} | {TN};{WT},{TN}') == [WT, TN, WT, TN]
+
+def test_surrounding_text_and_trailing_punctuation():
+    assert extract_urls(f'Files: {WT} (expires in 7 days)') == [WT]
+    assert extract_urls(f'See {WT}.') == [WT]
+    assert extract_urls(f'Sent "{WT}"!') == [WT]
+    assert extract_urls(f'({WT})') == [WT]
+    assert extract_urls(f'[{TN}]') == [TN]
+
+def test_bracket_the_url_opened_itself_is_kept():
+    url = 'https://example.com/wiki/Clip_(2024)'
+    assert extract_urls(f'{url}, then') == [url]
+    assert extract_urls(f'({url})') == [url]
+
+def test_glued_links_are_split():
+    assert extract_urls(WT + TN) == [WT, TN]
+    assert extract_urls(f'{WT}https://we.tl/t-AbC123') == [WT, 'https://we.tl/t-AbC123']
+
+def test_not_links():
+    assert extract_urls('') == []
+    assert extract_urls('sent by mail, resend') == []
+    assert extract_urls('https:// nothing') == []
+    assert extract_urls('ftp://example.com/file.zip') == []
+
+def test_tracking_parameters_are_removed():
+    tracked = f'{WT}?utm_campaign=WT_email_tracking&utm_source=notify_recipient_email&trk=TRN_TDL_01'
+    assert extract_urls(tracked) == [WT]
+    assert strip_tracking(f'{TN}?fbclid=IwAR0abc') == TN
+    assert strip_tracking(f'{TN}?gclid=x&UTM_Medium=email#files') == f'{TN}#files'
+
+def test_other_query_parameters_are_kept_as_they_are():
+    assert strip_tracking(f'{WT}?token=AbC%2Fd&utm_source=mail&lang=en') == f'{WT}?token=AbC%2Fd&lang=en'
+    assert strip_tracking(f'{WT}?utm=1&utmost=2') == f'{WT}?utm=1&utmost=2'
+    assert extract_urls(f'{TN}?k=Zx9&fbclid=abc, next') == [f'{TN}?k=Zx9']
+
+def test_normalize_url():
+    assert normalize_url('https://we.tl/t-AbC123') == 'https://wetransfer.com/t-AbC123'
+    assert normalize_url('http://WWW.WeTransfer.com/downloads/AbC/Def/') == 'https://wetransfer.com/downloads/AbC/Def'
+    assert normalize_url(f'{TN}?utm_source=x&k=1#top') == 'https://transfernow.net/dl/20240301abcd?k=1'
+    assert normalize_url('https://example.com:8443/a') == 'https://example.com:8443/a'
+    assert normalize_url(WT) == normalize_url(WT.replace('https', 'http') + '/')
+
+def test_sharepoint_download_url():
+    sharing = 'https://contoso.sharepoint.com/:v:/s/team/EabcDEF?e=Xy12'
+    assert sharepoint_download_url(sharing) == sharing + '&download=1'
+    assert sharepoint_download_url('https://contoso.sharepoint.com/sites/team/Shared%20Documents/clip.mp4') == \
+        'https://contoso.sharepoint.com/sites/team/_layouts/15/download.aspx?SourceUrl=/sites/team/Shared%20Documents/clip.mp4'
+    assert sharepoint_download_url('https://contoso.sharepoint.com/sites/team/Shared%20Documents') is None
+    assert sharepoint_download_url(WT) is None
+    assert sharepoint_download_url('https://files.sharepoint.com.localhost/:v:/s/t/E1') is None
+    assert sharepoint_download_url('https://files.sharepoint.com.localhost/:v:/s/t/E1', ('.localhost',)) == \
+        'https://files.sharepoint.com.localhost/:v:/s/t/E1?download=1'
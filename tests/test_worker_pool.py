@@ -0,0 +1,63 @@
+import os
+import sqlite3
+from benchmarks.run_benchmarks import load_module
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+worker_pool = load_module('transfer_worker_pool', os.path.join(REPO_ROOT, 'GoogleSheetsExtractorWeTransfer', 'worker_pool.py'))
+
+class FakeScraper:
+    def __init__(self, download_dir):
+        self.download_directory = download_dir
+
+    def reuse_stored_download(self, link_data):
+        return False
+
+    def setup_chrome_driver(self):
+        pass
+
+    def process_link(self, link_data):
+        return True
+
+    def close(self, healthy=True):
+        pass
+
+class FlakyStore:
+    """Status writes for the listed (link, status) pairs fail like a locked database"""
+    def __init__(self, failing=(), failing_claims=()):
+        self.failing = set(failing)
+        self.failing_claims = set(failing_claims)
+        self.statuses = {}
+
+    def claim(self, link_id):
+        if link_id in self.failing_claims:
+            raise sqlite3.OperationalError('database is locked')
+        self.statuses[link_id] = 'processing'
+        return True
+
+    def update_status(self, link_id, status, processed=None, error_message=None):
+        if (link_id, status) in self.failing:
+            raise sqlite3.OperationalError('database is locked')
+        self.statuses[link_id] = status
+
+def run(tmp_path, store, count=4):
+    """One worker over count links, each on a host of its own so the queue doesn't space them out"""
+    pool = worker_pool.TransferWorkerPool(1, str(tmp_path), FakeScraper, store.update_status, claim_callback=store.claim)
+    links = [{'id': f'link_{n}', 'row': n + 2, 'type': f'host_{n}'} for n in range(count)]
+    return pool, pool.run(links)
+
+def test_failed_status_write_requeues_the_link_and_the_worker_goes_on(tmp_path):
+    store = FlakyStore(failing={('link_1', 'completed')})
+
+    pool, (successful, failed) = run(tmp_path, store)
+
+    assert (successful, failed) == (3, 1)
+    assert store.statuses == {'link_0': 'completed', 'link_1': 'pending', 'link_2': 'completed', 'link_3': 'completed'}
+    assert pool.claimed_links() == []
+
+def test_failed_claim_fails_only_that_link(tmp_path):
+    store = FlakyStore(failing_claims={'link_0'})
+
+    pool, (successful, failed) = run(tmp_path, store)
+
+    assert (successful, failed) == (3, 1)
+    assert 'link_0' not in store.statuses